@@ -1,4 +1,11 @@
 from django.contrib import admin
+from django.core.exceptions import PermissionDenied
+from django.template.response import TemplateResponse
+from django.urls import path
+
+from .form import RegistryImportForm
+from .imports import IMPORTERS, read_csv
+from .lookup_cache import LookupCacheAdminMixin
 from .models.client import (
     Client,
     ClientCareUnit,
@@ -22,6 +29,9 @@ from .models.management import (
     Admission,
     Transfusion,
 )
+from .models.summary import ClientClinicalSummary
+from .search import search_clients
+from .views.pagination import EstimatedCountPaginator
 from .models.lookup import (
     Province,
     District,
@@ -36,23 +46,35 @@ from .models.lookup import (
 # ───────────────────────────────────────────────
 
 
-class FamilyMemberInline(admin.TabularInline):
+class HistoryInlineMixin(LookupCacheAdminMixin):
+    """Join the rows each form's ``__str__`` reads instead of fetching them per form."""
+
+    select_related = ("client",)
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).select_related(*self.select_related)
+
+
+class FamilyMemberInline(LookupCacheAdminMixin, admin.TabularInline):
     model = FamilyMember
     extra = 1
 
 
-class DrugInline(admin.TabularInline):
+class DrugInline(HistoryInlineMixin, admin.TabularInline):
     model = Drug
+    select_related = ("client", "drug_name")
     extra = 1
 
 
-class ComplicationInline(admin.TabularInline):
+class ComplicationInline(HistoryInlineMixin, admin.TabularInline):
     model = Complication
+    select_related = ("client", "complication")
     extra = 1
 
 
-class VaccinationInline(admin.TabularInline):
+class VaccinationInline(HistoryInlineMixin, admin.TabularInline):
     model = Vaccination
+    select_related = ("client", "vaccine_name")
     extra = 1
 
 
@@ -61,40 +83,70 @@ class VaccinationInline(admin.TabularInline):
 #   extra = 1
 
 
-class ClinicVisitInline(admin.TabularInline):
+class ClinicVisitInline(HistoryInlineMixin, admin.TabularInline):
     model = ClinicVisit
     extra = 1
 
 
-class InvestigationInline(admin.TabularInline):
+class InvestigationInline(HistoryInlineMixin, admin.TabularInline):
     model = Investigation
+    select_related = ("client", "investigation_type")
     extra = 1
 
 
-class GrowthRecordInline(admin.TabularInline):
+class GrowthRecordInline(HistoryInlineMixin, admin.TabularInline):
     model = GrowthRecord
+    select_related = ("client", "type")
     extra = 1
 
 
-class AdmissionInline(admin.TabularInline):
+class AdmissionInline(HistoryInlineMixin, admin.TabularInline):
     model = Admission
     extra = 1
 
 
-class ClientCareUnitInline(admin.TabularInline):
+class ClientCareUnitInline(HistoryInlineMixin, admin.TabularInline):
     model = ClientCareUnit
+    select_related = ("client", "unit")
     extra = 1
     min_num = 1
     validate_min = True
 
 
+# Inlines shown per tab on the client change page; only the selected tab's formsets are built.
+CLIENT_INLINE_TABS = {
+    "care": ("Care units & family", [ClientCareUnitInline, FamilyMemberInline]),
+    "drugs": ("Drugs", [DrugInline]),
+    "complications": ("Complications & vaccinations", [ComplicationInline, VaccinationInline]),
+    "clinic": ("Clinic & growth", [ClinicVisitInline, GrowthRecordInline]),
+    "investigations": ("Investigations", [InvestigationInline]),
+}
+DEFAULT_CLIENT_TAB = "care"
+
+
+class LargeTableAdminMixin:
+    """Changelist settings for tables that grow with patient history.
+
+    Pages are counted from planner statistics instead of ``COUNT(*)``, the unfiltered
+    total is not shown next to filtered results, and the client is picked by search
+    rather than a select listing every patient. Dates are filtered with
+    ``DateFieldListFilter`` rather than ``date_hierarchy``, whose year links need a
+    ``DISTINCT`` over the whole table.
+    """
+
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+    autocomplete_fields = ("client",)
+    list_select_related = ("client",)
+
+
 # ───────────────────────────────────────────────
 # CLIENT ADMIN
 # ───────────────────────────────────────────────
 
 
 @admin.register(Client)
-class ClientAdmin(admin.ModelAdmin):
+class ClientAdmin(LookupCacheAdminMixin, admin.ModelAdmin):
     list_display = (
         "full_name",
         "common_name",
@@ -105,22 +157,70 @@ class ClientAdmin(admin.ModelAdmin):
         "date_of_registration",
         "get_primary_unit",
     )
-    search_fields = ("full_name", "common_name", "diagnosis", "contact_number")
-    list_filter = ("gender", "blood_group", "diagnosis", "ethnicity")
+    # Matched by clients.search (see get_search_results); listed here for the search box and autocomplete.
+    search_fields = ("full_name", "common_name", "registration_number", "nic_number", "contact_number")
+    list_filter = (
+        "gender",
+        "blood_group",
+        "diagnosis",
+        "ethnicity",
+        ("date_of_registration", admin.DateFieldListFilter),
+    )
+    list_select_related = ("diagnosis",)
     ordering = ("full_name",)
-    date_hierarchy = "date_of_registration"
-
-    # Attach all related inlines for editing on the same page
-    inlines = [
-        FamilyMemberInline,
-        DrugInline,
-        ComplicationInline,
-        VaccinationInline,
-        ClinicVisitInline,
-        InvestigationInline,
-        GrowthRecordInline,
-        ClientCareUnitInline,
-    ]
+    paginator = EstimatedCountPaginator
+    show_full_result_count = False
+
+    # Every related inline, edited on the same page one tab at a time
+    inlines = [inline for _, tab_inlines in CLIENT_INLINE_TABS.values() for inline in tab_inlines]
+
+    def get_queryset(self, request):
+        return super().get_queryset(request).with_primary_unit()
+
+    def get_search_results(self, request, queryset, search_term):
+        # Also serves the client autocomplete used by the history admins.
+        if not search_term.strip():
+            return queryset, False
+        return search_clients(queryset, search_term), False
+
+    def get_client_tab(self, request):
+        tab = request.GET.get("tab")
+        return tab if tab in CLIENT_INLINE_TABS else DEFAULT_CLIENT_TAB
+
+    def get_inlines(self, request, obj):
+        # New clients need a care unit; existing ones load only the requested tab's history.
+        return CLIENT_INLINE_TABS[self.get_client_tab(request) if obj else DEFAULT_CLIENT_TAB][1]
+
+    def render_change_form(self, request, context, add=False, change=False, form_url="", obj=None):
+        if change:
+            context["client_tabs"] = [(key, label) for key, (label, _) in CLIENT_INLINE_TABS.items()]
+            context["current_client_tab"] = self.get_client_tab(request)
+        return super().render_change_form(request, context, add, change, form_url, obj)
+
+    def get_urls(self):
+        return [
+            path("import/", self.admin_site.admin_view(self.import_view), name="clients_client_import"),
+        ] + super().get_urls()
+
+    def import_view(self, request):
+        if not self.has_add_permission(request):
+            raise PermissionDenied
+        result = None
+        form = RegistryImportForm(request.POST or None, request.FILES or None)
+        if request.method == "POST" and form.is_valid():
+            importer = IMPORTERS[form.cleaned_data["kind"]](
+                unit=form.cleaned_data["unit"], dry_run=form.cleaned_data["dry_run"]
+            )
+            result = importer.run(read_csv(form.cleaned_data["file"].file))
+        context = {
+            **self.admin_site.each_context(request),
+            "opts": self.model._meta,
+            "title": "Import registry data",
+            "form": form,
+            "result": result,
+            "dry_run": form.is_bound and form.cleaned_data.get("dry_run"),
+        }
+        return TemplateResponse(request, "admin/clients/client/import.html", context)
 
     def get_primary_unit(self, obj):
         return obj.primary_care_unit
@@ -134,14 +234,15 @@ class ClientAdmin(admin.ModelAdmin):
 
 
 @admin.register(ClientDeath)
-class ClientDeathAdmin(admin.ModelAdmin):
+class ClientDeathAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ("client", "date_of_death", "cause_of_death")
     search_fields = ("client__full_name", "cause_of_death")
 
 
 @admin.register(ClientTransfer)
-class ClientTransferAdmin(admin.ModelAdmin):
+class ClientTransferAdmin(LookupCacheAdminMixin, LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ("client", "date_of_transfer", "transferred_unit")
+    list_select_related = ("client", "transferred_unit")
     search_fields = ("client__full_name", "transferred_unit__name")
 
 
@@ -166,41 +267,46 @@ class DS_DivisionAdmin(admin.ModelAdmin):
 
 
 @admin.register(FamilyMember)
-class FamilyMemberAdmin(admin.ModelAdmin):
+class FamilyMemberAdmin(LookupCacheAdminMixin, LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ("client", "name", "relationship", "diagnosis")
+    list_select_related = ("client", "diagnosis")
     search_fields = ("name", "relationship")
 
 
 @admin.register(ClientCareUnit)
-class ClientCareUnitAdmin(admin.ModelAdmin):
+class ClientCareUnitAdmin(LookupCacheAdminMixin, LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ("client", "unit", "role", "is_active", "start_date", "end_date")
+    list_select_related = ("client", "unit")
     list_filter = ("role", "is_active", "unit")
     search_fields = ("client__full_name", "client__registration_number", "unit__name")
 
 
 @admin.register(Drug)
-class DrugAdmin(admin.ModelAdmin):
+class DrugAdmin(LookupCacheAdminMixin, LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ("client", "date_prescribed", "drug_name", "dose", "duration")
     list_filter = ("drug_name",)
-    search_fields = ("drug_name",)
+    list_select_related = ("client", "drug_name")
+    search_fields = ("drug_name__name",)
 
 
 @admin.register(Complication)
-class ComplicationAdmin(admin.ModelAdmin):
+class ComplicationAdmin(LookupCacheAdminMixin, LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ("client", "complication", "detected_date")
     list_filter = ("complication",)
-    search_fields = ("complication",)
+    list_select_related = ("client", "complication")
+    search_fields = ("complication__name",)
 
 
 @admin.register(Vaccination)
-class VaccinationAdmin(admin.ModelAdmin):
+class VaccinationAdmin(LookupCacheAdminMixin, LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ("client", "vaccine_name", "date_given", "next_dose_date")
     list_filter = ("vaccine_name",)
-    search_fields = ("vaccine_name",)
+    list_select_related = ("client", "vaccine_name")
+    search_fields = ("vaccine_name__name",)
 
 
 @admin.register(Transfusion)
-class TransfusionAdmin(admin.ModelAdmin):
+class TransfusionAdmin(LookupCacheAdminMixin, LargeTableAdminMixin, admin.ModelAdmin):
     list_display = (
         "get_client",
         "get_date_of_admission",
@@ -208,11 +314,14 @@ class TransfusionAdmin(admin.ModelAdmin):
         "amount_of_blood",
         "next_date_given",
     )
-    list_filter = ("special_type",)
-    date_hierarchy = "date_of_transfusion"
+    list_filter = ("special_type", ("date_of_transfusion", admin.DateFieldListFilter))
+    list_select_related = ("client", "admission")
+    # client is copied from the admission on save; the admission is picked by id.
+    autocomplete_fields = ()
+    raw_id_fields = ("admission",)
 
     def get_client(self, obj):
-        return obj.admission.client
+        return obj.client
 
     def get_date_of_admission(self, obj):
         return obj.admission.date_of_admission
@@ -222,7 +331,7 @@ class TransfusionAdmin(admin.ModelAdmin):
 
 
 @admin.register(ClinicVisit)
-class ClinicVisitAdmin(admin.ModelAdmin):
+class ClinicVisitAdmin(LookupCacheAdminMixin, LargeTableAdminMixin, admin.ModelAdmin):
     list_display = (
         "client",
         "date_visit",
@@ -230,22 +339,23 @@ class ClinicVisitAdmin(admin.ModelAdmin):
         "referral",
         "next_visit_date",
     )
-    list_filter = ("clinic_type",)
-    date_hierarchy = "date_visit"
+    list_filter = ("clinic_type", ("date_visit", admin.DateFieldListFilter))
+    list_select_related = ("client", "clinic_type")
 
 
 @admin.register(Investigation)
-class InvestigationAdmin(admin.ModelAdmin):
-    list_display = ("client", "date_done", "investigation_type", "value")
+class InvestigationAdmin(LookupCacheAdminMixin, LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = ("client", "date_done", "investigation_type", "value", "numeric_value")
     list_filter = ("investigation_type",)
-    search_fields = ("investigation_type",)
+    list_select_related = ("client", "investigation_type")
+    search_fields = ("investigation_type__name",)
 
 
 @admin.register(GrowthRecord)
-class GrowthRecordAdmin(admin.ModelAdmin):
+class GrowthRecordAdmin(LookupCacheAdminMixin, LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ("client", "date_measured", "type", "value")
-    list_filter = ("type",)
-    date_hierarchy = "date_measured"
+    list_filter = ("type", ("date_measured", admin.DateFieldListFilter))
+    list_select_related = ("client", "type")
 
 
 @admin.register(Choice)
@@ -263,7 +373,7 @@ class DiagnosisTypeAdmin(admin.ModelAdmin):
 
 @admin.register(InvestigationType)
 class InvestigationTypeAdmin(admin.ModelAdmin):
-    list_display = ("name", "unit")
+    list_display = ("name", "unit", "reference_low", "reference_high")
     search_fields = ("name",)
 
 
@@ -280,14 +390,33 @@ class ComplicationTypeAdmin(admin.ModelAdmin):
 
 
 @admin.register(ThalassemiaUnit)
-class ThalassemiaUnitAdmin(admin.ModelAdmin):
+class ThalassemiaUnitAdmin(LookupCacheAdminMixin, admin.ModelAdmin):
     list_display = ("name",)
     search_fields = ("name",)
 
 
 @admin.register(Admission)
-class AdmissionAdmin(admin.ModelAdmin):
+class AdmissionAdmin(LargeTableAdminMixin, admin.ModelAdmin):
     list_display = ("client", "date_of_admission", "reason_for_admission", "date_of_discharge", "outcome")
-    list_filter = ("outcome",)
-    date_hierarchy = "date_of_admission"
+    list_filter = ("outcome", ("date_of_admission", admin.DateFieldListFilter))
     search_fields = ("client__full_name", "reason_for_admission", "outcome")
+
+
+@admin.register(ClientClinicalSummary)
+class ClientClinicalSummaryAdmin(LargeTableAdminMixin, admin.ModelAdmin):
+    list_display = (
+        "client",
+        "last_transfusion_date",
+        "last_pre_HB_level",
+        "next_transfusion_due",
+        "last_ferritin",
+        "updated_at",
+    )
+    list_select_related = ("client",)
+    list_filter = (("next_transfusion_due", admin.DateFieldListFilter),)
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
@@ -0,0 +1,208 @@
+"""Timed scenarios for the ``benchmark`` management command.
+
+Each scenario is a callable taking a :class:`BenchmarkContext` and doing one unit of
+work; the runner records wall time and query count per run. Register new scenarios
+with :func:`scenario` so results stay comparable across commits. Everything runs in a
+transaction that is rolled back, so the benchmark users and any writes never persist.
+"""
+
+import statistics
+import time
+from urllib.parse import urlencode
+
+from django.contrib.auth import get_user_model
+from django.contrib.auth.models import Group
+from django.db import connection, transaction
+from django.test import Client as TestClient
+from django.test.utils import CaptureQueriesContext, override_settings
+from django.urls import reverse
+from django.utils import timezone
+
+from .models.client import Client, ClientCareUnit
+from .models.drug import Drug
+from .models.management import Admission, ClinicVisit, GrowthRecord, Investigation, Transfusion, Vaccination
+from .models.summary import ClientClinicalSummary
+from .reports import transfusion_workload
+from .scheduling import transfusion_queue
+
+SCENARIOS = {}
+
+
+def scenario(name):
+    def register(func):
+        SCENARIOS[name] = func
+        return func
+
+    return register
+
+
+class BenchmarkContext:
+    """Users, HTTP clients and sample rows shared by every scenario."""
+
+    def __init__(self):
+        User = get_user_model()
+        self.patient = (
+            Client.objects.filter(care_links__is_active=True, care_links__role="PRIMARY").order_by("pk").first()
+        )
+        if self.patient is None:
+            raise LookupError("No clients with a primary unit; run generate_cohort first.")
+        self.unit_id = self.patient.primary_care_unit.pk
+
+        admin_user, _ = User.objects.get_or_create(
+            username="benchmark-admin", defaults={"is_staff": True, "is_superuser": True}
+        )
+        unit_user, _ = User.objects.get_or_create(username="benchmark-unit")
+        if unit_user.thalassemia_unit_id != self.unit_id:
+            unit_user.thalassemia_unit_id = self.unit_id
+            unit_user.save(update_fields=["thalassemia_unit"])
+        try:
+            unit_user.groups.add(Group.objects.get(name="unit_clinician"))
+        except Group.DoesNotExist:
+            raise LookupError("The unit_clinician role group is missing; run migrate, which syncs the role groups.")
+
+        self.admin = TestClient()
+        self.admin.force_login(admin_user)
+        self.unit = TestClient()
+        self.unit.force_login(unit_user)
+        self.today = timezone.localdate()
+
+    def get(self, client, url):
+        response = client.get(url)
+        if response.status_code != 200:
+            raise RuntimeError(f"GET {url} returned {response.status_code}")
+        if response.streaming:
+            b"".join(response.streaming_content)
+        return response
+
+
+@scenario("view:client-list")
+def client_list(ctx):
+    ctx.get(ctx.unit, reverse("clients:client-list"))
+
+
+@scenario("view:client-list-overdue")
+def client_list_overdue(ctx):
+    ctx.get(ctx.unit, reverse("clients:client-list") + "?overdue=1")
+
+
+@scenario("view:client-detail")
+def client_detail(ctx):
+    ctx.get(ctx.unit, reverse("clients:client-detail", args=[ctx.patient.pk]))
+
+
+@scenario("view:transfusion-list")
+def transfusion_list(ctx):
+    ctx.get(ctx.unit, reverse("clients:client-transfusion-list", args=[ctx.patient.pk]))
+
+
+@scenario("view:admission-list")
+def admission_list(ctx):
+    ctx.get(ctx.unit, reverse("clients:client-admission-list", args=[ctx.patient.pk]))
+
+
+@scenario("view:investigation-list")
+def investigation_list(ctx):
+    ctx.get(ctx.unit, reverse("clients:client-investigation-list", args=[ctx.patient.pk]))
+
+
+@scenario("view:client-search")
+def client_search(ctx):
+    ctx.get(
+        ctx.unit, reverse("clients:client-search") + "?" + urlencode({"q": ctx.patient.full_name.rsplit(" ", 1)[0]})
+    )
+
+
+@scenario("admin:client-search")
+def admin_client_search(ctx):
+    ctx.get(ctx.admin, reverse("admin:clients_client_changelist") + "?q=perera")
+
+
+@scenario("admin:client-changelist")
+def admin_client_changelist(ctx):
+    ctx.get(ctx.admin, reverse("admin:clients_client_changelist"))
+
+
+@scenario("admin:transfusion-changelist")
+def admin_transfusion_changelist(ctx):
+    ctx.get(ctx.admin, reverse("admin:clients_transfusion_changelist"))
+
+
+@scenario("admin:investigation-changelist")
+def admin_investigation_changelist(ctx):
+    ctx.get(ctx.admin, reverse("admin:clients_investigation_changelist"))
+
+
+@scenario("query:transfusion-workload")
+def workload_report(ctx):
+    list(transfusion_workload([ctx.unit_id]))
+
+
+@scenario("query:transfusion-queue")
+def schedule_queue(ctx):
+    transfusion_queue(ctx.unit_id, ctx.today, 14)
+
+
+@scenario("query:summary-refresh-unit")
+def summary_refresh(ctx):
+    ClientClinicalSummary.refresh(
+        Client.objects.filter(care_links__unit_id=ctx.unit_id, care_links__is_active=True).values_list("pk", flat=True)
+    )
+
+
+HISTORY_TABLES = [
+    (Admission, "client", "-date_of_admission"),
+    (Investigation, "client", "-date_done"),
+    (ClinicVisit, "client", "-date_visit"),
+    (GrowthRecord, "client", "-date_measured"),
+    (Drug, "client", "-date_prescribed"),
+    (Vaccination, "client", "-date_given"),
+]
+
+
+@scenario("query:client-history-newest")
+def client_history_newest(ctx):
+    for model, client_field, ordering in HISTORY_TABLES:
+        list(model.objects.filter(**{client_field: ctx.patient.pk}).order_by(ordering)[:20])
+
+
+@scenario("query:admission-transfusions")
+def admission_transfusions(ctx):
+    admission_ids = list(
+        Admission.objects.filter(client=ctx.patient.pk).order_by("-date_of_admission").values_list("pk", flat=True)[:12]
+    )
+    list(Transfusion.objects.filter(admission__in=admission_ids).order_by("admission", "date_of_transfusion"))
+
+
+@scenario("query:unit-active-clients")
+def unit_active_clients(ctx):
+    ClientCareUnit.objects.filter(unit_id=ctx.unit_id, is_active=True).count()
+
+
+def run_benchmarks(names=None, runs=10, warmup=2):
+    """Time each scenario ``runs`` times after ``warmup`` untimed runs; returns JSON-ready results."""
+    results = {}
+    # The test client talks to "testserver", which production-like ALLOWED_HOSTS reject.
+    with override_settings(ALLOWED_HOSTS=["*"]), transaction.atomic():
+        ctx = BenchmarkContext()
+        for name, func in SCENARIOS.items():
+            if names and name not in names:
+                continue
+            for _ in range(warmup):
+                func(ctx)
+            timings, queries = [], []
+            for _ in range(runs):
+                with CaptureQueriesContext(connection) as captured:
+                    start = time.perf_counter()
+                    func(ctx)
+                    timings.append((time.perf_counter() - start) * 1000)
+                queries.append(len(captured.captured_queries))
+            results[name] = {
+                "runs": runs,
+                "median_ms": round(statistics.median(timings), 3),
+                "p95_ms": round(sorted(timings)[max(0, round(0.95 * runs) - 1)], 3),
+                "min_ms": round(min(timings), 3),
+                "queries": max(queries),
+            }
+        # Drop the benchmark users, their sessions and whatever the scenarios wrote.
+        transaction.set_rollback(True)
+    return results
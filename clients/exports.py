@@ -0,0 +1,168 @@
+import csv
+from abc import ABC, abstractmethod
+from itertools import islice
+
+from asgiref.sync import sync_to_async
+
+from .models.client import Client
+from .models.management import Admission, Investigation, Transfusion
+
+CHUNK_SIZE = 2000
+
+
+class Echo:
+    """File-like object whose write() hands the CSV line straight back to the caller."""
+
+    def write(self, value):
+        return value
+
+
+class RegistryExport(ABC):
+    """Base export: a header plus an iterator of rows over a unit-scoped queryset.
+
+    ``client_ref`` is the lookup from the exported model to its client, as used by
+    UnitScopedMixin.scope_queryset().
+    """
+
+    permission_required = None
+    client_ref = "client"
+    header = []
+    fields = []
+
+    @abstractmethod
+    def get_queryset(self):
+        """The rows to export, ordered; the view scopes it to the user's unit."""
+
+    def rows(self, queryset):
+        # values_list + iterator keeps one chunk of plain tuples in memory at a time.
+        return queryset.values_list(*self.fields).iterator(chunk_size=CHUNK_SIZE)
+
+    async def arows(self, queryset):
+        """Async :meth:`rows`, read a chunk at a time so ASGI can stream the export."""
+        # QuerySet.aiterator() can't be used: values_list() runs its query as soon as the
+        # iterator is created, which raises SynchronousOnlyOperation on the event loop.
+        rows = self.rows(queryset)
+        next_chunk = sync_to_async(lambda: list(islice(rows, CHUNK_SIZE)))
+        while chunk := await next_chunk():
+            for row in chunk:
+                yield row
+
+
+class ClientExport(RegistryExport):
+    permission_required = "clients.view_client"
+    client_ref = "pk"
+    header = [
+        "registration_number",
+        "full_name",
+        "gender",
+        "date_of_birth",
+        "nic_number",
+        "blood_group",
+        "diagnosis",
+        "ds_division",
+        "contact_number",
+        "date_of_registration",
+        "primary_unit",
+    ]
+
+    def get_queryset(self):
+        return Client.objects.with_primary_unit().select_related("diagnosis", "ds_division").order_by("pk")
+
+    def rows(self, queryset):
+        for client in queryset.iterator(chunk_size=CHUNK_SIZE):
+            yield [
+                client.registration_number,
+                client.full_name,
+                client.gender,
+                client.date_of_birth,
+                client.nic_number,
+                client.blood_group,
+                client.diagnosis,
+                client.ds_division,
+                client.contact_number,
+                client.date_of_registration,
+                client.primary_care_unit,
+            ]
+
+
+class AdmissionExport(RegistryExport):
+    permission_required = "clients.view_admission"
+    header = ["registration_number", "date_of_admission", "date_of_discharge", "reason_for_admission", "outcome"]
+    fields = [
+        "client__registration_number",
+        "date_of_admission",
+        "date_of_discharge",
+        "reason_for_admission",
+        "outcome",
+    ]
+
+    def get_queryset(self):
+        return Admission.objects.order_by("client_id", "date_of_admission", "pk")
+
+
+class TransfusionExport(RegistryExport):
+    permission_required = "clients.view_transfusion"
+    header = [
+        "registration_number",
+        "date_of_admission",
+        "date_of_transfusion",
+        "pre_HB_level",
+        "post_HB_level",
+        "amount_of_blood",
+        "special_type",
+        "next_date_given",
+        "reaction",
+    ]
+    fields = [
+        "client__registration_number",
+        "admission__date_of_admission",
+        "date_of_transfusion",
+        "pre_HB_level",
+        "post_HB_level",
+        "amount_of_blood",
+        "special_type__name",
+        "next_date_given",
+        "reaction",
+    ]
+
+    def get_queryset(self):
+        return Transfusion.objects.order_by("client_id", "date_of_transfusion", "pk")
+
+
+class InvestigationExport(RegistryExport):
+    permission_required = "clients.view_investigation"
+    header = ["registration_number", "date_done", "investigation_type", "value", "numeric_value", "unit", "laboratory"]
+    fields = [
+        "client__registration_number",
+        "date_done",
+        "investigation_type__name",
+        "value",
+        "numeric_value",
+        "investigation_type__unit",
+        "laboratory_name",
+    ]
+
+    def get_queryset(self):
+        return Investigation.objects.order_by("client_id", "date_done", "pk")
+
+
+EXPORTS = {
+    "clients": ClientExport,
+    "admissions": AdmissionExport,
+    "transfusions": TransfusionExport,
+    "investigations": InvestigationExport,
+}
+
+
+def stream_csv(header, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    for row in rows:
+        yield writer.writerow(row)
+
+
+async def astream_csv(header, rows):
+    writer = csv.writer(Echo())
+    yield writer.writerow(header)
+    async for row in rows:
+        yield writer.writerow(row)
@@ -2,10 +2,11 @@ from django import forms
 from .models.client import Client
 from .models.management import Admission
 from .models.lookup import ThalassemiaUnit
+from .lookup_cache import LookupChoiceField, lookup_formfield_callback
 
 
 class ClientForm(forms.ModelForm):
-    primary_unit = forms.ModelChoiceField(
+    primary_unit = LookupChoiceField(
         queryset=ThalassemiaUnit.objects.all(),
         required=False,
         help_text="Required when creating a new client.",
@@ -15,11 +16,14 @@ class ClientForm(forms.ModelForm):
         model = Client
         fields = "__all__"
         exclude = ["photo", "care_units"]
+        formfield_callback = lookup_formfield_callback
 
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
-        if self.instance and self.instance.pk and self.instance.primary_care_unit:
-            self.fields["primary_unit"].initial = self.instance.primary_care_unit
+        if self.instance and self.instance.pk:
+            primary_unit = self.instance.primary_care_unit
+            if primary_unit:
+                self.fields["primary_unit"].initial = primary_unit
 
     def clean(self):
         cleaned_data = super().clean()
@@ -75,3 +79,16 @@ class AdmissionForm(forms.ModelForm):
         # widgets = {
         #     "reason_for_admission": forms.Textarea(attrs={"class": "textarea textarea-bordered w-full", "rows": 3}),
         # }
+
+
+class RegistryImportForm(forms.Form):
+    kind = forms.ChoiceField(
+        choices=[("clients", "Clients"), ("admissions", "Admissions"), ("transfusions", "Transfusions")]
+    )
+    file = forms.FileField(help_text="CSV with a header row; see the README for the expected columns.")
+    unit = LookupChoiceField(
+        queryset=ThalassemiaUnit.objects.all(),
+        required=False,
+        help_text="Primary unit for client rows that do not name one.",
+    )
+    dry_run = forms.BooleanField(required=False, help_text="Validate only; nothing is written.")
@@ -0,0 +1,81 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db.models import Count, Max
+
+from users.backends import authorization_snapshot
+
+from .lookup_cache import alookup_version
+from .models.client import ClientCareUnit
+from .models.lookup import ThalassemiaUnit
+
+FRAGMENT_CACHE_TIMEOUT = 60 * 60 * 24
+
+
+def _client_version_key(client_id):
+    return f"client-fragments:version:{client_id}"
+
+
+def bump_client_versions(client_ids):
+    """Invalidate every cached fragment of these clients."""
+    stamp = time.time_ns()
+    cache.set_many({_client_version_key(client_id): stamp for client_id in set(client_ids)}, None)
+
+
+async def aclient_fragment_version(client_id):
+    """Cache-key component that changes whenever the client's records or any lookup row change."""
+    version = await cache.aget_or_set(_client_version_key(client_id), time.time_ns, None)
+    return f"{version}.{await alookup_version()}"
+
+
+def _client_list_version_key(unit_id):
+    # ``None`` is the registry-wide list that superusers see.
+    return f"client-list:version:{unit_id}"
+
+
+def bump_client_list_versions(client_ids=None, unit_ids=()):
+    """Invalidate the client lists of the units these clients are linked to, and of ``unit_ids``.
+
+    Without ``client_ids`` every unit's list is invalidated, e.g. after a bulk rebuild.
+    """
+    if client_ids is None:
+        unit_ids = ThalassemiaUnit.objects.values_list("pk", flat=True)
+    else:
+        linked = (
+            ClientCareUnit.objects.filter(client_id__in=set(client_ids)).order_by().values_list("unit_id", flat=True)
+        )
+        unit_ids = {*unit_ids, *linked}
+    stamp = time.time_ns()
+    cache.set_many({_client_list_version_key(unit_id): stamp for unit_id in {*unit_ids, None}}, None)
+
+
+async def aclient_list_version(unit_id):
+    """Validator of a unit's client list (``None`` for the whole registry), bumped on every write to it."""
+    return await cache.aget_or_set(_client_list_version_key(unit_id), time.time_ns, None)
+
+
+def fragment_scope(user):
+    """Cache-key component naming what ``user`` may see: unit, superuser flag and permissions.
+
+    Users who share a scope render identical fragments, so cached HTML is never served
+    to someone with a different unit or a different set of buttons.
+    """
+    snapshot = authorization_snapshot(user)
+    scope = repr((snapshot["unit_id"], user.is_superuser, snapshot["permissions"]))
+    return hashlib.md5(scope.encode()).hexdigest()
+
+
+async def alatest_change(queryset, *related):
+    """Validator for conditional GETs: row counts and newest ``updated_at`` of ``queryset`` and ``related``.
+
+    ``related`` are lookup paths to other models with an ``updated_at`` column, e.g.
+    ``"care_links"``. The counts are of joined rows, so they are not totals, but any
+    deletion lowers one of them; deletions leave no timestamp behind. Everything is read
+    in one aggregate query, so workers that do not share a cache still agree on it.
+    """
+    aggregates = {"rows": Count("pk"), "updated_at": Max("updated_at")}
+    for path in related:
+        aggregates[f"{path}_rows"] = Count(path)
+        aggregates[f"{path}_updated_at"] = Max(f"{path}__updated_at")
+    return tuple((await queryset.order_by().aaggregate(**aggregates)).values())
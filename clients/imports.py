@@ -0,0 +1,324 @@
+import csv
+import io
+from abc import ABC, abstractmethod
+from itertools import islice
+
+from django.core.exceptions import ValidationError
+from django.db import IntegrityError, transaction
+from django.utils import timezone
+
+from .fragments import bump_client_list_versions, bump_client_versions
+from .models.client import Client, ClientCareUnit
+from .models.lookup import Choice, DiagnosisType, DS_Division, ThalassemiaUnit
+from .models.management import Admission, Transfusion
+from .models.summary import ClientClinicalSummary
+from .reports import bump_report_version
+from .search import index_clients
+
+DEFAULT_BATCH_SIZE = 1000
+
+
+def read_csv(file):
+    """Yield rows of a CSV upload or file as dicts with stripped keys and values."""
+    if isinstance(file, (bytes, bytearray)):
+        file = io.BytesIO(file)
+    if not isinstance(file, io.TextIOBase):
+        file = io.TextIOWrapper(file, encoding="utf-8-sig", newline="")
+    for row in csv.DictReader(file):
+        yield {(key or "").strip(): (value or "").strip() for key, value in row.items()}
+
+
+def batched(iterable, size):
+    iterator = iter(iterable)
+    while batch := list(islice(iterator, size)):
+        yield batch
+
+
+class LookupMaps:
+    """Case-insensitive name → id maps for the lookup tables, loaded once per import."""
+
+    def __init__(self):
+        self.ds_divisions = self._load(DS_Division)
+        self.diagnoses = self._load(DiagnosisType)
+        self.units = self._load(ThalassemiaUnit)
+        self.choices = {
+            (category, name.lower()): pk for pk, category, name in Choice.objects.values_list("pk", "category", "name")
+        }
+
+    @staticmethod
+    def _load(model):
+        return {name.lower(): pk for pk, name in model.objects.values_list("pk", "name")}
+
+    @staticmethod
+    def resolve(mapping, value, label):
+        if not value:
+            return None
+        try:
+            return mapping[value.lower()]
+        except KeyError:
+            raise ValidationError({label: f"Unknown {label.replace('_', ' ')} '{value}'."})
+
+    def choice(self, category, value, label):
+        if not value:
+            return None
+        try:
+            return self.choices[(category, value.lower())]
+        except KeyError:
+            raise ValidationError({label: f"Unknown {label.replace('_', ' ')} '{value}'."})
+
+
+class ImportResult:
+    def __init__(self):
+        self.created = 0
+        self.errors = []
+
+    def add_error(self, line, error):
+        if isinstance(error, ValidationError) and hasattr(error, "error_dict"):
+            message = "; ".join(f"{field}: {' '.join(msgs)}" for field, msgs in error.message_dict.items())
+        else:
+            message = " ".join(getattr(error, "messages", [str(error)]))
+        self.errors.append((line, message))
+
+
+class RegistryImporter(ABC):
+    """Validate rows in batches against in-memory lookups, then bulk_create each batch in its own transaction.
+
+    Subclasses implement ``build`` and ``write``, and may override ``prepare_batch`` (one query
+    per batch for anything the rows reference) and ``finish``.
+    """
+
+    def __init__(self, unit=None, batch_size=DEFAULT_BATCH_SIZE, dry_run=False):
+        self.unit = unit
+        self.batch_size = batch_size
+        self.dry_run = dry_run
+        self.lookups = LookupMaps()
+
+    def run(self, rows):
+        result = ImportResult()
+        try:
+            # CSV line numbers: the header is line 1.
+            for batch in batched(enumerate(rows, start=2), self.batch_size):
+                self.prepare_batch([row for _, row in batch])
+                valid, valid_lines = [], []
+                for line, row in batch:
+                    try:
+                        valid.append(self.build(row))
+                        valid_lines.append(line)
+                    except ValidationError as error:
+                        result.add_error(line, error)
+                if valid and not self.dry_run:
+                    try:
+                        with transaction.atomic():
+                            self.write(valid)
+                    except IntegrityError as error:
+                        # E.g. a registration number saved by someone else since prepare_batch();
+                        # the whole batch was rolled back, earlier batches stay committed.
+                        for line in valid_lines:
+                            result.add_error(line, ValidationError(f"Not saved with its batch: {error}"))
+                        continue
+                result.created += len(valid)
+        finally:
+            # Also after an error, so the batches that did commit get their summaries and versions.
+            if result.created and not self.dry_run:
+                self.finish()
+        return result
+
+    def prepare_batch(self, rows):
+        pass
+
+    @abstractmethod
+    def build(self, row):
+        """Turn one row into unsaved model instances, raising ValidationError."""
+
+    @abstractmethod
+    def write(self, valid):
+        """Save one batch of ``build`` results; runs inside a transaction."""
+
+    def finish(self):
+        """Run once at the end if any batch was written, even after an error; e.g. do what skipped signals would do."""
+
+    @staticmethod
+    def validate(instance, exclude=()):
+        instance.full_clean(exclude=list(exclude), validate_unique=False, validate_constraints=False)
+        return instance
+
+
+class ClientImporter(RegistryImporter):
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.seen_registration_numbers = set()
+        self.seen_nic_numbers = set()
+        self.touched_unit_ids = set()
+
+    def prepare_batch(self, rows):
+        registration_numbers = [row.get("registration_number") for row in rows]
+        nic_numbers = [row.get("nic_number") for row in rows if row.get("nic_number")]
+        self.existing_registration_numbers = set(
+            Client.objects.filter(registration_number__in=registration_numbers).values_list(
+                "registration_number", flat=True
+            )
+        )
+        self.existing_nic_numbers = set(
+            Client.objects.filter(nic_number__in=nic_numbers).values_list("nic_number", flat=True)
+        )
+
+    def build(self, row):
+        registration_number = row.get("registration_number", "")
+        nic_number = row.get("nic_number") or None
+        if registration_number in self.existing_registration_numbers | self.seen_registration_numbers:
+            raise ValidationError({"registration_number": f"'{registration_number}' already exists."})
+        if nic_number and nic_number in self.existing_nic_numbers | self.seen_nic_numbers:
+            raise ValidationError({"nic_number": f"'{nic_number}' already exists."})
+
+        unit_id = self.lookups.resolve(self.lookups.units, row.get("primary_unit"), "primary_unit")
+        unit_id = unit_id or (self.unit.pk if self.unit else None)
+        if unit_id is None:
+            raise ValidationError({"primary_unit": "A primary unit is required."})
+
+        client = self.validate(
+            Client(
+                registration_number=registration_number,
+                full_name=row.get("full_name", ""),
+                common_name=row.get("common_name") or None,
+                gender=row.get("gender", ""),
+                date_of_birth=row.get("date_of_birth") or None,
+                nic_number=nic_number,
+                blood_group=row.get("blood_group") or None,
+                contact_number=row.get("contact_number") or None,
+                address=row.get("address") or None,
+                date_of_registration=row.get("date_of_registration") or None,
+                diagnosis_id=self.lookups.resolve(self.lookups.diagnoses, row.get("diagnosis"), "diagnosis"),
+                ds_division_id=self.lookups.resolve(self.lookups.ds_divisions, row.get("ds_division"), "ds_division"),
+                marital_status_id=self.lookups.choice("marital_status", row.get("marital_status"), "marital_status"),
+            )
+        )
+        self.seen_registration_numbers.add(registration_number)
+        if nic_number:
+            self.seen_nic_numbers.add(nic_number)
+        return client, unit_id
+
+    def write(self, valid):
+        clients = Client.objects.bulk_create([client for client, _ in valid])
+        index_clients(clients)
+        today = timezone.localdate()
+        ClientCareUnit.objects.bulk_create(
+            ClientCareUnit(
+                client=client, unit_id=unit_id, role=ClientCareUnit.Role.PRIMARY, start_date=today, is_active=True
+            )
+            for client, (_, unit_id) in zip(clients, valid)
+        )
+        self.touched_unit_ids.update(unit_id for _, unit_id in valid)
+
+    def finish(self):
+        # bulk_create bypasses the post_save hook that bumps the client lists.
+        bump_client_list_versions([], self.touched_unit_ids)
+
+
+class ClientHistoryImporter(RegistryImporter):
+    """Shared client resolution for rows keyed by ``registration_number``."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.touched_client_ids = set()
+
+    def prepare_batch(self, rows):
+        registration_numbers = {row.get("registration_number") for row in rows}
+        self.client_ids = dict(
+            Client.objects.filter(registration_number__in=registration_numbers)
+            .order_by()
+            .values_list("registration_number", "pk")
+        )
+
+    def client_id_for(self, row):
+        registration_number = row.get("registration_number", "")
+        try:
+            return self.client_ids[registration_number]
+        except KeyError:
+            raise ValidationError({"registration_number": f"Unknown client '{registration_number}'."})
+
+    def finish(self):
+        # bulk_create bypasses the post_save hooks that keep these in step.
+        ClientClinicalSummary.refresh(self.touched_client_ids)
+        bump_client_versions(self.touched_client_ids)
+        bump_client_list_versions(self.touched_client_ids)
+        bump_report_version()
+
+
+class AdmissionImporter(ClientHistoryImporter):
+    def build(self, row):
+        admission = Admission(
+            client_id=self.client_id_for(row),
+            date_of_admission=row.get("date_of_admission") or None,
+            date_of_discharge=row.get("date_of_discharge") or None,
+            reason_for_admission=row.get("reason_for_admission") or "Blood Transfusion",
+            outcome=row.get("outcome") or None,
+        )
+        return self.validate(admission, exclude=["client"])
+
+    def write(self, valid):
+        Admission.objects.bulk_create(valid)
+        self.touched_client_ids.update(admission.client_id for admission in valid)
+
+
+class TransfusionImporter(ClientHistoryImporter):
+    """Transfusion rows attach to the client's admission on ``date_of_admission``
+    (defaulting to the transfusion date), which is created when it does not exist."""
+
+    def prepare_batch(self, rows):
+        super().prepare_batch(rows)
+        self.admission_ids = {
+            (client_id, admitted.isoformat()): pk
+            for pk, client_id, admitted in Admission.objects.filter(client_id__in=self.client_ids.values()).values_list(
+                "pk", "client_id", "date_of_admission"
+            )
+        }
+
+    def build(self, row):
+        client_id = self.client_id_for(row)
+        transfusion = self.validate(
+            Transfusion(
+                date_of_transfusion=row.get("date_of_transfusion") or None,
+                pre_HB_level=row.get("pre_HB_level") or None,
+                post_HB_level=row.get("post_HB_level") or None,
+                amount_of_blood=row.get("amount_of_blood") or None,
+                special_type_id=self.lookups.choice("special_blood_type", row.get("special_type"), "special_type"),
+                next_date_given=row.get("next_date_given") or None,
+                reaction=row.get("reaction") or "None",
+                checked_by=row.get("checked_by") or None,
+                remarks=row.get("remarks") or None,
+            ),
+            exclude=["admission"],
+        )
+        admission = self.validate(
+            Admission(
+                client_id=client_id,
+                date_of_admission=row.get("date_of_admission") or transfusion.date_of_transfusion,
+            ),
+            exclude=["client"],
+        )
+        return admission, transfusion
+
+    def write(self, valid):
+        new_admissions = {}
+        for admission, _ in valid:
+            key = (admission.client_id, admission.date_of_admission.isoformat())
+            if key not in self.admission_ids and key not in new_admissions:
+                new_admissions[key] = admission
+        for admission in Admission.objects.bulk_create(new_admissions.values()):
+            self.admission_ids[(admission.client_id, admission.date_of_admission.isoformat())] = admission.pk
+
+        transfusions = []
+        for admission, transfusion in valid:
+            key = (admission.client_id, admission.date_of_admission.isoformat())
+            transfusion.admission_id = self.admission_ids[key]
+            transfusion.client_id = admission.client_id
+            transfusions.append(transfusion)
+        Transfusion.objects.bulk_create(transfusions)
+        self.touched_client_ids.update(admission.client_id for admission, _ in valid)
+
+
+IMPORTERS = {
+    "clients": ClientImporter,
+    "admissions": AdmissionImporter,
+    "transfusions": TransfusionImporter,
+}
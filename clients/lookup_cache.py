@@ -0,0 +1,183 @@
+import threading
+import time
+from contextvars import ContextVar
+
+from django import forms
+from django.core.cache import cache
+from django.core.signals import request_finished, request_started
+from django.core.exceptions import ValidationError
+from django.forms.models import ModelChoiceIterator
+
+from .models.drug import DrugName
+from .models.lookup import Choice, DiagnosisType, DS_Division, ThalassemiaUnit
+from .models.management import ComplicationType, InvestigationType
+
+LOOKUP_MODELS = (Choice, DS_Division, DiagnosisType, ThalassemiaUnit, DrugName, ComplicationType, InvestigationType)
+LOOKUP_VERSION_KEY = "lookup-cache:version"
+
+# Rows are held per process; only the version token lives in the shared cache (see CACHES in
+# the prod settings), so a save on one worker invalidates every worker's copy on its next read.
+_tables = {}
+_loaded_version = None
+_tables_lock = threading.Lock()
+
+# The version seen by the current request, so a page full of selects reads the cache once.
+# Outside a request (commands, shells) it is None and every lookup checks the cache.
+_request_version = ContextVar("lookup_request_version", default=None)
+_UNCHECKED = object()
+
+
+def _start_request(**kwargs):
+    _request_version.set(_UNCHECKED)
+
+
+def _finish_request(**kwargs):
+    _request_version.set(None)
+
+
+request_started.connect(_start_request)
+request_finished.connect(_finish_request)
+
+
+def bump_lookup_version():
+    cache.set(LOOKUP_VERSION_KEY, time.time_ns(), None)
+    if _request_version.get() is not None:
+        # The request that saved a lookup row sees the new rows from here on.
+        _request_version.set(_UNCHECKED)
+
+
+def lookup_version():
+    version = cache.get(LOOKUP_VERSION_KEY)
+    if version is None:
+        cache.add(LOOKUP_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(LOOKUP_VERSION_KEY)
+    return version
+
+
+async def alookup_version():
+    version = await cache.aget(LOOKUP_VERSION_KEY)
+    if version is None:
+        await cache.aadd(LOOKUP_VERSION_KEY, time.time_ns(), None)
+        version = await cache.aget(LOOKUP_VERSION_KEY)
+    return version
+
+
+def request_lookup_version():
+    """:func:`lookup_version`, read from the cache at most once per request."""
+    version = _request_version.get()
+    if version is None:
+        return lookup_version()
+    if version is _UNCHECKED:
+        version = lookup_version()
+        _request_version.set(version)
+    return version
+
+
+def lookup_rows(model):
+    """All rows of a lookup table in its default ordering, loaded at most once per version."""
+    global _tables, _loaded_version
+    version = request_lookup_version()
+    key = model._meta.label_lower
+    with _tables_lock:
+        if version != _loaded_version:
+            _tables = {}
+            _loaded_version = version
+        if key not in _tables:
+            rows = list(model._default_manager.all())
+            _tables[key] = (rows, {row.pk: row for row in rows})
+        return _tables[key]
+
+
+def lookup_instance(model, pk):
+    return lookup_rows(model)[1].get(pk)
+
+
+def _matches(obj, limit_choices_to):
+    return all(getattr(obj, field) == value for field, value in limit_choices_to.items())
+
+
+class LookupChoiceIterator(ModelChoiceIterator):
+    def __iter__(self):
+        if self.field.empty_label is not None:
+            yield ("", self.field.empty_label)
+        for obj in self.field.cached_choices():
+            yield self.choice(obj)
+
+    def __len__(self):
+        return len(self.field.cached_choices()) + (1 if self.field.empty_label is not None else 0)
+
+    def __bool__(self):
+        return self.field.empty_label is not None or bool(self.field.cached_choices())
+
+
+class LookupChoiceField(forms.ModelChoiceField):
+    """ModelChoiceField that renders and validates lookup rows from the lookup cache.
+
+    A dict ``limit_choices_to`` is applied in memory rather than to the queryset. A queryset
+    narrowed any other way, or a non-pk ``to_field_name``, falls back to querying the database.
+    """
+
+    iterator = LookupChoiceIterator
+
+    def __init__(self, queryset, *, limit_choices_to=None, **kwargs):
+        self.lookup_filter = {}
+        if isinstance(limit_choices_to, dict):
+            self.lookup_filter, limit_choices_to = limit_choices_to, None
+        super().__init__(queryset, limit_choices_to=limit_choices_to, **kwargs)
+
+    def uses_cache(self):
+        return (
+            self.queryset.model in LOOKUP_MODELS
+            and not self.queryset.query.where
+            and self.to_field_name in (None, self.queryset.model._meta.pk.name)
+            and self.get_limit_choices_to() is None
+        )
+
+    def filtered_queryset(self):
+        return self.queryset.filter(**self.lookup_filter)
+
+    def cached_choices(self):
+        if not self.uses_cache():
+            return list(self.filtered_queryset())
+        return [obj for obj in lookup_rows(self.queryset.model)[0] if _matches(obj, self.lookup_filter)]
+
+    def to_python(self, value):
+        if value in self.empty_values:
+            return None
+        if isinstance(value, self.queryset.model):
+            value = getattr(value, self.to_field_name or "pk")
+        try:
+            if self.uses_cache():
+                obj = lookup_instance(self.queryset.model, self.queryset.model._meta.pk.to_python(value))
+                if obj is not None and not _matches(obj, self.lookup_filter):
+                    obj = None
+            else:
+                obj = self.filtered_queryset().filter(**{self.to_field_name or "pk": value}).first()
+        except (ValueError, TypeError, ValidationError):
+            obj = None
+        if obj is None:
+            raise ValidationError(
+                self.error_messages["invalid_choice"],
+                code="invalid_choice",
+                params={"value": value},
+            )
+        return obj
+
+
+def lookup_formfield_callback(db_field, **kwargs):
+    """ModelForm ``formfield_callback`` that routes foreign keys to lookup tables through the cache."""
+    if db_field.is_relation and db_field.many_to_one and db_field.related_model in LOOKUP_MODELS:
+        kwargs.setdefault("form_class", LookupChoiceField)
+    return db_field.formfield(**kwargs)
+
+
+class LookupCacheAdminMixin:
+    def formfield_for_foreignkey(self, db_field, request, **kwargs):
+        if (
+            db_field.related_model in LOOKUP_MODELS
+            and db_field.name not in self.raw_id_fields
+            and db_field.name not in self.get_autocomplete_fields(request)
+            and db_field.name not in self.radio_fields
+        ):
+            kwargs.setdefault("form_class", LookupChoiceField)
+        return super().formfield_for_foreignkey(db_field, request, **kwargs)
@@ -0,0 +1,67 @@
+import json
+import platform
+import subprocess
+
+import django
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from django.utils import timezone
+
+from clients.benchmarks import SCENARIOS, run_benchmarks
+from clients.models.client import Client
+from clients.models.management import Admission, Investigation, Transfusion
+
+
+def current_commit():
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], cwd=settings.BASE_DIR, capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+class Command(BaseCommand):
+    help = "Time key views and queries against the current database and write the results as JSON."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--runs", type=int, default=10)
+        parser.add_argument("--warmup", type=int, default=2)
+        parser.add_argument("--scenario", action="append", choices=sorted(SCENARIOS), help="Repeatable; default all.")
+        parser.add_argument("--output", help="Write JSON here instead of stdout.")
+
+    def handle(self, *args, **options):
+        if not settings.DEBUG:
+            raise CommandError(
+                "Refusing to benchmark with DEBUG = False; point development settings at a copy of the data instead."
+            )
+        try:
+            results = run_benchmarks(options["scenario"], runs=options["runs"], warmup=options["warmup"])
+        except LookupError as error:
+            raise CommandError(str(error))
+
+        report = {
+            "commit": current_commit(),
+            "recorded_at": timezone.now().isoformat(),
+            "database": {
+                "vendor": connection.vendor,
+                "version": ".".join(map(str, connection.get_database_version())),
+            },
+            "python": platform.python_version(),
+            "django": django.get_version(),
+            "cohort": {
+                "clients": Client.objects.count(),
+                "admissions": Admission.objects.count(),
+                "transfusions": Transfusion.objects.count(),
+                "investigations": Investigation.objects.count(),
+            },
+            "scenarios": results,
+        }
+        payload = json.dumps(report, indent=2)
+        if options["output"]:
+            with open(options["output"], "w", encoding="utf-8") as file:
+                file.write(payload + "\n")
+            self.stdout.write(self.style.SUCCESS(f"Wrote {len(results)} scenario results to {options['output']}."))
+        else:
+            self.stdout.write(payload)
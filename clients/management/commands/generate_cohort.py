@@ -0,0 +1,156 @@
+import random
+from datetime import date, timedelta
+from decimal import Decimal
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import transaction
+from django.utils import timezone
+
+from clients.fragments import bump_client_list_versions
+from clients.models.client import Client, ClientCareUnit
+from clients.models.lookup import Choice, DiagnosisType, District, DS_Division, Province, ThalassemiaUnit
+from clients.models.management import Admission, Investigation, InvestigationType, Transfusion
+from clients.models.summary import ClientClinicalSummary
+from clients.reports import bump_report_version
+from clients.search import index_clients
+
+SYNTHETIC_PREFIX = "SYN-"
+FIRST_NAMES = ["Nimal", "Kamal", "Sunil", "Saman", "Kasun", "Nimali", "Dilani", "Chamari", "Ishara", "Tharindu"]
+LAST_NAMES = ["Perera", "Fernando", "Silva", "Bandara", "Jayasinghe", "Wickramasinghe", "Herath", "Dissanayake"]
+DIAGNOSES = ["Beta Thalassaemia Major", "HbE Beta Thalassaemia", "Beta Thalassaemia Intermedia"]
+
+
+class Command(BaseCommand):
+    help = (
+        "Generate a reproducible synthetic cohort: units, patients, monthly admissions with a transfusion "
+        "each, and quarterly serum ferritin. Synthetic registration numbers start with SYN-."
+    )
+
+    def add_arguments(self, parser):
+        parser.add_argument("--units", type=int, default=3)
+        parser.add_argument("--patients", type=int, default=500, help="Patients in total, spread across units.")
+        parser.add_argument("--years", type=int, default=3, help="Years of monthly history per patient.")
+        parser.add_argument("--seed", type=int, default=20240601)
+        parser.add_argument("--end-date", type=date.fromisoformat, help="Last history date (default: today).")
+        parser.add_argument("--batch-size", type=int, default=2000)
+        parser.add_argument("--flush", action="store_true", help="Delete an existing synthetic cohort first.")
+
+    def handle(self, *args, **options):
+        existing = Client.objects.filter(registration_number__startswith=SYNTHETIC_PREFIX)
+        if existing.exists():
+            if not options["flush"]:
+                raise CommandError("A synthetic cohort already exists; rerun with --flush to replace it.")
+            existing.delete()
+
+        self.rng = random.Random(options["seed"])
+        self.batch_size = options["batch_size"]
+        end = options["end_date"] or timezone.localdate()
+        with transaction.atomic():
+            lookups = self.create_lookups(options["units"])
+            clients = self.create_clients(lookups, options["patients"], end)
+        totals = self.create_history(clients, lookups, options["years"], end)
+        ClientClinicalSummary.refresh([client.pk for client, _ in clients])
+        bump_report_version()
+        bump_client_list_versions()
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Generated {len(clients)} patients in {options['units']} units with {totals['admissions']} "
+                f"admissions, {totals['transfusions']} transfusions and {totals['investigations']} ferritin results."
+            )
+        )
+
+    def create_lookups(self, unit_count):
+        province, _ = Province.objects.get_or_create(name="Synthetic Province")
+        district, _ = District.objects.get_or_create(name="Synthetic District", province=province)
+        divisions = [
+            DS_Division.objects.get_or_create(name=f"Synthetic Division {index}", district=district)[0]
+            for index in range(1, 6)
+        ]
+        return {
+            "divisions": divisions,
+            "units": [
+                ThalassemiaUnit.objects.get_or_create(name=f"Synthetic Unit {index}")[0]
+                for index in range(1, unit_count + 1)
+            ],
+            "diagnoses": [DiagnosisType.objects.get_or_create(name=name)[0] for name in DIAGNOSES],
+            "washed": Choice.objects.get_or_create(category="special_blood_type", name="Washed Blood")[0],
+            "irradiated": Choice.objects.get_or_create(category="special_blood_type", name="Irradiated Blood")[0],
+            "ferritin": InvestigationType.objects.get_or_create(
+                name="Serum Ferritin", defaults={"unit": "ng/mL", "reference_high": Decimal("1000")}
+            )[0],
+        }
+
+    def create_clients(self, lookups, patient_count, end):
+        rng = self.rng
+        clients = []
+        for number in range(1, patient_count + 1):
+            born = end - timedelta(days=rng.randint(2 * 365, 35 * 365))
+            client = Client(
+                registration_number=f"{SYNTHETIC_PREFIX}{number:06d}",
+                full_name=f"{rng.choice(FIRST_NAMES)} {rng.choice(LAST_NAMES)} {number}",
+                gender=rng.choice("MF"),
+                date_of_birth=born,
+                date_of_registration=born + timedelta(days=rng.randint(180, 700)),
+                diagnosis=rng.choice(lookups["diagnoses"]),
+                ds_division=rng.choice(lookups["divisions"]),
+                contact_number=f"07{rng.randint(0, 99999999):08d}",
+            )
+            clients.append((client, lookups["units"][number % len(lookups["units"])]))
+        created = Client.objects.bulk_create([client for client, _ in clients], batch_size=self.batch_size)
+        index_clients(created)
+        ClientCareUnit.objects.bulk_create(
+            [
+                ClientCareUnit(client=client, unit=unit, role=ClientCareUnit.Role.PRIMARY, start_date=end)
+                for client, (_, unit) in zip(created, clients)
+            ],
+            batch_size=self.batch_size,
+        )
+        return list(zip(created, [unit for _, unit in clients]))
+
+    def create_history(self, clients, lookups, years, end):
+        totals = {"admissions": 0, "transfusions": 0, "investigations": 0}
+        months = years * 12
+        # Keep each transaction to roughly batch_size admissions.
+        per_chunk = max(1, self.batch_size // max(months, 1))
+        for start in range(0, len(clients), per_chunk):
+            chunk = clients[start : start + per_chunk]
+            admissions, transfusions, investigations = [], [], []
+            for client, _ in chunk:
+                special = self.rng.choices([None, lookups["washed"], lookups["irradiated"]], weights=[85, 10, 5])[0]
+                interval = self.rng.choice([21, 28, 28, 35])
+                for month in range(months, 0, -1):
+                    admitted = end - timedelta(days=month * 30 + self.rng.randint(0, 5))
+                    admission = Admission(client=client, date_of_admission=admitted, date_of_discharge=admitted)
+                    admissions.append(admission)
+                    pre_hb = Decimal(str(round(self.rng.gauss(8.4, 0.8), 1)))
+                    transfusions.append(
+                        Transfusion(
+                            admission=admission,
+                            client=client,
+                            date_of_transfusion=admitted,
+                            pre_HB_level=pre_hb,
+                            post_HB_level=pre_hb + Decimal("2.0"),
+                            amount_of_blood=Decimal(self.rng.choice([250, 300, 400, 500])),
+                            special_type=special,
+                            next_date_given=admitted + timedelta(days=interval),
+                        )
+                    )
+                    if month % 3 == 0:
+                        ferritin = Decimal(max(150, int(self.rng.gauss(2200, 900))))
+                        investigations.append(
+                            Investigation(
+                                client=client,
+                                investigation_type=lookups["ferritin"],
+                                date_done=admitted,
+                                value=str(ferritin),
+                                numeric_value=ferritin,
+                            )
+                        )
+            with transaction.atomic():
+                Admission.objects.bulk_create(admissions, batch_size=self.batch_size)
+                Transfusion.objects.bulk_create(transfusions, batch_size=self.batch_size)
+                Investigation.objects.bulk_create(investigations, batch_size=self.batch_size)
+            totals["admissions"] += len(admissions)
+            totals["transfusions"] += len(transfusions)
+            totals["investigations"] += len(investigations)
+        return totals
@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from clients.imports import DEFAULT_BATCH_SIZE, IMPORTERS, read_csv
+from clients.models.lookup import ThalassemiaUnit
+
+
+class Command(BaseCommand):
+    help = "Bulk import clients, admissions or transfusions from a CSV file, reporting errors per row."
+
+    def add_arguments(self, parser):
+        parser.add_argument("kind", choices=sorted(IMPORTERS))
+        parser.add_argument("path")
+        parser.add_argument("--unit", help="Primary unit name for client rows without a primary_unit column.")
+        parser.add_argument("--batch-size", type=int, default=DEFAULT_BATCH_SIZE)
+        parser.add_argument("--dry-run", action="store_true", help="Validate every row without writing anything.")
+
+    def handle(self, *args, **options):
+        unit = None
+        if options["unit"]:
+            try:
+                unit = ThalassemiaUnit.objects.get(name__iexact=options["unit"])
+            except ThalassemiaUnit.DoesNotExist:
+                raise CommandError(f"Unknown unit '{options['unit']}'.")
+
+        importer = IMPORTERS[options["kind"]](unit=unit, batch_size=options["batch_size"], dry_run=options["dry_run"])
+        try:
+            with open(options["path"], encoding="utf-8-sig", newline="") as file:
+                result = importer.run(read_csv(file))
+        except OSError as error:
+            raise CommandError(str(error))
+
+        for line, message in result.errors:
+            self.stderr.write(f"line {line}: {message}")
+        verb = "Validated" if options["dry_run"] else "Imported"
+        summary = f"{verb} {result.created} {options['kind']}; {len(result.errors)} rows rejected."
+        self.stdout.write(self.style.SUCCESS(summary))
+        if result.errors:
+            raise CommandError(f"{len(result.errors)} rows could not be imported.")
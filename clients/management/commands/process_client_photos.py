@@ -0,0 +1,39 @@
+import re
+
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from clients.fragments import bump_client_list_versions, bump_client_versions
+from clients.models.client import Client
+from clients.photos import generate_renditions, photo_digest, store_client_photo
+
+DIGEST_RE = re.compile(r"[0-9a-f]{16}")
+
+
+class Command(BaseCommand):
+    help = (
+        "Normalize client photos uploaded before the photo pipeline (upright, downscaled, no EXIF, "
+        "content-hashed name) and write any missing renditions. Original files are left in place."
+    )
+
+    def handle(self, *args, **options):
+        normalized = rendered = missing = 0
+        for client in Client.objects.exclude(photo="").exclude(photo__isnull=True).only("photo").iterator():
+            if not client.photo.storage.exists(client.photo.name):
+                self.stderr.write(f"Client {client.pk}: {client.photo.name} is missing.")
+                missing += 1
+                continue
+            if not DIGEST_RE.fullmatch(photo_digest(client.photo.name)):
+                with client.photo.open("rb"):
+                    store_client_photo(client)
+                # update() skips the signals, so do what they would have done.
+                Client.objects.filter(pk=client.pk).update(photo=client.photo.name, updated_at=timezone.now())
+                bump_client_versions([client.pk])
+                bump_client_list_versions([client.pk])
+                normalized += 1
+            rendered += len(generate_renditions(client.photo.name))
+        self.stdout.write(
+            self.style.SUCCESS(
+                f"Normalized {normalized} photos and wrote {rendered} renditions; {missing} photo files are missing."
+            )
+        )
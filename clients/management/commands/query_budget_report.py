@@ -0,0 +1,68 @@
+import glob
+from statistics import mean, quantiles
+
+from django.conf import settings
+from django.core.management.base import BaseCommand, CommandError
+
+from thallk.middleware import read_query_budget_log
+
+SORT_KEYS = {
+    "queries": "p95_queries",
+    "db": "mean_db_ms",
+    "duration": "mean_duration_ms",
+    "duplicates": "max_duplicates",
+}
+
+
+def p95(values):
+    return quantiles(values, n=20, method="inclusive")[-1] if len(values) > 1 else values[0]
+
+
+class Command(BaseCommand):
+    help = "Rank views by the SQL count and timing recorded by QueryBudgetMiddleware."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--log", default=settings.QUERY_BUDGET_LOG, help="Log file; rotated copies are included.")
+        parser.add_argument("--sort", choices=sorted(SORT_KEYS), default="queries")
+        parser.add_argument("--limit", type=int, default=20)
+
+    def handle(self, *args, **options):
+        paths = sorted(glob.glob(glob.escape(options["log"]) + "*"))
+        if not paths:
+            raise CommandError(f"No query budget log at {options['log']}.")
+
+        by_view = {}
+        for record in read_query_budget_log(paths):
+            by_view.setdefault(record["view"], []).append(record)
+        if not by_view:
+            raise CommandError("The query budget log has no records yet.")
+
+        rows = []
+        for view, records in by_view.items():
+            queries = [record["queries"] for record in records]
+            renders = [record["render_ms"] for record in records if record.get("render_ms") is not None]
+            duplicates = [max((d["count"] for d in record["duplicates"]), default=0) for record in records]
+            rows.append(
+                {
+                    "view": view,
+                    "requests": len(records),
+                    "mean_queries": mean(queries),
+                    "p95_queries": p95(queries),
+                    "mean_db_ms": mean(record["db_ms"] for record in records),
+                    "mean_duration_ms": mean(record["duration_ms"] for record in records),
+                    "mean_render_ms": mean(renders) if renders else None,
+                    "max_duplicates": max(duplicates),
+                }
+            )
+        rows.sort(key=lambda row: row[SORT_KEYS[options["sort"]]], reverse=True)
+
+        self.stdout.write(
+            f"{'view':<45} {'reqs':>6} {'queries':>8} {'p95':>6} {'db ms':>8} {'total ms':>9} "
+            f"{'render ms':>10} {'dup':>4}"
+        )
+        for row in rows[: options["limit"]]:
+            render = f"{row['mean_render_ms']:.1f}" if row["mean_render_ms"] is not None else "-"
+            self.stdout.write(
+                f"{row['view']:<45} {row['requests']:>6} {row['mean_queries']:>8.1f} {row['p95_queries']:>6.0f} "
+                f"{row['mean_db_ms']:>8.1f} {row['mean_duration_ms']:>9.1f} {render:>10} {row['max_duplicates']:>4}"
+            )
@@ -0,0 +1,50 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from clients.fragments import bump_client_list_versions
+from clients.models.summary import ClientClinicalSummary
+
+
+class Command(BaseCommand):
+    help = "Rebuild ClientClinicalSummary rows in bulk, or report drift with --check."
+
+    def add_arguments(self, parser):
+        parser.add_argument("--check", action="store_true", help="Only compare stored summaries with fresh values.")
+        parser.add_argument("--batch-size", type=int, default=1000)
+
+    def handle(self, *args, **options):
+        if options["check"]:
+            self.check_drift(options["batch_size"])
+            return
+        written = ClientClinicalSummary.refresh(batch_size=options["batch_size"])
+        bump_client_list_versions()
+        self.stdout.write(self.style.SUCCESS(f"Rebuilt {written} clinical summaries."))
+
+    def check_drift(self, batch_size):
+        missing = drifted = 0
+        batch = []
+        for computed in ClientClinicalSummary.computed_rows():
+            batch.append(computed)
+            if len(batch) >= batch_size:
+                batch_missing, batch_drifted = self.compare(batch)
+                missing, drifted = missing + batch_missing, drifted + batch_drifted
+                batch = []
+        if batch:
+            batch_missing, batch_drifted = self.compare(batch)
+            missing, drifted = missing + batch_missing, drifted + batch_drifted
+
+        if missing or drifted:
+            raise CommandError(f"Clinical summaries out of date: {missing} missing, {drifted} drifted.")
+        self.stdout.write(self.style.SUCCESS("Clinical summaries are up to date."))
+
+    def compare(self, batch):
+        stored = ClientClinicalSummary.objects.in_bulk([summary.client_id for summary in batch])
+        missing = drifted = 0
+        for computed in batch:
+            current = stored.get(computed.client_id)
+            if current is None:
+                missing += 1
+                self.stdout.write(f"missing: client {computed.client_id}")
+            elif current.differs_from(computed):
+                drifted += 1
+                self.stdout.write(f"drifted: client {computed.client_id}")
+        return missing, drifted
@@ -0,0 +1,41 @@
+# Generated by Django 6.0.9 on 2026-10-17 23:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0002_rename_transfusion_hb_levels'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='investigation',
+            name='numeric_value',
+            field=models.DecimalField(blank=True, decimal_places=3, max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='investigation',
+            name='qualitative_value',
+            field=models.CharField(blank=True, max_length=100, null=True),
+        ),
+        migrations.AddField(
+            model_name='investigationtype',
+            name='reference_high',
+            field=models.DecimalField(blank=True, decimal_places=3, max_digits=12, null=True),
+        ),
+        migrations.AddField(
+            model_name='investigationtype',
+            name='reference_low',
+            field=models.DecimalField(blank=True, decimal_places=3, max_digits=12, null=True),
+        ),
+        migrations.AddIndex(
+            model_name='investigation',
+            index=models.Index(fields=['client', 'investigation_type', 'date_done'], name='investigation_client_type_date'),
+        ),
+        migrations.AddIndex(
+            model_name='investigation',
+            index=models.Index(fields=['investigation_type', 'date_done', 'numeric_value'], name='investigation_type_date_value'),
+        ),
+    ]
@@ -0,0 +1,49 @@
+import re
+from decimal import Decimal, InvalidOperation
+
+from django.db import migrations
+
+# Frozen copy of clients.models.management.parse_result_value so this migration
+# keeps working if the model-side parser changes later.
+RESULT_VALUE_RE = re.compile(r"^(?P<comparator>[<>]=?)?\s*(?P<number>[-+]?\d+(?:\.\d+)?)\s*(?P<suffix>\D*)$")
+RESULT_VALUE_LIMIT = Decimal("1e9")
+BATCH_SIZE = 2000
+
+
+def parse_result_value(raw):
+    text = (raw or "").strip()
+    if not text:
+        return None, None
+    match = RESULT_VALUE_RE.match(text.replace(",", ""))
+    if not match:
+        return None, text
+    try:
+        number = Decimal(match["number"]).quantize(Decimal("0.001"))
+    except InvalidOperation:
+        return None, text
+    if abs(number) >= RESULT_VALUE_LIMIT:
+        return None, text
+    return number, text if match["comparator"] else None
+
+
+def parse_existing_values(apps, schema_editor):
+    Investigation = apps.get_model("clients", "Investigation")
+    batch = []
+    for investigation in Investigation.objects.exclude(value__isnull=True).exclude(value="").only("id", "value"):
+        investigation.numeric_value, investigation.qualitative_value = parse_result_value(investigation.value)
+        batch.append(investigation)
+        if len(batch) >= BATCH_SIZE:
+            Investigation.objects.bulk_update(batch, ["numeric_value", "qualitative_value"])
+            batch = []
+    if batch:
+        Investigation.objects.bulk_update(batch, ["numeric_value", "qualitative_value"])
+
+
+class Migration(migrations.Migration):
+    dependencies = [
+        ("clients", "0003_investigation_numeric_results"),
+    ]
+
+    operations = [
+        migrations.RunPython(parse_existing_values, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,41 @@
+# Generated by Django 6.0.9 on 2026-10-17 23:38
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("clients", "0004_parse_investigation_values"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ClientClinicalSummary",
+            fields=[
+                (
+                    "client",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="clinical_summary",
+                        serialize=False,
+                        to="clients.client",
+                    ),
+                ),
+                ("last_admission_date", models.DateField(blank=True, null=True)),
+                ("last_transfusion_date", models.DateField(blank=True, db_index=True, null=True)),
+                ("last_pre_HB_level", models.DecimalField(blank=True, decimal_places=1, max_digits=4, null=True)),
+                ("next_transfusion_due", models.DateField(blank=True, db_index=True, null=True)),
+                ("transfusion_count", models.PositiveIntegerField(default=0)),
+                ("last_ferritin", models.DecimalField(blank=True, decimal_places=3, max_digits=12, null=True)),
+                ("last_ferritin_date", models.DateField(blank=True, null=True)),
+                ("updated_at", models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                "verbose_name": "Client clinical summary",
+                "verbose_name_plural": "Client clinical summaries",
+            },
+        ),
+    ]
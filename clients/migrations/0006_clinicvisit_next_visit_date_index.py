@@ -0,0 +1,18 @@
+# Generated by Django 6.0.9 on 2026-10-17 23:39
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("clients", "0005_clientclinicalsummary"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="clinicvisit",
+            name="next_visit_date",
+            field=models.DateField(blank=True, db_index=True, null=True),
+        ),
+    ]
@@ -0,0 +1,47 @@
+# Generated by Django 6.0.9 on 2026-10-17 23:58
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("clients", "0006_clinicvisit_next_visit_date_index"),
+    ]
+
+    operations = [
+        migrations.AddIndex(
+            model_name="admission",
+            index=models.Index(fields=["client", "-date_of_admission"], name="admission_client_date"),
+        ),
+        migrations.AddIndex(
+            model_name="clientcareunit",
+            index=models.Index(
+                condition=models.Q(("is_active", True)), fields=["unit", "client"], name="clientcareunit_active_unit"
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="clinicvisit",
+            index=models.Index(fields=["client", "-date_visit"], name="clinicvisit_client_date"),
+        ),
+        migrations.AddIndex(
+            model_name="drug",
+            index=models.Index(fields=["client", "-date_prescribed"], name="drug_client_date"),
+        ),
+        migrations.AddIndex(
+            model_name="growthrecord",
+            index=models.Index(fields=["client", "-date_measured"], name="growthrecord_client_date"),
+        ),
+        migrations.AddIndex(
+            model_name="investigation",
+            index=models.Index(fields=["client", "-date_done"], name="investigation_client_date"),
+        ),
+        migrations.AddIndex(
+            model_name="transfusion",
+            index=models.Index(fields=["admission", "date_of_transfusion"], name="transfusion_admission_date"),
+        ),
+        migrations.AddIndex(
+            model_name="vaccination",
+            index=models.Index(fields=["client", "-date_given"], name="vaccination_client_date"),
+        ),
+    ]
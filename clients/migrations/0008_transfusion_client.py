@@ -0,0 +1,52 @@
+import django.db.models.deletion
+from django.db import migrations, models
+from django.db.models import OuterRef, Subquery
+
+
+def copy_client_from_admission(apps, schema_editor):
+    Admission = apps.get_model("clients", "Admission")
+    Transfusion = apps.get_model("clients", "Transfusion")
+    # One UPDATE ... SET client_id = (SELECT client_id FROM admission ...) for the whole table.
+    Transfusion.objects.update(
+        client_id=Subquery(Admission.objects.filter(pk=OuterRef("admission_id")).values("client_id")[:1])
+    )
+
+
+class Migration(migrations.Migration):
+    # On PostgreSQL the backfill queues deferred foreign-key checks, and ALTER TABLE refuses to run
+    # in a transaction with pending trigger events. So each step commits on its own, with the
+    # backfill in a transaction of its own.
+    atomic = False
+
+    dependencies = [
+        ("clients", "0007_history_indexes"),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name="transfusion",
+            name="client",
+            field=models.ForeignKey(
+                editable=False,
+                null=True,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="transfusions",
+                to="clients.client",
+            ),
+        ),
+        migrations.RunPython(copy_client_from_admission, migrations.RunPython.noop, atomic=True),
+        migrations.AlterField(
+            model_name="transfusion",
+            name="client",
+            field=models.ForeignKey(
+                editable=False,
+                on_delete=django.db.models.deletion.CASCADE,
+                related_name="transfusions",
+                to="clients.client",
+            ),
+        ),
+        migrations.AddIndex(
+            model_name="transfusion",
+            index=models.Index(fields=["client", "-date_of_transfusion"], name="transfusion_client_date"),
+        ),
+    ]
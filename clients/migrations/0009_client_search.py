@@ -0,0 +1,134 @@
+# Generated by Django 6.0.9 on 2026-10-18 00:12
+
+import re
+import unicodedata
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+# Frozen copy of clients.search.build_document and its helpers so this migration
+# keeps building the same documents if the folding rules change later.
+TEXT_FIELDS = ("full_name", "common_name", "registration_number", "nic_number")
+PHONE_FIELDS = ("contact_number", "guardian_contact_number_1", "guardian_contact_number_2")
+NAME_FOLDS = [
+    (re.compile(r"aa"), "a"),
+    (re.compile(r"ee|ii"), "i"),
+    (re.compile(r"oo|uu"), "u"),
+    (re.compile(r"ey"), "ay"),
+    (re.compile(r"ck"), "k"),
+    (re.compile(r"zh"), "l"),
+    (re.compile(r"([tdbkgpjs])h"), r"\1"),
+    (re.compile(r"w"), "v"),
+    (re.compile(r"([a-z])\1+"), r"\1"),
+]
+
+
+def fold_text(value):
+    chars = []
+    for char in unicodedata.normalize("NFKD", value.lower()):
+        if unicodedata.combining(char) and chars and chars[-1].isascii():
+            continue
+        chars.append(char)
+    text = unicodedata.normalize("NFC", "".join(chars))
+    for pattern, replacement in NAME_FOLDS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def normalize_phone(value):
+    digits = re.sub(r"\D", "", value or "")
+    if digits.startswith("0094"):
+        digits = digits[2:]
+    if digits.startswith("94") and len(digits) == 11:
+        return "0" + digits[2:]
+    if len(digits) == 9 and not digits.startswith("0"):
+        return "0" + digits
+    return digits
+
+
+def build_document(values):
+    tokens = [fold_text(values[field]) for field in TEXT_FIELDS if values.get(field)]
+    tokens += [normalize_phone(values[field]) for field in PHONE_FIELDS if values.get(field)]
+    return " ".join(token for token in tokens if token)
+
+
+# Kept outside the model state: neither index type can be expressed portably. On SQLite a
+# later migration that remakes clients_clientsearchdocument drops these triggers, so it
+# must recreate them and run ``manage.py rebuild_search_index``.
+POSTGRES_FORWARD = [
+    "CREATE EXTENSION IF NOT EXISTS pg_trgm",
+    "CREATE INDEX clientsearch_document_trgm ON clients_clientsearchdocument USING gin (document gin_trgm_ops)",
+]
+POSTGRES_REVERSE = ["DROP INDEX IF EXISTS clientsearch_document_trgm"]
+SQLITE_FORWARD = [
+    "CREATE VIRTUAL TABLE clients_clientsearch_fts USING fts5("
+    "document, content='clients_clientsearchdocument', content_rowid='client_id', tokenize='trigram')",
+    "CREATE TRIGGER clients_clientsearch_ai AFTER INSERT ON clients_clientsearchdocument BEGIN "
+    "INSERT INTO clients_clientsearch_fts(rowid, document) VALUES (new.client_id, new.document); END",
+    "CREATE TRIGGER clients_clientsearch_ad AFTER DELETE ON clients_clientsearchdocument BEGIN "
+    "INSERT INTO clients_clientsearch_fts(clients_clientsearch_fts, rowid, document) "
+    "VALUES ('delete', old.client_id, old.document); END",
+    "CREATE TRIGGER clients_clientsearch_au AFTER UPDATE ON clients_clientsearchdocument BEGIN "
+    "INSERT INTO clients_clientsearch_fts(clients_clientsearch_fts, rowid, document) "
+    "VALUES ('delete', old.client_id, old.document); "
+    "INSERT INTO clients_clientsearch_fts(rowid, document) VALUES (new.client_id, new.document); END",
+]
+SQLITE_REVERSE = [
+    "DROP TRIGGER IF EXISTS clients_clientsearch_au",
+    "DROP TRIGGER IF EXISTS clients_clientsearch_ad",
+    "DROP TRIGGER IF EXISTS clients_clientsearch_ai",
+    "DROP TABLE IF EXISTS clients_clientsearch_fts",
+]
+
+
+def run_for_vendor(postgres, sqlite):
+    def run(apps, schema_editor):
+        statements = {"postgresql": postgres, "sqlite": sqlite}.get(schema_editor.connection.vendor, [])
+        for statement in statements:
+            schema_editor.execute(statement)
+
+    return run
+
+
+def index_existing_clients(apps, schema_editor):
+    # The same documents as ``manage.py rebuild_search_index``, written with the historical models;
+    # on SQLite the insert triggers above fill the FTS table as well.
+    Client = apps.get_model("clients", "Client")
+    ClientSearchDocument = apps.get_model("clients", "ClientSearchDocument")
+    batch = []
+    for values in Client.objects.order_by("pk").values("pk", *TEXT_FIELDS, *PHONE_FIELDS).iterator(chunk_size=1000):
+        batch.append(ClientSearchDocument(client_id=values["pk"], document=build_document(values)))
+        if len(batch) >= 1000:
+            ClientSearchDocument.objects.bulk_create(batch)
+            batch = []
+    ClientSearchDocument.objects.bulk_create(batch)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("clients", "0008_transfusion_client"),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name="ClientSearchDocument",
+            fields=[
+                (
+                    "client",
+                    models.OneToOneField(
+                        on_delete=django.db.models.deletion.CASCADE,
+                        primary_key=True,
+                        related_name="search_document",
+                        serialize=False,
+                        to="clients.client",
+                    ),
+                ),
+                ("document", models.TextField()),
+            ],
+        ),
+        migrations.RunPython(
+            run_for_vendor(POSTGRES_FORWARD, SQLITE_FORWARD), run_for_vendor(POSTGRES_REVERSE, SQLITE_REVERSE)
+        ),
+        migrations.RunPython(index_existing_clients, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,21 @@
+# Generated by Django 6.0.9 on 2026-10-18 00:57
+
+import clients.photos
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("clients", "0010_updated_at"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="client",
+            name="photo",
+            field=models.ImageField(
+                blank=True, null=True, upload_to="client_photos/", validators=[clients.photos.validate_photo]
+            ),
+        ),
+    ]
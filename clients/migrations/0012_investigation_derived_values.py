@@ -0,0 +1,23 @@
+# Generated by Django 6.0.9 on 2026-10-18 01:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ("clients", "0011_client_photo_validator"),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name="investigation",
+            name="numeric_value",
+            field=models.DecimalField(blank=True, decimal_places=3, editable=False, max_digits=12, null=True),
+        ),
+        migrations.AlterField(
+            model_name="investigation",
+            name="qualitative_value",
+            field=models.CharField(blank=True, editable=False, max_length=100, null=True),
+        ),
+    ]
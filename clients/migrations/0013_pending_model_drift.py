@@ -0,0 +1,27 @@
+# Generated by Django 6.0.9 on 2026-10-18 01:50
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('clients', '0012_investigation_derived_values'),
+    ]
+
+    operations = [
+        migrations.AlterModelOptions(
+            name='ds_division',
+            options={'ordering': ['name'], 'verbose_name': 'DS Division', 'verbose_name_plural': 'DS Divisions'},
+        ),
+        migrations.AlterField(
+            model_name='clientcareunit',
+            name='role',
+            field=models.CharField(choices=[('PRIMARY', 'Primary'), ('SHARED', 'Shared'), ('REFERRAL', 'Referral')], default='PRIMARY', max_length=20),
+        ),
+        migrations.AlterField(
+            model_name='transfusion',
+            name='WBC_count',
+            field=models.DecimalField(blank=True, decimal_places=2, max_digits=8, null=True),
+        ),
+    ]
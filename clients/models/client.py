@@ -2,15 +2,31 @@ from django.db import models
 from datetime import date
 from django.urls import reverse
 from django.utils import timezone
+from django.utils.functional import cached_property
 from dateutil.relativedelta import relativedelta
-from django.db.models import F, Q
+from django.db.models import Exists, F, OuterRef, Prefetch, Q
 from django.core.exceptions import ValidationError
+from ..photos import validate_photo
 from .lookup import ThalassemiaUnit, DiagnosisType, DS_Division
 
 
 # -------------------------------------------------------------------
 #                      MAIN CLIENT MODEL
 # -------------------------------------------------------------------
+class ClientQuerySet(models.QuerySet):
+    def with_primary_unit(self):
+        """Prefetch each client's active primary unit so ``primary_care_unit`` needs no query per row."""
+        return self.prefetch_related(
+            Prefetch(
+                "care_links",
+                queryset=ClientCareUnit.objects.filter(is_active=True, role=ClientCareUnit.Role.PRIMARY)
+                .select_related("unit")
+                .order_by(),
+                to_attr="primary_links",
+            )
+        )
+
+
 class Client(models.Model):
     """Basic demographic and registration details."""
 
@@ -70,7 +86,7 @@ class Client(models.Model):
     ds_division = models.ForeignKey(DS_Division, on_delete=models.SET_NULL, blank=True, null=True)
     contact_number = models.CharField(max_length=20, blank=True, null=True)
     email = models.EmailField(blank=True, null=True)
-    photo = models.ImageField(upload_to="client_photos/", blank=True, null=True)
+    photo = models.ImageField(upload_to="client_photos/", blank=True, null=True, validators=[validate_photo])
     guardian_name_1 = models.CharField(max_length=100, blank=True, null=True)
     guardian_name_2 = models.CharField(max_length=100, blank=True, null=True)
     guardian_contact_number_1 = models.CharField(max_length=20, blank=True, null=True)
@@ -82,6 +98,9 @@ class Client(models.Model):
     transfusion_regimen = models.CharField(max_length=200, blank=True, null=True)
     allergic_history = models.TextField(blank=True, null=True)
     special_note = models.TextField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = ClientQuerySet.as_manager()
 
     def __str__(self):
         return f"{self.registration_number} : {self.full_name}"
@@ -100,8 +119,10 @@ class Client(models.Model):
             years -= 1
         return years
 
-    @property
+    @cached_property
     def precise_age(self):
+        if self.date_of_birth is None:
+            return None
         # Get today's date in a timezone-aware format (optional, but good practice)
         today = timezone.localdate()
 
@@ -114,12 +135,20 @@ class Client(models.Model):
     @property
     def age_string(self):
         age_data = self.precise_age
+        if age_data is None:
+            return None
         return f"{age_data['years']} years, {age_data['months']} months, and {age_data['days']} days"
 
     @property
     def primary_care_unit(self):
-        primary_link = self.care_links.filter(is_active=True, role=ClientCareUnit.Role.PRIMARY).first()
-        return primary_link.unit if primary_link else None
+        # Filled in by Client.objects.with_primary_unit(); fall back to a single query otherwise.
+        if hasattr(self, "primary_links"):
+            primary_links = self.primary_links
+        else:
+            primary_links = self.care_links.filter(is_active=True, role=ClientCareUnit.Role.PRIMARY).select_related(
+                "unit"
+            )[:1]
+        return primary_links[0].unit if primary_links else None
 
     class Meta:
         ordering = ["full_name"]
@@ -138,6 +167,7 @@ class ClientCareUnit(models.Model):
     end_date = models.DateField(blank=True, null=True)
     is_active = models.BooleanField(default=True)
     notes = models.TextField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
 
     def clean(self):
         if self.end_date and self.end_date < self.start_date:
@@ -149,6 +179,16 @@ class ClientCareUnit(models.Model):
     def __str__(self):
         return f"{self.client.registration_number} - {self.unit.name} ({self.role})"
 
+    @classmethod
+    def active_link_exists(cls, unit_id, client_ref="pk"):
+        """Correlated EXISTS that is true when the outer row's client is actively linked to ``unit_id``.
+
+        ``client_ref`` is the path from the outer model to its client id, e.g. ``"pk"`` for
+        ``Client`` or ``"client"`` for ``Admission``. Filtering with it never multiplies rows,
+        so scoped querysets need no DISTINCT.
+        """
+        return Exists(cls.objects.filter(client_id=OuterRef(client_ref), unit_id=unit_id, is_active=True))
+
     class Meta:
         ordering = ["client", "-is_active", "role", "start_date"]
         constraints = [
@@ -167,6 +207,10 @@ class ClientCareUnit(models.Model):
                 name="uniq_active_primary_unit_per_client",
             ),
         ]
+        indexes = [
+            # Unit-wide scans (reports, scheduling, unit exports) only ever want active links.
+            models.Index(fields=["unit", "client"], condition=Q(is_active=True), name="clientcareunit_active_unit"),
+        ]
 
 
 # -------------------------------------------------------------------
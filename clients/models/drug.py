@@ -30,5 +30,8 @@ class Drug(models.Model):
     indication = models.CharField(max_length=200, blank=True, null=True)
     prescribed_by = models.CharField(max_length=100, blank=True, null=True)
 
+    class Meta:
+        indexes = [models.Index(fields=["client", "-date_prescribed"], name="drug_client_date")]
+
     def __str__(self):
         return f"{self.drug_name} - {self.client.full_name}"
@@ -1,9 +1,20 @@
+import re
+from decimal import Decimal, InvalidOperation
+
 from django.db import models
+from django.db.models import F, Q
+from django.dispatch import Signal
 from django.urls import reverse
+from django.utils import timezone
 
 from .client import Client
 
 
+# Sent by Admission.save with ``client_ids`` after it moves transfusions to the admission's new
+# client. The move uses update(), which sends no post_save for the transfusions themselves.
+transfusions_reassigned = Signal()
+
+
 class ComplicationType(models.Model):
     """COMPLICATIONS TYPES like DM, HYPOTHYROIDISM etc."""
 
@@ -46,6 +57,9 @@ class Vaccination(models.Model):
     date_given = models.DateField()
     next_dose_date = models.DateField(blank=True, null=True)
 
+    class Meta:
+        indexes = [models.Index(fields=["client", "-date_given"], name="vaccination_client_date")]
+
     def __str__(self):
         return f"{self.vaccine_name} ({self.client.full_name})"
 
@@ -56,11 +70,52 @@ class InvestigationType(models.Model):
     name = models.CharField(max_length=100, unique=True)
     description = models.TextField(blank=True, null=True)
     unit = models.CharField(max_length=50, blank=True, null=True)
-    # Add Refence Range
+    reference_low = models.DecimalField(max_digits=12, decimal_places=3, blank=True, null=True)
+    reference_high = models.DecimalField(max_digits=12, decimal_places=3, blank=True, null=True)
 
     def __str__(self):
         return self.name
 
+    def is_out_of_range(self, value):
+        if value is None:
+            return False
+        if self.reference_low is not None and value < self.reference_low:
+            return True
+        return self.reference_high is not None and value > self.reference_high
+
+
+RESULT_VALUE_RE = re.compile(r"^(?P<comparator>[<>]=?)?\s*(?P<number>[-+]?\d+(?:\.\d+)?)\s*(?P<suffix>\D*)$")
+RESULT_VALUE_LIMIT = Decimal("1e9")
+
+
+def parse_result_value(raw):
+    """Split a free-text result into ``(numeric_value, qualitative_value)``.
+
+    ``"2,500"`` gives ``(Decimal("2500"), None)``, ``"<0.5"`` keeps the comparator as the
+    qualitative part, and text such as ``"Positive"`` has no numeric value at all.
+    """
+    text = (raw or "").strip()
+    if not text:
+        return None, None
+    match = RESULT_VALUE_RE.match(text.replace(",", ""))
+    if not match:
+        return None, text
+    try:
+        number = Decimal(match["number"]).quantize(Decimal("0.001"))
+    except InvalidOperation:
+        return None, text
+    if abs(number) >= RESULT_VALUE_LIMIT:
+        return None, text
+    return number, text if match["comparator"] else None
+
+
+class InvestigationQuerySet(models.QuerySet):
+    def out_of_reference_range(self):
+        return self.filter(
+            Q(numeric_value__lt=F("investigation_type__reference_low"))
+            | Q(numeric_value__gt=F("investigation_type__reference_high"))
+        )
+
 
 class Investigation(models.Model):
     """INVESTIGATIONS"""
@@ -68,13 +123,39 @@ class Investigation(models.Model):
     client = models.ForeignKey(Client, on_delete=models.CASCADE, related_name="client_investigations")
     date_done = models.DateField()
     investigation_type = models.ForeignKey(InvestigationType, on_delete=models.SET_NULL, blank=True, null=True)
+    # Result as entered; numeric_value/qualitative_value are parsed from it on every save.
     value = models.CharField(max_length=100, blank=True, null=True)
+    numeric_value = models.DecimalField(max_digits=12, decimal_places=3, blank=True, null=True, editable=False)
+    qualitative_value = models.CharField(max_length=100, blank=True, null=True, editable=False)
     unit = models.CharField(max_length=20, blank=True, null=True)  # TODO: Redundant if InvestigationType has unit
     laboratory_name = models.CharField(max_length=100, blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    objects = InvestigationQuerySet.as_manager()
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["client", "investigation_type", "date_done"], name="investigation_client_type_date"),
+            models.Index(fields=["client", "-date_done"], name="investigation_client_date"),
+            models.Index(
+                fields=["investigation_type", "date_done", "numeric_value"], name="investigation_type_date_value"
+            ),
+        ]
 
     def __str__(self):
         return f"{self.investigation_type} - {self.client.full_name}"
 
+    def save(self, *args, **kwargs):
+        # Derived from value only, so clearing the value clears both.
+        self.numeric_value, self.qualitative_value = parse_result_value(self.value or "")
+        super().save(*args, **kwargs)
+
+    @property
+    def is_out_of_range(self):
+        if self.investigation_type is None:
+            return False
+        return self.investigation_type.is_out_of_range(self.numeric_value)
+
 
 class GrowthRecord(models.Model):
     """GROWTH RECORDS"""
@@ -85,6 +166,9 @@ class GrowthRecord(models.Model):
     value = models.DecimalField(max_digits=6, decimal_places=2)
     percentile = models.DecimalField(max_digits=5, decimal_places=2, blank=True, null=True)
 
+    class Meta:
+        indexes = [models.Index(fields=["client", "-date_measured"], name="growthrecord_client_date")]
+
     def __str__(self):
         return f"{self.type} - {self.value} ({self.client.full_name})"
 
@@ -97,6 +181,10 @@ class Admission(models.Model):
     reason_for_admission = models.TextField(default="Blood Transfusion")
     date_of_discharge = models.DateField(blank=True, null=True)
     outcome = models.CharField(max_length=200, blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [models.Index(fields=["client", "-date_of_admission"], name="admission_client_date")]
 
     def __str__(self):
         return f"Admission on {self.date_of_admission} - {self.client.full_name}"
@@ -105,12 +193,25 @@ class Admission(models.Model):
         """Return the client detail URL after admission operations."""
         return reverse("clients:client-detail", kwargs={"pk": self.client.pk})
 
+    def save(self, *args, **kwargs):
+        adding = self._state.adding
+        super().save(*args, **kwargs)
+        if not adding:
+            # Keep the denormalized Transfusion.client in step when an admission is reassigned.
+            moved = self.blood_transfusions.exclude(client_id=self.client_id)
+            client_ids = set(moved.values_list("client_id", flat=True))
+            if client_ids:
+                moved.update(client_id=self.client_id, updated_at=timezone.now())
+                transfusions_reassigned.send(sender=Admission, client_ids=client_ids | {self.client_id})
+
 
 class Transfusion(models.Model):
     """BLOOD TRANSFUSIONS"""
 
-    # Client of the transfusion is the client of the admission
+    # Client of the transfusion is the client of the admission, copied here on save so
+    # per-client and per-unit queries need not join through Admission.
     admission = models.ForeignKey(Admission, on_delete=models.CASCADE, related_name="blood_transfusions")
+    client = models.ForeignKey(Client, on_delete=models.CASCADE, related_name="transfusions", editable=False)
     date_of_transfusion = models.DateField()
     pre_HB_level = models.DecimalField(max_digits=4, decimal_places=1, blank=True, null=True, default=9.0)
     post_HB_level = models.DecimalField(max_digits=4, decimal_places=1, blank=True, null=True)
@@ -124,9 +225,20 @@ class Transfusion(models.Model):
     reaction = models.CharField(max_length=200, blank=True, null=True, default="None")
     checked_by = models.CharField(max_length=100, blank=True, null=True)
     remarks = models.TextField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=["admission", "date_of_transfusion"], name="transfusion_admission_date"),
+            models.Index(fields=["client", "-date_of_transfusion"], name="transfusion_client_date"),
+        ]
 
     def __str__(self):
-        return f"Transfusion on {self.date_of_transfusion} - {self.admission.client.full_name}"
+        return f"Transfusion on {self.date_of_transfusion} - {self.client.full_name}"
+
+    def save(self, *args, **kwargs):
+        self.client_id = self.admission.client_id
+        super().save(*args, **kwargs)
 
 
 class ClinicVisit(models.Model):
@@ -143,9 +255,12 @@ class ClinicVisit(models.Model):
     )
     action = models.TextField(blank=True, null=True)
     referral = models.CharField(max_length=200, blank=True, null=True)
-    next_visit_date = models.DateField(blank=True, null=True)
+    next_visit_date = models.DateField(blank=True, null=True, db_index=True)
     doctor_name = models.CharField(max_length=100, blank=True, null=True)
     follow_up_needed = models.BooleanField(default=False)
 
+    class Meta:
+        indexes = [models.Index(fields=["client", "-date_visit"], name="clinicvisit_client_date")]
+
     def __str__(self):
         return f"Clinic visit - {self.client.full_name} ({self.date_visit})"
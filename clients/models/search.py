@@ -0,0 +1,18 @@
+from django.db import models
+
+from .client import Client
+
+
+class ClientSearchDocument(models.Model):
+    """Normalized text that patient search matches against, one row per client.
+
+    ``document`` holds transliteration-folded name tokens, identifiers and normalized
+    phone numbers (see clients.search). Rows are kept current by clients.signals and
+    can be rebuilt with ``manage.py rebuild_search_index``.
+    """
+
+    client = models.OneToOneField(Client, on_delete=models.CASCADE, primary_key=True, related_name="search_document")
+    document = models.TextField()
+
+    def __str__(self):
+        return f"Search document: {self.client_id}"
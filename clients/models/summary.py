@@ -0,0 +1,105 @@
+from django.db import models
+from django.db.models import Count, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from .client import Client
+from .management import Admission, Investigation, Transfusion
+
+FERRITIN_TYPE_NAME = "ferritin"
+
+
+class ClientClinicalSummary(models.Model):
+    """Latest clinical figures per client, denormalized for registry lists and reports.
+
+    Rows are refreshed by clients.signals whenever an Admission, Transfusion or
+    Investigation changes, and can be rebuilt with ``manage.py rebuild_clinical_summaries``.
+    """
+
+    SUMMARY_FIELDS = [
+        "last_admission_date",
+        "last_transfusion_date",
+        "last_pre_HB_level",
+        "next_transfusion_due",
+        "transfusion_count",
+        "last_ferritin",
+        "last_ferritin_date",
+    ]
+
+    client = models.OneToOneField(Client, on_delete=models.CASCADE, primary_key=True, related_name="clinical_summary")
+    last_admission_date = models.DateField(blank=True, null=True)
+    last_transfusion_date = models.DateField(blank=True, null=True, db_index=True)
+    last_pre_HB_level = models.DecimalField(max_digits=4, decimal_places=1, blank=True, null=True)
+    next_transfusion_due = models.DateField(blank=True, null=True, db_index=True)
+    transfusion_count = models.PositiveIntegerField(default=0)
+    last_ferritin = models.DecimalField(max_digits=12, decimal_places=3, blank=True, null=True)
+    last_ferritin_date = models.DateField(blank=True, null=True)
+    updated_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        verbose_name = "Client clinical summary"
+        verbose_name_plural = "Client clinical summaries"
+
+    def __str__(self):
+        return f"Summary: {self.client_id}"
+
+    @staticmethod
+    def summary_annotations():
+        """Correlated subqueries computing every summary column for an outer Client queryset."""
+        transfusions = Transfusion.objects.filter(client=OuterRef("pk"))
+        latest_transfusion = transfusions.order_by("-date_of_transfusion", "-id")
+        latest_admission = Admission.objects.filter(client=OuterRef("pk")).order_by("-date_of_admission", "-id")
+        latest_ferritin = Investigation.objects.filter(
+            client=OuterRef("pk"),
+            investigation_type__name__icontains=FERRITIN_TYPE_NAME,
+            numeric_value__isnull=False,
+        ).order_by("-date_done", "-id")
+        return {
+            "last_admission_date": Subquery(latest_admission.values("date_of_admission")[:1]),
+            "last_transfusion_date": Subquery(latest_transfusion.values("date_of_transfusion")[:1]),
+            "last_pre_HB_level": Subquery(latest_transfusion.values("pre_HB_level")[:1]),
+            "next_transfusion_due": Subquery(latest_transfusion.values("next_date_given")[:1]),
+            "transfusion_count": Coalesce(
+                Subquery(transfusions.order_by().values("client").annotate(total=Count("id")).values("total")),
+                0,
+            ),
+            "last_ferritin": Subquery(latest_ferritin.values("numeric_value")[:1]),
+            "last_ferritin_date": Subquery(latest_ferritin.values("date_done")[:1]),
+        }
+
+    @classmethod
+    def computed_rows(cls, client_ids=None, chunk_size=2000):
+        """Yield freshly computed summaries as unsaved instances, one query per chunk."""
+        clients = Client.objects.order_by("pk")
+        if client_ids is not None:
+            clients = clients.filter(pk__in=client_ids)
+        rows = clients.annotate(**{f"summary_{name}": value for name, value in cls.summary_annotations().items()})
+        rows = rows.values("pk", *(f"summary_{name}" for name in cls.SUMMARY_FIELDS))
+        for row in rows.iterator(chunk_size=chunk_size):
+            yield cls(client_id=row["pk"], **{name: row[f"summary_{name}"] for name in cls.SUMMARY_FIELDS})
+
+    @classmethod
+    def refresh(cls, client_ids=None, batch_size=1000):
+        """Recompute and upsert summaries for ``client_ids`` (every client when None)."""
+        batch = []
+        written = 0
+        for summary in cls.computed_rows(client_ids):
+            batch.append(summary)
+            if len(batch) >= batch_size:
+                written += cls._upsert(batch)
+                batch = []
+        if batch:
+            written += cls._upsert(batch)
+        return written
+
+    @classmethod
+    def _upsert(cls, batch):
+        cls.objects.bulk_create(
+            batch,
+            update_conflicts=True,
+            unique_fields=["client"],
+            update_fields=[*cls.SUMMARY_FIELDS, "updated_at"],
+        )
+        return len(batch)
+
+    def differs_from(self, other):
+        return any(getattr(self, name) != getattr(other, name) for name in self.SUMMARY_FIELDS)
@@ -0,0 +1,176 @@
+"""Client photo pipeline.
+
+An upload is decoded once with Pillow, turned upright from its EXIF orientation,
+downscaled to PHOTO_MAX_SIZE and re-encoded as JPEG without any metadata. It is stored
+under the first 16 hex digits of its SHA-256, e.g. ``client_photos/3f2a9c0d1e4b5a67.jpg``,
+so a name always means the same bytes. The sizes in PHOTO_RENDITIONS are written next
+to it in every PHOTO_FORMATS format (``client_photos/3f2a9c0d1e4b5a67/thumb.webp``) by a
+small thread pool once the client is saved; ClientPhotoView writes any that are still
+missing when they are first requested. Only renditions are ever served.
+"""
+
+import hashlib
+import logging
+import os
+import posixpath
+import tempfile
+from concurrent.futures import ThreadPoolExecutor
+from functools import cache
+from io import BytesIO
+
+from django.conf import settings
+from django.core.exceptions import ValidationError
+from django.core.files.base import ContentFile
+from django.core.files.storage import default_storage
+from django.template.defaultfilters import filesizeformat
+from django.urls import reverse
+from PIL import Image, ImageOps
+
+logger = logging.getLogger(__name__)
+
+PHOTO_MAX_SIZE = 1600
+# Longest edge in pixels; square renditions are centre-cropped for avatars.
+PHOTO_RENDITIONS = {
+    "thumb": {"size": 96, "square": True},
+    "detail": {"size": 320, "square": False},
+}
+PHOTO_FORMATS = {
+    "webp": ("WEBP", "image/webp", {"quality": 80, "method": 4}),
+    "jpg": ("JPEG", "image/jpeg", {"quality": 82, "optimize": True, "progressive": True}),
+}
+PHOTO_WORKERS = 2
+PHOTO_CACHE_MAX_AGE = 60 * 60 * 24 * 365
+
+
+def validate_photo(file):
+    """Reject new uploads over CLIENT_PHOTO_MAX_UPLOAD_SIZE bytes or CLIENT_PHOTO_MAX_PIXELS pixels."""
+    if getattr(file, "_committed", False):
+        return
+    if file.size > settings.CLIENT_PHOTO_MAX_UPLOAD_SIZE:
+        raise ValidationError(f"Photos must be {filesizeformat(settings.CLIENT_PHOTO_MAX_UPLOAD_SIZE)} or smaller.")
+    file.seek(0)
+    try:
+        # Only the header is read here; pixels are decoded when the photo is stored.
+        with Image.open(file) as image:
+            width, height = image.size
+    except (OSError, Image.DecompressionBombError):
+        raise ValidationError("Upload a valid image.")
+    finally:
+        file.seek(0)
+    if width * height > settings.CLIENT_PHOTO_MAX_PIXELS:
+        raise ValidationError(f"Photos must be at most {settings.CLIENT_PHOTO_MAX_PIXELS // 1_000_000} megapixels.")
+
+
+def _upright_rgb(image, size):
+    # JPEGs are decoded at the smallest scale that still covers ``size``, which is much faster.
+    image.draft("RGB", (size, size))
+    image = ImageOps.exif_transpose(image)
+    if image.mode in ("RGBA", "LA") or "transparency" in image.info:
+        image = image.convert("RGBA")
+        background = Image.new("RGB", image.size, "white")
+        background.paste(image, mask=image.getchannel("A"))
+        return background
+    return image.convert("RGB")
+
+
+def _encode(image, fmt):
+    # Pillow writes EXIF and ICC data only when asked to, so the output carries no metadata.
+    pil_format, _, options = PHOTO_FORMATS[fmt]
+    buffer = BytesIO()
+    image.save(buffer, pil_format, **options)
+    return buffer.getvalue()
+
+
+def normalize_photo(file):
+    """Upright JPEG bytes of an uploaded photo, at most PHOTO_MAX_SIZE pixels on the long edge."""
+    file.seek(0)
+    with Image.open(file) as source:
+        image = _upright_rgb(source, PHOTO_MAX_SIZE)
+    image.thumbnail((PHOTO_MAX_SIZE, PHOTO_MAX_SIZE), Image.Resampling.LANCZOS)
+    return _encode(image, "jpg")
+
+
+def store_client_photo(client):
+    """Replace the new upload in ``client.photo`` with its normalized, content-named JPEG."""
+    upload = client.photo
+    data = normalize_photo(upload.file)
+    name = upload.field.generate_filename(client, f"{hashlib.sha256(data).hexdigest()[:16]}.jpg")
+    if not upload.storage.exists(name):
+        name = upload.storage.save(name, ContentFile(data))
+    client.photo = name
+
+
+def photo_digest(photo_name):
+    return posixpath.splitext(posixpath.basename(photo_name))[0]
+
+
+def rendition_name(photo_name, rendition, fmt):
+    return f"{posixpath.splitext(photo_name)[0]}/{rendition}.{fmt}"
+
+
+def photo_url(client, rendition, fmt):
+    return reverse("clients:client-photo", args=[client.pk, photo_digest(client.photo.name), rendition, fmt])
+
+
+def _save_rendition(storage, name, data):
+    # The view checks exists() and then opens the file, so a rendition must never be seen half-written.
+    try:
+        path = storage.path(name)
+    except NotImplementedError:
+        # Object stores replace whole objects at once.
+        storage.save(name, ContentFile(data))
+        return
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with tempfile.NamedTemporaryFile(dir=os.path.dirname(path), delete=False) as file:
+        file.write(data)
+    if storage.file_permissions_mode is not None:
+        os.chmod(file.name, storage.file_permissions_mode)
+    os.replace(file.name, path)
+
+
+def generate_renditions(photo_name, storage=default_storage):
+    """Write the missing renditions of a stored photo; returns their names."""
+    missing = [
+        (rendition, fmt)
+        for rendition in PHOTO_RENDITIONS
+        for fmt in PHOTO_FORMATS
+        if not storage.exists(rendition_name(photo_name, rendition, fmt))
+    ]
+    if not missing:
+        return []
+    largest = max(spec["size"] for spec in PHOTO_RENDITIONS.values())
+    with storage.open(photo_name) as file, Image.open(file) as source:
+        master = _upright_rgb(source, largest)
+
+    written = []
+    for rendition, spec in PHOTO_RENDITIONS.items():
+        size = spec["size"]
+        if spec["square"]:
+            image = ImageOps.fit(master, (size, size), Image.Resampling.LANCZOS)
+        else:
+            image = master.copy()
+            image.thumbnail((size, size), Image.Resampling.LANCZOS)
+        for fmt in PHOTO_FORMATS:
+            if (rendition, fmt) in missing:
+                name = rendition_name(photo_name, rendition, fmt)
+                _save_rendition(storage, name, _encode(image, fmt))
+                written.append(name)
+    return written
+
+
+@cache
+def _executor():
+    return ThreadPoolExecutor(max_workers=PHOTO_WORKERS, thread_name_prefix="client-photos")
+
+
+def _generate_logged(photo_name):
+    try:
+        return generate_renditions(photo_name)
+    except Exception:
+        logger.exception("Could not generate renditions of %s", photo_name)
+        raise
+
+
+def schedule_renditions(photo_name):
+    """Generate a photo's renditions in the background thread pool; returns the Future."""
+    return _executor().submit(_generate_logged, photo_name)
@@ -0,0 +1,73 @@
+import hashlib
+import time
+
+from django.core.cache import cache
+from django.db.models import Avg, Count, F, Q, Sum
+from django.db.models.functions import TruncMonth
+
+from .models.client import ClientCareUnit
+from .models.management import Transfusion
+
+REPORT_VERSION_KEY = "reports:transfusion-version"
+REPORT_CACHE_TIMEOUT = 60 * 60
+
+
+def transfusion_workload(unit_ids=None, start=None, end=None):
+    """Transfusion workload and blood usage per ThalassemiaUnit and month.
+
+    Transfusions are attributed to the patient's active primary unit; the
+    uniq_active_primary_unit_per_client constraint guarantees that join adds at most
+    one row per transfusion. Everything is aggregated by the database.
+    """
+    # All care_links conditions must sit in one filter() call so they share a single join.
+    link_filters = {
+        "client__care_links__is_active": True,
+        "client__care_links__role": ClientCareUnit.Role.PRIMARY,
+    }
+    if unit_ids is not None:
+        link_filters["client__care_links__unit_id__in"] = unit_ids
+    queryset = Transfusion.objects.filter(**link_filters)
+    if start:
+        queryset = queryset.filter(date_of_transfusion__gte=start)
+    if end:
+        queryset = queryset.filter(date_of_transfusion__lte=end)
+
+    rows = (
+        queryset.annotate(
+            unit_id=F("client__care_links__unit_id"),
+            unit_name=F("client__care_links__unit__name"),
+            month=TruncMonth("date_of_transfusion"),
+        )
+        .values("unit_id", "unit_name", "month")
+        .annotate(
+            transfusions=Count("id"),
+            blood_volume=Sum("amount_of_blood"),
+            mean_pre_hb=Avg("pre_HB_level"),
+            washed=Count("id", filter=Q(special_type__name__icontains="washed")),
+            irradiated=Count("id", filter=Q(special_type__name__icontains="irradiated")),
+        )
+        .order_by("unit_name", "month")
+    )
+    report = []
+    for row in rows:
+        row["washed_share"] = row["washed"] / row["transfusions"]
+        row["irradiated_share"] = row["irradiated"] / row["transfusions"]
+        report.append(row)
+    return report
+
+
+def bump_report_version():
+    # A timestamp rather than a counter: it never repeats even if the key is evicted.
+    cache.set(REPORT_VERSION_KEY, time.time_ns(), None)
+
+
+def cached_transfusion_workload(unit_ids=None, start=None, end=None):
+    """``transfusion_workload`` served from the cache until a transfusion changes."""
+    version = cache.get_or_set(REPORT_VERSION_KEY, time.time_ns, None)
+    params = repr((sorted(unit_ids) if unit_ids is not None else None, start, end))
+    key = f"reports:transfusion-workload:{version}:{hashlib.md5(params.encode()).hexdigest()}"
+    report = cache.get(key)
+    if report is None:
+        report = transfusion_workload(unit_ids, start, end)
+        cache.set(key, report, REPORT_CACHE_TIMEOUT)
+    return report
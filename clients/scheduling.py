@@ -0,0 +1,78 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Count, Exists, OuterRef, Q
+
+from .models.client import ClientCareUnit
+from .models.management import ClinicVisit
+from .models.summary import ClientClinicalSummary
+
+
+def _scope_to_unit(queryset, unit_id):
+    if unit_id is None:
+        return queryset
+    return queryset.filter(ClientCareUnit.active_link_exists(unit_id, "client"))
+
+
+def transfusion_queue(unit_id, today, days):
+    """Clients due for transfusion up to ``today + days``, overdue ones first.
+
+    Reads ``next_transfusion_due`` from ClientClinicalSummary, so a whole unit is one
+    indexed range query. ``unit_id=None`` covers every unit.
+    """
+    horizon = today + timedelta(days=days)
+    queryset = _scope_to_unit(ClientClinicalSummary.objects.filter(next_transfusion_due__lte=horizon), unit_id)
+    entries = []
+    for summary in queryset.select_related("client").order_by("next_transfusion_due", "client__full_name"):
+        entries.append(
+            {
+                "client": summary.client,
+                "due": summary.next_transfusion_due,
+                "overdue_days": max((today - summary.next_transfusion_due).days, 0),
+                "last_transfusion_date": summary.last_transfusion_date,
+                "last_pre_HB_level": summary.last_pre_HB_level,
+            }
+        )
+    return entries
+
+
+def clinic_visit_queue(unit_id, today, days):
+    """Follow-up visits due up to ``today + days``, taken from each client's latest visit only."""
+    # Two visits on the same day are ordered by id, so exactly one of them is the latest.
+    later_visit = ClinicVisit.objects.filter(client=OuterRef("client")).filter(
+        Q(date_visit__gt=OuterRef("date_visit")) | Q(date_visit=OuterRef("date_visit"), pk__gt=OuterRef("pk"))
+    )
+    queryset = ClinicVisit.objects.filter(next_visit_date__lte=today + timedelta(days=days)).filter(
+        ~Exists(later_visit)
+    )
+    queryset = _scope_to_unit(queryset, unit_id)
+    return [
+        {
+            "client": visit.client,
+            "due": visit.next_visit_date,
+            "overdue_days": max((today - visit.next_visit_date).days, 0),
+            "clinic_type": visit.clinic_type,
+        }
+        for visit in queryset.select_related("client", "clinic_type").order_by("next_visit_date", "client__full_name")
+    ]
+
+
+def daily_transfusion_load(unit_id, today, days, capacity=None):
+    """Transfusions due per day for the next ``days`` days against the unit's daily capacity.
+
+    Anything already overdue is folded into today's bucket, since it has to be seen now.
+    """
+    capacity = settings.TRANSFUSION_DAILY_CAPACITY if capacity is None else capacity
+    horizon = today + timedelta(days=days - 1)
+    queryset = _scope_to_unit(ClientClinicalSummary.objects.filter(next_transfusion_due__lte=horizon), unit_id)
+    counts = {
+        row["next_transfusion_due"]: row["total"]
+        for row in queryset.values("next_transfusion_due").annotate(total=Count("pk")).order_by()
+    }
+    overdue = sum(total for due, total in counts.items() if due < today)
+    buckets = []
+    for offset in range(days):
+        day = today + timedelta(days=offset)
+        due = counts.get(day, 0) + (overdue if offset == 0 else 0)
+        buckets.append({"date": day, "due": due, "capacity": capacity, "over_capacity": due > capacity})
+    return buckets
@@ -0,0 +1,214 @@
+"""Patient search shared by the admin and the registry typeahead.
+
+Names are folded so common romanizations of Sinhala and Tamil names compare equal
+(Tharindu/Tarindu, Wickramasinghe/Vikramasinghe, Thamizh/Tamil) and phone numbers are
+reduced to the national ``0XXXXXXXXX`` form. Each client's folded text is stored in
+ClientSearchDocument, and the backend for the database vendor turns a query into a
+filter on it:
+
+* PostgreSQL: substring or pg_trgm word-similarity match, both served by a GIN trigram index.
+* SQLite: an FTS5 trigram shadow table kept in step by triggers.
+* Anything else: substring match on the document.
+"""
+
+import re
+import unicodedata
+
+from django.db import connections
+from django.db.models import BooleanField, F, FloatField, Func, Q, Value
+from django.db.models.expressions import RawSQL
+
+from .models.client import Client
+from .models.search import ClientSearchDocument
+
+FTS_TABLE = "clients_clientsearch_fts"
+TEXT_FIELDS = ("full_name", "common_name", "registration_number", "nic_number")
+PHONE_FIELDS = ("contact_number", "guardian_contact_number_1", "guardian_contact_number_2")
+PHONE_RE = re.compile(r"\+?\d[\d\s()\-]{6,}\d")
+MIN_PHONE_DIGITS = 9
+FTS_MIN_LENGTH = 3
+
+# Applied in order to lowercased text: vowel length, aspirates, then doubled letters.
+NAME_FOLDS = [
+    (re.compile(r"aa"), "a"),
+    (re.compile(r"ee|ii"), "i"),
+    (re.compile(r"oo|uu"), "u"),
+    (re.compile(r"ey"), "ay"),
+    (re.compile(r"ck"), "k"),
+    (re.compile(r"zh"), "l"),
+    (re.compile(r"([tdbkgpjs])h"), r"\1"),
+    (re.compile(r"w"), "v"),
+    (re.compile(r"([a-z])\1+"), r"\1"),
+]
+
+
+def fold_text(value):
+    """Lowercase ``value``, strip accents from Latin letters and fold romanization variants."""
+    chars = []
+    for char in unicodedata.normalize("NFKD", value.lower()):
+        # Sinhala and Tamil vowel signs are combining marks too; only strip marks on Latin letters.
+        if unicodedata.combining(char) and chars and chars[-1].isascii():
+            continue
+        chars.append(char)
+    text = unicodedata.normalize("NFC", "".join(chars))
+    for pattern, replacement in NAME_FOLDS:
+        text = pattern.sub(replacement, text)
+    return text
+
+
+def normalize_phone(value):
+    """National form of a Sri Lankan number (``0771234567``), or just its digits otherwise."""
+    digits = re.sub(r"\D", "", value or "")
+    if digits.startswith("0094"):
+        digits = digits[2:]
+    if digits.startswith("94") and len(digits) == 11:
+        return "0" + digits[2:]
+    if len(digits) == 9 and not digits.startswith("0"):
+        return "0" + digits
+    return digits
+
+
+def build_document(values):
+    """Search text for one client from a mapping of TEXT_FIELDS and PHONE_FIELDS."""
+    tokens = [fold_text(values[field]) for field in TEXT_FIELDS if values.get(field)]
+    tokens += [normalize_phone(values[field]) for field in PHONE_FIELDS if values.get(field)]
+    return " ".join(token for token in tokens if token)
+
+
+def query_terms(query):
+    """Split ``query`` into terms, each a tuple of alternatives that must match.
+
+    A run of digits that looks like a phone number is one term matching either its
+    national form or the digits as typed (NIC and registration numbers are digits too).
+    """
+    terms = []
+    for match in PHONE_RE.finditer(query):
+        digits = re.sub(r"\D", "", match.group())
+        if len(digits) >= MIN_PHONE_DIGITS:
+            terms.append(tuple(dict.fromkeys([normalize_phone(digits), digits])))
+            query = query.replace(match.group(), " ")
+    terms += [(term,) for term in (fold_text(token) for token in query.replace(",", " ").split()) if term]
+    return terms
+
+
+def _upsert(documents):
+    ClientSearchDocument.objects.bulk_create(
+        documents, update_conflicts=True, unique_fields=["client"], update_fields=["document"]
+    )
+    return len(documents)
+
+
+def index_clients(clients):
+    """Write search documents for saved Client instances in one query."""
+    documents = [
+        ClientSearchDocument(
+            client_id=client.pk,
+            document=build_document({field: getattr(client, field) for field in TEXT_FIELDS + PHONE_FIELDS}),
+        )
+        for client in clients
+    ]
+    return _upsert(documents) if documents else 0
+
+
+def refresh_search_documents(client_ids=None, batch_size=1000):
+    """Rebuild search documents for ``client_ids`` (every client when None)."""
+    clients = Client.objects.order_by("pk")
+    if client_ids is not None:
+        clients = clients.filter(pk__in=client_ids)
+    batch = []
+    written = 0
+    for values in clients.values("pk", *TEXT_FIELDS, *PHONE_FIELDS).iterator(chunk_size=batch_size):
+        batch.append(ClientSearchDocument(client_id=values["pk"], document=build_document(values)))
+        if len(batch) >= batch_size:
+            written += _upsert(batch)
+            batch = []
+    if batch:
+        written += _upsert(batch)
+    return written
+
+
+class WordSimilar(Func):
+    """``document %> term``: pg_trgm word similarity above ``pg_trgm.word_similarity_threshold``."""
+
+    arg_joiner = " %%> "
+    template = "%(expressions)s"
+    output_field = BooleanField()
+
+
+class WordSimilarity(Func):
+    function = "word_similarity"
+    output_field = FloatField()
+
+
+class SearchBackend:
+    """Substring match on the search document; works on every database."""
+
+    def term_condition(self, alternatives):
+        condition = Q()
+        for alternative in alternatives:
+            condition |= Q(search_document__document__contains=alternative)
+        return condition
+
+    def search(self, queryset, terms):
+        condition = Q()
+        for alternatives in terms:
+            condition &= self.term_condition(alternatives)
+        return queryset.filter(condition)
+
+
+class PostgresSearchBackend(SearchBackend):
+    """Substring or trigram word-similarity match, ranked by similarity to the whole query."""
+
+    def term_condition(self, alternatives):
+        condition = super().term_condition(alternatives)
+        for alternative in alternatives:
+            # Fuzzy matching on digits finds unrelated numbers, so only words are matched loosely.
+            if not alternative.isdigit():
+                condition |= Q(WordSimilar(F("search_document__document"), Value(alternative)))
+        return condition
+
+    def search(self, queryset, terms):
+        text = " ".join(alternatives[0] for alternatives in terms)
+        return (
+            super()
+            .search(queryset, terms)
+            .annotate(search_rank=WordSimilarity(Value(text), F("search_document__document")))
+            .order_by("-search_rank", "full_name")
+        )
+
+
+class SqliteSearchBackend(SearchBackend):
+    """FTS5 trigram match; terms shorter than a trigram fall back to LIKE."""
+
+    @staticmethod
+    def quote(term):
+        return '"' + term.replace('"', '""') + '"'
+
+    def search(self, queryset, terms):
+        indexed = [alternatives for alternatives in terms if min(map(len, alternatives)) >= FTS_MIN_LENGTH]
+        if indexed:
+            expression = " AND ".join(
+                "(" + " OR ".join(self.quote(alternative) for alternative in alternatives) + ")"
+                for alternatives in indexed
+            )
+            queryset = queryset.filter(
+                pk__in=RawSQL(f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s", [expression])
+            )
+        return super().search(queryset, [alternatives for alternatives in terms if alternatives not in indexed])
+
+
+def search_backend(using="default"):
+    vendor = connections[using].vendor
+    if vendor == "postgresql":
+        return PostgresSearchBackend()
+    if vendor == "sqlite":
+        return SqliteSearchBackend()
+    return SearchBackend()
+
+
+def search_clients(queryset, query):
+    """Narrow a Client queryset to the patients matching ``query``; a blank query changes nothing."""
+    terms = query_terms(query or "")
+    if not terms:
+        return queryset
+    return search_backend(queryset.db).search(queryset, terms)
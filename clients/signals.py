@@ -0,0 +1,130 @@
+from django.db import transaction
+from django.db.models.signals import post_delete, post_save, pre_save
+from django.dispatch import receiver
+
+from .fragments import bump_client_list_versions, bump_client_versions
+from .lookup_cache import bump_lookup_version
+from .models.client import Client, ClientCareUnit
+from .models.drug import DrugName
+from .models.lookup import Choice, DiagnosisType, DS_Division, ThalassemiaUnit
+from .models.management import (
+    Admission,
+    ComplicationType,
+    Investigation,
+    InvestigationType,
+    Transfusion,
+    transfusions_reassigned,
+)
+from .models.summary import ClientClinicalSummary
+from .photos import schedule_renditions, store_client_photo
+from .reports import bump_report_version
+from .search import index_clients
+
+
+@receiver([post_save, post_delete], sender=Transfusion)
+@receiver([post_save, post_delete], sender=Admission)
+@receiver([post_save, post_delete], sender=ClientCareUnit)
+def invalidate_transfusion_reports(sender, **kwargs):
+    bump_report_version()
+
+
+def refresh_summary(client_id):
+    ClientClinicalSummary.refresh([client_id])
+    # The client list shows summary dates, so its version changes once they are written.
+    bump_client_list_versions([client_id])
+
+
+def schedule_summary_refresh(client_id):
+    # Deferred to commit: a cascading Client delete must not recreate its summary row.
+    transaction.on_commit(lambda: refresh_summary(client_id))
+
+
+@receiver([post_save, post_delete], sender=Admission)
+@receiver([post_save, post_delete], sender=Transfusion)
+@receiver([post_save, post_delete], sender=Investigation)
+def refresh_summary_for_client_record(sender, instance, **kwargs):
+    # A record moved to another client changes the old client's summary too.
+    for client_id in {instance.client_id, getattr(instance, "_previous_client_id", None)} - {None}:
+        schedule_summary_refresh(client_id)
+
+
+@receiver([post_save, post_delete], sender=Choice)
+@receiver([post_save, post_delete], sender=DS_Division)
+@receiver([post_save, post_delete], sender=DiagnosisType)
+@receiver([post_save, post_delete], sender=ThalassemiaUnit)
+@receiver([post_save, post_delete], sender=DrugName)
+@receiver([post_save, post_delete], sender=ComplicationType)
+@receiver([post_save, post_delete], sender=InvestigationType)
+def invalidate_lookup_cache(sender, **kwargs):
+    bump_lookup_version()
+
+
+@receiver(post_save, sender=Client)
+def index_client_for_search(sender, instance, **kwargs):
+    index_clients([instance])
+
+
+@receiver(pre_save, sender=Client)
+def store_new_client_photo(sender, instance, raw=False, **kwargs):
+    # A new upload is stored upright, downscaled and stripped of EXIF before the row is written.
+    if instance.photo and not instance.photo._committed and not raw:
+        store_client_photo(instance)
+        instance._new_photo = instance.photo.name
+
+
+@receiver(post_save, sender=Client)
+def schedule_client_photo_renditions(sender, instance, **kwargs):
+    photo_name = getattr(instance, "_new_photo", None)
+    if photo_name:
+        instance._new_photo = None
+        transaction.on_commit(lambda: schedule_renditions(photo_name))
+
+
+@receiver(pre_save, sender=Admission)
+@receiver(pre_save, sender=Transfusion)
+@receiver(pre_save, sender=Investigation)
+def remember_previous_client(sender, instance, **kwargs):
+    # A record moved to another client leaves the old client's fragments stale too.
+    if not instance._state.adding:
+        instance._previous_client_id = sender.objects.filter(pk=instance.pk).values_list("client_id", flat=True).first()
+
+
+@receiver(pre_save, sender=ClientCareUnit)
+def remember_previous_unit(sender, instance, **kwargs):
+    # A link moved to another unit takes the client off the old unit's list.
+    if not instance._state.adding:
+        instance._previous_unit_id = sender.objects.filter(pk=instance.pk).values_list("unit_id", flat=True).first()
+
+
+@receiver([post_save, post_delete], sender=ClientCareUnit)
+@receiver([post_save, post_delete], sender=Client)
+def invalidate_client_lists(sender, instance, **kwargs):
+    if sender is Client:
+        client_ids, unit_ids = [instance.pk], []
+    else:
+        client_ids = []
+        unit_ids = [unit_id for unit_id in (instance.unit_id, getattr(instance, "_previous_unit_id", None)) if unit_id]
+    # After commit, so a poll never pairs the new version with the rows from before the write.
+    transaction.on_commit(lambda: bump_client_list_versions(client_ids, unit_ids))
+
+
+@receiver([post_save, post_delete], sender=Admission)
+@receiver([post_save, post_delete], sender=Transfusion)
+@receiver([post_save, post_delete], sender=Investigation)
+@receiver([post_save, post_delete], sender=ClientCareUnit)
+@receiver([post_save, post_delete], sender=Client)
+def invalidate_client_fragments(sender, instance, **kwargs):
+    if sender is Client:
+        client_ids = [instance.pk]
+    else:
+        client_ids = [instance.client_id, getattr(instance, "_previous_client_id", None)]
+    bump_client_versions(client_id for client_id in client_ids if client_id is not None)
+
+
+@receiver(transfusions_reassigned)
+def refresh_clients_of_moved_transfusions(sender, client_ids, **kwargs):
+    # What the transfusions' own post_save signals would have done for their old and new clients.
+    bump_report_version()
+    for client_id in client_ids:
+        schedule_summary_refresh(client_id)
+    bump_client_versions(client_ids)
@@ -0,0 +1,18 @@
+from django import template
+from django.apps import apps
+
+from ..lookup_cache import lookup_instance
+
+register = template.Library()
+
+
+@register.filter
+def lookup_label(pk, model_label):
+    """Label of a lookup row by id, served from the lookup cache.
+
+    ``{{ client.diagnosis_id|lookup_label:"clients.DiagnosisType" }}``
+    """
+    if pk in (None, ""):
+        return ""
+    obj = lookup_instance(apps.get_model(model_label), pk)
+    return str(obj) if obj is not None else ""
@@ -0,0 +1,24 @@
+from django import template
+from django.utils.html import format_html
+
+from ..photos import photo_url
+
+register = template.Library()
+
+
+@register.simple_tag
+def client_photo(client, rendition, css_class=""):
+    """WebP rendition of a client's photo with a JPEG fallback, or nothing without a photo.
+
+    ``{% client_photo client "thumb" "w-8 h-8 rounded-full" %}``
+    """
+    if not client.photo:
+        return ""
+    return format_html(
+        '<picture><source srcset="{}" type="image/webp">'
+        '<img src="{}" alt="{}" class="{}" loading="lazy" decoding="async"></picture>',
+        photo_url(client, rendition, "webp"),
+        photo_url(client, rendition, "jpg"),
+        client.full_name,
+        css_class,
+    )
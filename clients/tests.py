@@ -1,13 +1,49 @@
-from django.contrib.auth.models import Permission
-from django.core.exceptions import ValidationError
-from django.db import IntegrityError
-from django.test import SimpleTestCase, TestCase
+import base64
+import csv
+import json
+import os
+import tempfile
+from datetime import date, timedelta
+from decimal import Decimal
+from io import BytesIO, StringIO
+from unittest.mock import patch
+
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache
+from django.core.exceptions import ImproperlyConfigured, ValidationError
+from django.core.files.uploadedfile import SimpleUploadedFile
+from django.core.management import CommandError, call_command
+from django.db import IntegrityError, connection, transaction
+from django.template import Context, Template
+from django.test import RequestFactory, SimpleTestCase, TestCase
+from django.test.utils import CaptureQueriesContext, override_settings
 from django.urls import resolve, reverse
+from django.utils import timezone
+from PIL import Image
 
+from clients.exports import RegistryExport
 from clients.form import ClientForm
+from clients.fragments import bump_client_versions, fragment_scope
+from clients.imports import ClientHistoryImporter, ClientImporter, TransfusionImporter, read_csv
+from clients.lookup_cache import LOOKUP_VERSION_KEY, lookup_rows
 from clients.models.client import Client, ClientCareUnit, FamilyMember
+from clients.models.management import (
+    Admission,
+    ClinicVisit,
+    Investigation,
+    InvestigationType,
+    Transfusion,
+    parse_result_value,
+)
+from clients.models.summary import ClientClinicalSummary
 from clients.models.lookup import Choice, DS_Division, DiagnosisType, District, Province, ThalassemiaUnit
-from clients.views import ClientFormView, ClientListView, ClientUpdateView
+from clients.photos import photo_url, rendition_name, schedule_renditions
+from clients.search import fold_text, normalize_phone, query_terms, refresh_search_documents, search_clients
+from clients.scheduling import clinic_visit_queue, daily_transfusion_load, transfusion_queue
+from clients.reports import cached_transfusion_workload, transfusion_workload
+from clients.views import ClientFormView, ClientListView, ClientUpdateView, UnitScopedMixin
+from clients.views.mixins import ConditionalGetMixin
+from clients.views.pagination import EstimatedCountPaginator, estimated_row_count
 from users.models import CustomUser as User
 
 
@@ -55,6 +91,11 @@ class ClientModelTest(TestCase):
     def test_primary_care_unit(self):
         self.assertEqual(self.client.primary_care_unit, self.primary_unit)
 
+    def test_primary_care_unit_uses_prefetched_links(self):
+        client = Client.objects.with_primary_unit().get(pk=self.client.pk)
+        with self.assertNumQueries(0):
+            self.assertEqual(client.primary_care_unit, self.primary_unit)
+
     def test_client_marital_status(self):
         self.assertEqual(self.client.marital_status.name, "Single")
 
@@ -156,6 +197,1386 @@ class ClientViewTest(TestCase):
         self.assertEqual(response.status_code, 404)
 
 
+class ClientListPaginationTest(TestCase):
+    def setUp(self):
+        self.unit = ThalassemiaUnit.objects.create(name="Unit A")
+        self.user = User.objects.create_user(username="testuser", password="pass123", thalassemia_unit=self.unit)
+        self.user.user_permissions.add(Permission.objects.get(codename="view_client"))
+        for index in range(5):
+            client = Client.objects.create(
+                registration_number=f"T-{700 + index}",
+                full_name=f"Patient {index}",
+                nic_number=f"90000000{index}V",
+            )
+            ClientCareUnit.objects.create(client=client, unit=self.unit, role=ClientCareUnit.Role.PRIMARY)
+        self.client.login(username="testuser", password="pass123")
+
+    def test_next_page_continues_after_cursor(self):
+        with patch.object(ClientListView, "page_size", 2):
+            first = self.client.get(reverse("clients:client-list"))
+            self.assertEqual([c.full_name for c in first.context["clients"]], ["Patient 0", "Patient 1"])
+            self.assertTrue(first.context["has_next"])
+            second = self.client.get(f"{reverse('clients:client-list-rows')}?{first.context['next_page_query']}")
+        self.assertEqual([c.full_name for c in second.context["clients"]], ["Patient 2", "Patient 3"])
+        self.assertTemplateUsed(second, "clients/client_list_rows.html")
+
+    def test_page_query_count_is_independent_of_position(self):
+        with patch.object(ClientListView, "page_size", 2):
+            first = self.client.get(reverse("clients:client-list"))
+            url = f"{reverse('clients:client-list-rows')}?{first.context['next_page_query']}"
+            with CaptureQueriesContext(connection) as later_page:
+                self.client.get(url)
+        # The ETag validator is a cache token, so the page is the only query on clients.
+        client_queries = [q["sql"] for q in later_page.captured_queries if '"clients_client"' in q["sql"]]
+        self.assertEqual(len(client_queries), 1)
+        self.assertIn("LIMIT 3", client_queries[0])
+
+    def test_filters_by_nic_and_name_prefix(self):
+        response = self.client.get(reverse("clients:client-list"), {"nic": "900000003v"})
+        self.assertEqual([c.full_name for c in response.context["clients"]], ["Patient 3"])
+        response = self.client.get(reverse("clients:client-list"), {"registration_number": "T-70", "name": "patient 4"})
+        self.assertEqual([c.full_name for c in response.context["clients"]], ["Patient 4"])
+
+    def test_invalid_cursor_is_rejected(self):
+        response = self.client.get(reverse("clients:client-list"), {"after": "not-a-cursor"})
+        self.assertEqual(response.status_code, 400)
+
+    def test_malformed_cursor_values_are_rejected(self):
+        for values in (["x", "abc"], [None, 1], [{}, 1], ["x", [1]]):
+            with self.subTest(values=values):
+                cursor = base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+                for view in ("clients:client-list", "clients:client-list-rows"):
+                    self.assertEqual(self.client.get(reverse(view), {"after": cursor}).status_code, 400)
+
+
+class UnitScopingQueryTest(TestCase):
+    """Every scoped view filters with a correlated EXISTS and a fixed number of queries."""
+
+    SCOPED_VIEWS = [
+        ("clients:client-list", "client"),
+        ("clients:client-detail", "client"),
+        ("clients:client-update", "client"),
+        ("clients:client-admission-list", "client"),
+        ("clients:client-admission-create", "client"),
+        ("clients:client-admission-update", "admission"),
+        ("clients:client-transfusion-list", "client"),
+        ("clients:client-investigation-list", "client"),
+    ]
+
+    def setUp(self):
+        cache.clear()
+        self.unit = ThalassemiaUnit.objects.create(name="Unit A")
+        self.user = User.objects.create_user(username="testuser", password="pass123", thalassemia_unit=self.unit)
+        self.user.user_permissions.add(
+            *Permission.objects.filter(
+                codename__in=[
+                    "view_client",
+                    "change_client",
+                    "view_admission",
+                    "add_admission",
+                    "change_admission",
+                    "view_transfusion",
+                    "view_investigation",
+                ]
+            )
+        )
+        self.client_obj = Client.objects.create(registration_number="T-800", full_name="Nimali")
+        ClientCareUnit.objects.create(client=self.client_obj, unit=self.unit, role=ClientCareUnit.Role.PRIMARY)
+        self.admission = Admission.objects.create(client=self.client_obj, date_of_admission="2025-01-01")
+        Transfusion.objects.create(admission=self.admission, date_of_transfusion="2025-01-01")
+        self.client.login(username="testuser", password="pass123")
+
+    def _url(self, url_name, target):
+        if url_name == "clients:client-list":
+            return reverse(url_name)
+        obj = self.admission if target == "admission" else self.client_obj
+        return reverse(url_name, args=[obj.pk])
+
+    def test_scoped_views_use_exists_without_distinct(self):
+        for url_name, target in self.SCOPED_VIEWS:
+            with self.subTest(view=url_name):
+                with CaptureQueriesContext(connection) as queries:
+                    response = self.client.get(self._url(url_name, target))
+                self.assertEqual(response.status_code, 200)
+                sql = [query["sql"] for query in queries.captured_queries]
+                self.assertFalse([q for q in sql if "DISTINCT" in q])
+                self.assertTrue([q for q in sql if "EXISTS" in q and "clients_clientcareunit" in q])
+
+    def test_scoped_view_query_counts(self):
+        expected = {
+            "clients:client-list": 4,
+            "clients:client-detail": 4,
+            "clients:client-update": 4,
+            "clients:client-admission-list": 3,
+            "clients:client-admission-create": 4,
+            "clients:client-admission-update": 4,
+            "clients:client-transfusion-list": 4,
+            "clients:client-investigation-list": 4,
+        }
+        for url_name, target in self.SCOPED_VIEWS:
+            with self.subTest(view=url_name):
+                url = self._url(url_name, target)
+                self.client.get(url)
+                with self.assertNumQueries(expected[url_name]):
+                    self.client.get(url)
+
+    def test_scoped_querysets_explain_without_distinct_step(self):
+        request = RequestFactory().get("/")
+        request.user = self.user
+        view = UnitScopedMixin()
+        view.request = request
+        querysets = [
+            view.scope_client_queryset(Client.objects.order_by("full_name", "id")),
+            view.scope_queryset(Admission.objects.filter(client=self.client_obj), "client"),
+            view.scope_queryset(Transfusion.objects.all(), "client"),
+            view.scope_queryset(Investigation.objects.all(), "client"),
+        ]
+        for queryset in querysets:
+            with self.subTest(model=queryset.model.__name__):
+                plan = queryset.explain()
+                self.assertNotIn("DISTINCT", plan.upper())
+                self.assertEqual(queryset.count(), len(set(queryset.values_list("pk", flat=True))))
+
+
+class ClientAdminChangelistTest(TestCase):
+    def setUp(self):
+        self.superuser = User.objects.create_superuser(username="admin", password="pass123")
+        unit = ThalassemiaUnit.objects.create(name="Unit A")
+        for index in range(3):
+            client = Client.objects.create(registration_number=f"T-90{index}", full_name=f"Patient {index}")
+            ClientCareUnit.objects.create(client=client, unit=unit, role=ClientCareUnit.Role.PRIMARY)
+        self.client.login(username="admin", password="pass123")
+        self.url = reverse("admin:clients_client_changelist")
+
+    def test_changelist_query_count_does_not_grow_with_rows(self):
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as three_rows:
+            response = self.client.get(self.url)
+        self.assertContains(response, "Unit A", count=3)
+        unit = ThalassemiaUnit.objects.get(name="Unit A")
+        for index in range(3, 6):
+            client = Client.objects.create(registration_number=f"T-90{index}", full_name=f"Patient {index}")
+            ClientCareUnit.objects.create(client=client, unit=unit, role=ClientCareUnit.Role.PRIMARY)
+        with CaptureQueriesContext(connection) as six_rows:
+            self.client.get(self.url)
+        self.assertEqual(len(three_rows.captured_queries), len(six_rows.captured_queries))
+
+
+class AdminLargeTableTest(TestCase):
+    def setUp(self):
+        self.superuser = User.objects.create_superuser(username="admin", password="pass123")
+        self.client.login(username="admin", password="pass123")
+        self.ferritin = InvestigationType.objects.create(name="Serum Ferritin")
+        self.patients = [
+            Client.objects.create(
+                registration_number=f"T-95{index}",
+                full_name=f"Patient {index}",
+                diagnosis=DiagnosisType.objects.get_or_create(name="Beta Thalassaemia Major")[0],
+            )
+            for index in range(4)
+        ]
+
+    def add_history(self, patients):
+        for patient in patients:
+            admission = Admission.objects.create(client=patient, date_of_admission=date(2024, 1, 1))
+            Transfusion.objects.create(admission=admission, date_of_transfusion=date(2024, 1, 1))
+            Investigation.objects.create(
+                client=patient, investigation_type=self.ferritin, date_done=date(2024, 1, 1), value="1200"
+            )
+
+    def test_history_changelists_query_count_does_not_grow_with_rows(self):
+        self.add_history(self.patients[:2])
+        urls = [
+            reverse("admin:clients_transfusion_changelist"),
+            reverse("admin:clients_investigation_changelist"),
+            reverse("admin:clients_admission_changelist"),
+        ]
+        counts = {}
+        for url in urls:
+            self.client.get(url)
+            with CaptureQueriesContext(connection) as captured:
+                self.assertContains(self.client.get(url), "Patient 1")
+            counts[url] = len(captured.captured_queries)
+        self.add_history(self.patients[2:])
+        for url in urls:
+            with CaptureQueriesContext(connection) as captured:
+                self.assertContains(self.client.get(url), "Patient 3")
+            self.assertEqual(len(captured.captured_queries), counts[url], url)
+
+    def test_date_filters_do_not_scan_for_distinct_dates(self):
+        self.add_history(self.patients[:1])
+        ClientClinicalSummary.refresh()
+        urls = [reverse("admin:clients_client_changelist"), reverse("admin:clients_clientclinicalsummary_changelist")]
+        for url in urls:
+            with self.subTest(url=url):
+                with CaptureQueriesContext(connection) as captured:
+                    response = self.client.get(url)
+                self.assertContains(response, "Past 7 days")
+                self.assertFalse([q["sql"] for q in captured.captured_queries if "DISTINCT" in q["sql"]])
+
+    def test_search_on_lookup_names(self):
+        self.add_history(self.patients[:1])
+        response = self.client.get(reverse("admin:clients_investigation_changelist"), {"q": "ferritin"})
+        self.assertContains(response, "Patient 0")
+
+    def test_estimated_count_used_only_for_unfiltered_querysets(self):
+        with connection.cursor() as cursor:
+            cursor.execute("ANALYZE")
+        self.assertEqual(estimated_row_count(Client), 4)
+        Client.objects.create(registration_number="T-960", full_name="Not yet analyzed")
+
+        paginator = EstimatedCountPaginator(Client.objects.order_by("pk"), 10)
+        paginator.estimate_threshold = 1
+        self.assertEqual(paginator.count, 4)
+        filtered = EstimatedCountPaginator(Client.objects.filter(full_name__startswith="Patient").order_by("pk"), 10)
+        filtered.estimate_threshold = 1
+        self.assertEqual(filtered.count, 4)
+        self.assertEqual(EstimatedCountPaginator(Client.objects.order_by("pk"), 10).count, 5)
+
+    def test_client_change_page_builds_only_the_selected_tab(self):
+        patient = self.patients[0]
+        Investigation.objects.create(
+            client=patient, investigation_type=self.ferritin, date_done=date(2024, 1, 1), value="1200"
+        )
+        url = reverse("admin:clients_client_change", args=[patient.pk])
+
+        response = self.client.get(url)
+        self.assertContains(response, 'name="care_links-TOTAL_FORMS"')
+        self.assertNotContains(response, 'name="client_investigations-TOTAL_FORMS"')
+        self.assertContains(response, "?tab=investigations")
+
+        response = self.client.get(url, {"tab": "investigations"})
+        self.assertContains(response, 'name="client_investigations-TOTAL_FORMS"')
+        self.assertNotContains(response, 'name="care_links-TOTAL_FORMS"')
+
+        self.assertContains(self.client.get(reverse("admin:clients_client_add")), 'name="care_links-TOTAL_FORMS"')
+
+    def test_client_history_tab_query_count_does_not_grow_with_rows(self):
+        patient = self.patients[0]
+        url = reverse("admin:clients_client_change", args=[patient.pk])
+        self.add_history([patient])
+        self.client.get(url, {"tab": "investigations"})
+        with CaptureQueriesContext(connection) as one_row:
+            self.client.get(url, {"tab": "investigations"})
+        self.add_history([patient, patient])
+        with CaptureQueriesContext(connection) as three_rows:
+            self.client.get(url, {"tab": "investigations"})
+        self.assertEqual(len(one_row.captured_queries), len(three_rows.captured_queries))
+
+
+class ClientDetailQueryBudgetTest(TestCase):
+    QUERY_BUDGET = 4
+    TAB_QUERY_BUDGETS = {
+        "clients:client-admission-list": ("admissions", 4, 3),
+        "clients:client-transfusion-list": ("transfusions", 5, 4),
+        "clients:client-investigation-list": ("investigations", 5, 4),
+    }
+
+    def setUp(self):
+        cache.clear()
+        self.unit = ThalassemiaUnit.objects.create(name="Unit A")
+        self.user = User.objects.create_user(username="testuser", password="pass123", thalassemia_unit=self.unit)
+        self.user.user_permissions.add(
+            *Permission.objects.filter(
+                codename__in=["view_client", "view_admission", "view_transfusion", "view_investigation"]
+            )
+        )
+        self.client_obj = Client.objects.create(
+            registration_number="T-850",
+            full_name="Kasun",
+            date_of_birth="2010-05-05",
+            diagnosis=DiagnosisType.objects.create(name="Beta Thalassaemia Major"),
+            marital_status=Choice.objects.create(category="marital_status", name="Single"),
+        )
+        ClientCareUnit.objects.create(client=self.client_obj, unit=self.unit, role=ClientCareUnit.Role.PRIMARY)
+        self.ferritin = InvestigationType.objects.create(name="Ferritin", unit="ng/mL")
+        self.add_history(months=3)
+        self.client.login(username="testuser", password="pass123")
+        self.url = reverse("clients:client-detail", args=[self.client_obj.pk])
+
+    def add_history(self, months, start=0):
+        for month in range(start, start + months):
+            admitted = date(2020, 1, 1) + timedelta(days=30 * month)
+            admission = Admission.objects.create(client=self.client_obj, date_of_admission=admitted)
+            Transfusion.objects.create(admission=admission, date_of_transfusion=admitted)
+            Investigation.objects.create(
+                client=self.client_obj, investigation_type=self.ferritin, date_done=admitted, value="2500"
+            )
+
+    def test_detail_page_renders_only_the_header_and_detail_tab(self):
+        self.client.get(self.url)
+        bump_client_versions([self.client_obj.pk])
+        with self.assertNumQueries(self.QUERY_BUDGET):
+            response = self.client.get(self.url)
+        self.assertContains(response, "Beta Thalassaemia Major")
+        self.assertNotContains(response, "ng/mL")
+        for url_name in self.TAB_QUERY_BUDGETS:
+            tab_url = reverse(url_name, args=[self.client_obj.pk])
+            self.assertContains(response, f'hx-get="{tab_url}"')
+
+    def test_tab_query_budgets_do_not_grow_with_history(self):
+        self.add_history(months=40, start=3)
+        self.client.get(self.url)
+        for url_name, (context_name, budget, cached_budget) in self.TAB_QUERY_BUDGETS.items():
+            with self.subTest(tab=url_name):
+                url = reverse(url_name, args=[self.client_obj.pk])
+                bump_client_versions([self.client_obj.pk])
+                with self.assertNumQueries(budget):
+                    response = self.client.get(url)
+                self.assertEqual(len(response.context[context_name]), 4)
+                with self.assertNumQueries(cached_budget):
+                    self.client.get(url)
+        response = self.client.get(reverse("clients:client-admission-list", args=[self.client_obj.pk]))
+        latest_admission = date(2020, 1, 1) + timedelta(days=30 * 42)
+        self.assertEqual(response.context["admissions"][0].date_of_admission, latest_admission)
+        self.assertContains(
+            self.client.get(reverse("clients:client-investigation-list", args=[self.client_obj.pk])), "ng/mL"
+        )
+
+
+class InvestigationResultTest(TestCase):
+    def setUp(self):
+        self.client_obj = Client.objects.create(registration_number="T-870", full_name="Dilani")
+        self.ferritin = InvestigationType.objects.create(name="Ferritin", unit="ng/mL", reference_high=Decimal("300"))
+
+    def test_parse_result_value(self):
+        self.assertEqual(parse_result_value("2,500"), (Decimal("2500.000"), None))
+        self.assertEqual(parse_result_value(" 9.8 g/dL"), (Decimal("9.800"), None))
+        self.assertEqual(parse_result_value("<0.5"), (Decimal("0.500"), "<0.5"))
+        self.assertEqual(parse_result_value("Positive"), (None, "Positive"))
+        self.assertEqual(parse_result_value(""), (None, None))
+
+    def test_save_populates_numeric_and_qualitative_columns(self):
+        numeric = Investigation.objects.create(
+            client=self.client_obj, investigation_type=self.ferritin, date_done="2025-01-01", value="3,100"
+        )
+        qualitative = Investigation.objects.create(client=self.client_obj, date_done="2025-01-01", value="Reactive")
+        self.assertEqual(numeric.numeric_value, Decimal("3100"))
+        self.assertTrue(numeric.is_out_of_range)
+        self.assertIsNone(qualitative.numeric_value)
+        self.assertEqual(qualitative.qualitative_value, "Reactive")
+
+    def test_clearing_the_value_clears_the_parsed_columns(self):
+        result = Investigation.objects.create(
+            client=self.client_obj, investigation_type=self.ferritin, date_done="2025-01-01", value="3,100"
+        )
+        result.value = ""
+        result.save()
+        result.refresh_from_db()
+        self.assertEqual((result.value, result.numeric_value, result.qualitative_value), ("", None, None))
+
+    def test_range_filter_runs_in_database(self):
+        for days_ago, value in [(10, "2600"), (20, "1800"), (400, "4000")]:
+            Investigation.objects.create(
+                client=self.client_obj,
+                investigation_type=self.ferritin,
+                date_done=date.today() - timedelta(days=days_ago),
+                value=value,
+            )
+        high = Investigation.objects.filter(
+            investigation_type=self.ferritin,
+            numeric_value__gt=2500,
+            date_done__gte=date.today() - timedelta(days=183),
+        )
+        self.assertEqual(list(high.values_list("value", flat=True)), ["2600"])
+        self.assertEqual(Investigation.objects.out_of_reference_range().count(), 3)
+
+
+class InvestigationTrendTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.unit = ThalassemiaUnit.objects.create(name="Unit A")
+        self.user = User.objects.create_user(username="testuser", password="pass123", thalassemia_unit=self.unit)
+        self.user.user_permissions.add(Permission.objects.get(codename="view_investigation"))
+        self.client_obj = Client.objects.create(registration_number="T-880", full_name="Ruwan")
+        ClientCareUnit.objects.create(client=self.client_obj, unit=self.unit, role=ClientCareUnit.Role.PRIMARY)
+        self.ferritin = InvestigationType.objects.create(name="Ferritin", unit="ng/mL")
+        Investigation.objects.bulk_create(
+            Investigation(
+                client=self.client_obj,
+                investigation_type=self.ferritin,
+                date_done=date(2010, 1, 1) + timedelta(days=7 * week),
+                value=str(1000 + week),
+                numeric_value=Decimal(1000 + week),
+            )
+            for week in range(700)
+        )
+        self.url = reverse("clients:client-investigation-trend", args=[self.client_obj.pk, self.ferritin.pk])
+        self.client.login(username="testuser", password="pass123")
+
+    def test_long_history_is_downsampled(self):
+        payload = self.client.get(self.url, {"points": 100}).json()
+        self.assertEqual(payload["total_results"], 700)
+        self.assertEqual(len(payload["points"]), 100)
+        self.assertEqual(payload["points"][0], {"date": "2010-01-01", "value": 1000.0})
+        self.assertEqual(payload["points"][-1]["value"], 1699.0)
+
+    def test_monthly_buckets_are_aggregated_in_database(self):
+        payload = self.client.get(self.url, {"bucket": "month"}).json()
+        self.assertEqual(payload["downsampling"], "month")
+        self.assertEqual(sum(point["count"] for point in payload["points"]), 700)
+        self.assertLess(len(payload["points"]), 170)
+
+    def test_response_is_cached_until_a_new_result_arrives(self):
+        self.client.get(self.url)
+        with CaptureQueriesContext(connection) as cached:
+            self.client.get(self.url)
+        self.assertFalse([q for q in cached.captured_queries if "numeric_value" in q["sql"]])
+        Investigation.objects.create(
+            client=self.client_obj, investigation_type=self.ferritin, date_done="2024-01-01", value="5000"
+        )
+        payload = self.client.get(self.url).json()
+        self.assertEqual(payload["points"][-1], {"date": "2024-01-01", "value": 5000.0})
+
+    def test_edited_result_invalidates_the_cached_response(self):
+        self.client.get(self.url)
+        result = Investigation.objects.filter(client=self.client_obj).latest("date_done")
+        result.value = "4200"
+        result.save()
+        payload = self.client.get(self.url).json()
+        self.assertEqual(payload["points"][-1]["value"], 4200.0)
+
+    def test_edited_reference_range_invalidates_the_cached_response(self):
+        self.client.get(self.url)
+        self.ferritin.reference_high = Decimal("1000")
+        self.ferritin.save()
+        self.assertEqual(self.client.get(self.url).json()["reference_high"], 1000.0)
+
+    def test_other_unit_client_is_not_found(self):
+        other = Client.objects.create(registration_number="T-881", full_name="Other")
+        url = reverse("clients:client-investigation-trend", args=[other.pk, self.ferritin.pk])
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+
+class TransfusionWorkloadReportTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.unit_a = ThalassemiaUnit.objects.create(name="Unit A")
+        self.unit_b = ThalassemiaUnit.objects.create(name="Unit B")
+        washed = Choice.objects.create(category="special_blood_type", name="Washed Blood")
+        irradiated = Choice.objects.create(category="special_blood_type", name="Irradiated Blood")
+        for unit, special_types in [(self.unit_a, [washed, irradiated, None]), (self.unit_b, [None])]:
+            client = Client.objects.create(registration_number=f"T-{unit.pk}", full_name=unit.name)
+            ClientCareUnit.objects.create(client=client, unit=unit, role=ClientCareUnit.Role.PRIMARY)
+            shared_unit = self.unit_b if unit == self.unit_a else self.unit_a
+            ClientCareUnit.objects.create(client=client, unit=shared_unit, role=ClientCareUnit.Role.SHARED)
+            for index, special_type in enumerate(special_types):
+                admission = Admission.objects.create(client=client, date_of_admission=date(2025, 3, 1 + index))
+                Transfusion.objects.create(
+                    admission=admission,
+                    date_of_transfusion=date(2025, 3, 1 + index),
+                    pre_HB_level=Decimal("8.0") + index,
+                    amount_of_blood=Decimal("250"),
+                    special_type=special_type,
+                )
+
+    def test_workload_is_aggregated_per_unit_and_month(self):
+        with self.assertNumQueries(1):
+            report = transfusion_workload()
+        rows = {row["unit_name"]: row for row in report}
+        self.assertEqual(rows["Unit A"]["transfusions"], 3)
+        self.assertEqual(rows["Unit A"]["blood_volume"], Decimal("750"))
+        self.assertEqual(rows["Unit A"]["mean_pre_hb"], Decimal("9.0"))
+        self.assertAlmostEqual(rows["Unit A"]["washed_share"], 1 / 3)
+        self.assertAlmostEqual(rows["Unit A"]["irradiated_share"], 1 / 3)
+        self.assertEqual(rows["Unit B"]["transfusions"], 1)
+        self.assertEqual(rows["Unit A"]["month"], date(2025, 3, 1))
+
+    def test_cached_report_is_invalidated_by_new_transfusion(self):
+        self.assertEqual(cached_transfusion_workload([self.unit_b.pk])[0]["transfusions"], 1)
+        with self.assertNumQueries(0):
+            cached_transfusion_workload([self.unit_b.pk])
+        admission = Admission.objects.filter(client__full_name="Unit B").first()
+        Transfusion.objects.create(admission=admission, date_of_transfusion=date(2025, 3, 9))
+        self.assertEqual(cached_transfusion_workload([self.unit_b.pk])[0]["transfusions"], 2)
+
+    def test_planning_screen_is_scoped_to_user_unit(self):
+        user = User.objects.create_user(username="testuser", password="pass123", thalassemia_unit=self.unit_b)
+        user.user_permissions.add(Permission.objects.get(codename="view_transfusion"))
+        self.client.login(username="testuser", password="pass123")
+        response = self.client.get(reverse("clients:transfusion-workload"), {"months": 120})
+        self.assertEqual([row["unit_name"] for row in response.context["rows"]], ["Unit B"])
+
+
+class ClientClinicalSummaryTest(TestCase):
+    def setUp(self):
+        self.client_obj = Client.objects.create(registration_number="T-890", full_name="Chamari")
+        self.ferritin = InvestigationType.objects.create(name="Serum Ferritin")
+
+    def add_transfusion(self, day, pre_hb, next_due):
+        admission = Admission.objects.create(client=self.client_obj, date_of_admission=day)
+        return Transfusion.objects.create(
+            admission=admission, date_of_transfusion=day, pre_HB_level=pre_hb, next_date_given=next_due
+        )
+
+    def test_summary_follows_saves_and_deletes(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_transfusion(date(2025, 1, 1), Decimal("8.5"), date(2025, 1, 29))
+            latest = self.add_transfusion(date(2025, 2, 1), Decimal("7.9"), date(2025, 3, 1))
+            Investigation.objects.create(
+                client=self.client_obj, investigation_type=self.ferritin, date_done="2025-02-01", value="2800"
+            )
+        summary = ClientClinicalSummary.objects.get(client=self.client_obj)
+        self.assertEqual(summary.last_transfusion_date, date(2025, 2, 1))
+        self.assertEqual(summary.last_pre_HB_level, Decimal("7.9"))
+        self.assertEqual(summary.next_transfusion_due, date(2025, 3, 1))
+        self.assertEqual(summary.transfusion_count, 2)
+        self.assertEqual(summary.last_ferritin, Decimal("2800"))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            latest.admission.delete()
+        summary.refresh_from_db()
+        self.assertEqual(summary.last_transfusion_date, date(2025, 1, 1))
+        self.assertEqual(summary.transfusion_count, 1)
+
+    def test_moved_record_refreshes_the_previous_client(self):
+        other = Client.objects.create(registration_number="T-891", full_name="Ishara")
+        with self.captureOnCommitCallbacks(execute=True):
+            result = Investigation.objects.create(
+                client=self.client_obj, investigation_type=self.ferritin, date_done="2025-02-01", value="2800"
+            )
+        with self.captureOnCommitCallbacks(execute=True):
+            result.client = other
+            result.save()
+        summaries = dict(ClientClinicalSummary.objects.values_list("client_id", "last_ferritin"))
+        self.assertEqual(summaries, {self.client_obj.pk: None, other.pk: Decimal("2800")})
+
+    def test_client_delete_removes_summary(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            self.add_transfusion(date(2025, 1, 1), Decimal("8.5"), None)
+        with self.captureOnCommitCallbacks(execute=True):
+            self.client_obj.delete()
+        self.assertFalse(ClientClinicalSummary.objects.exists())
+
+    def test_rebuild_command_and_drift_check(self):
+        self.add_transfusion(date(2025, 1, 1), Decimal("8.5"), date(2025, 1, 29))
+        with self.assertRaises(CommandError):
+            call_command("rebuild_clinical_summaries", "--check", stdout=StringIO())
+        call_command("rebuild_clinical_summaries", stdout=StringIO())
+        call_command("rebuild_clinical_summaries", "--check", stdout=StringIO())
+        ClientClinicalSummary.objects.update(transfusion_count=9)
+        with self.assertRaisesMessage(CommandError, "1 drifted"):
+            call_command("rebuild_clinical_summaries", "--check", stdout=StringIO())
+
+    def test_registry_filters_overdue_clients(self):
+        unit = ThalassemiaUnit.objects.create(name="Unit A")
+        ClientCareUnit.objects.create(client=self.client_obj, unit=unit, role=ClientCareUnit.Role.PRIMARY)
+        on_time = Client.objects.create(registration_number="T-891", full_name="Anura")
+        ClientCareUnit.objects.create(client=on_time, unit=unit, role=ClientCareUnit.Role.PRIMARY)
+        ClientClinicalSummary.objects.create(client=self.client_obj, next_transfusion_due=date(2020, 1, 1))
+        ClientClinicalSummary.objects.create(client=on_time, next_transfusion_due=date.today() + timedelta(days=3))
+        User.objects.create_superuser(username="admin", password="pass123")
+        self.client.login(username="admin", password="pass123")
+        response = self.client.get(reverse("clients:client-list"), {"overdue": "1"})
+        self.assertEqual([c.full_name for c in response.context["clients"]], ["Chamari"])
+
+
+class TransfusionScheduleTest(TestCase):
+    def setUp(self):
+        self.today = date.today()
+        self.unit = ThalassemiaUnit.objects.create(name="Unit A")
+        other_unit = ThalassemiaUnit.objects.create(name="Unit B")
+        self.user = User.objects.create_user(username="testuser", password="pass123", thalassemia_unit=self.unit)
+        self.user.user_permissions.add(Permission.objects.get(codename="view_transfusion"))
+        schedule = [(self.unit, -2), (self.unit, 0), (self.unit, 3), (self.unit, 30), (other_unit, 1)]
+        for index, (unit, due_in) in enumerate(schedule):
+            client = Client.objects.create(registration_number=f"T-95{index}", full_name=f"Patient {index}")
+            ClientCareUnit.objects.create(client=client, unit=unit, role=ClientCareUnit.Role.PRIMARY)
+            ClientClinicalSummary.objects.create(
+                client=client, next_transfusion_due=self.today + timedelta(days=due_in)
+            )
+        self.client.login(username="testuser", password="pass123")
+
+    def test_queue_is_one_query_per_unit(self):
+        with self.assertNumQueries(1):
+            queue = transfusion_queue(self.unit.pk, self.today, 7)
+        self.assertEqual([entry["client"].full_name for entry in queue], ["Patient 0", "Patient 1", "Patient 2"])
+        self.assertEqual(queue[0]["overdue_days"], 2)
+
+    def test_daily_load_folds_overdue_into_today(self):
+        with self.assertNumQueries(1):
+            load = daily_transfusion_load(self.unit.pk, self.today, 7, capacity=1)
+        self.assertEqual([bucket["due"] for bucket in load], [2, 0, 0, 1, 0, 0, 0])
+        self.assertTrue(load[0]["over_capacity"])
+
+    def test_clinic_visit_queue_uses_latest_visit_only(self):
+        client = Client.objects.get(full_name="Patient 0")
+        ClinicVisit.objects.create(
+            client=client, date_visit=self.today - timedelta(days=60), next_visit_date=self.today - timedelta(days=30)
+        )
+        ClinicVisit.objects.create(
+            client=client, date_visit=self.today - timedelta(days=20), next_visit_date=self.today + timedelta(days=2)
+        )
+        queue = clinic_visit_queue(self.unit.pk, self.today, 7)
+        self.assertEqual([entry["due"] for entry in queue], [self.today + timedelta(days=2)])
+
+    def test_clinic_visit_queue_lists_a_client_once_for_same_day_visits(self):
+        client = Client.objects.get(full_name="Patient 0")
+        for days in (1, 3):
+            ClinicVisit.objects.create(
+                client=client,
+                date_visit=self.today - timedelta(days=20),
+                next_visit_date=self.today + timedelta(days=days),
+            )
+        queue = clinic_visit_queue(self.unit.pk, self.today, 7)
+        self.assertEqual([entry["due"] for entry in queue], [self.today + timedelta(days=3)])
+
+    def test_feeds(self):
+        csv_response = self.client.get(reverse("clients:transfusion-schedule-feed", args=["csv"]), {"days": 7})
+        rows = csv_response.content.decode().splitlines()
+        self.assertEqual(len(rows), 4)
+        self.assertNotIn("Patient 4", csv_response.content.decode())
+        ics_response = self.client.get(reverse("clients:transfusion-schedule-feed", args=["ics"]))
+        self.assertEqual(ics_response["Content-Type"], "text/calendar; charset=utf-8")
+        self.assertEqual(ics_response.content.decode().count("BEGIN:VEVENT"), 3)
+        self.assertEqual(self.client.get(reverse("clients:transfusion-schedule-feed", args=["pdf"])).status_code, 404)
+
+    def test_schedule_page_renders(self):
+        response = self.client.get(reverse("clients:transfusion-schedule"))
+        self.assertContains(response, "Patient 2")
+        self.assertNotContains(response, "Patient 3")
+
+
+class RegistryExportTest(TestCase):
+    def setUp(self):
+        self.unit = ThalassemiaUnit.objects.create(name="Unit A")
+        other_unit = ThalassemiaUnit.objects.create(name="Unit B")
+        self.user = User.objects.create_user(username="testuser", password="pass123", thalassemia_unit=self.unit)
+        self.user.user_permissions.add(
+            *Permission.objects.filter(codename__in=["view_client", "view_admission", "view_transfusion"])
+        )
+        for index, unit in enumerate([self.unit, self.unit, other_unit]):
+            client = Client.objects.create(registration_number=f"T-96{index}", full_name=f"Patient {index}")
+            ClientCareUnit.objects.create(client=client, unit=unit, role=ClientCareUnit.Role.PRIMARY)
+            admission = Admission.objects.create(client=client, date_of_admission="2025-01-01")
+            Transfusion.objects.create(admission=admission, date_of_transfusion="2025-01-01", amount_of_blood=250)
+        self.client.login(username="testuser", password="pass123")
+
+    def test_client_export_streams_scoped_rows(self):
+        response = self.client.get(reverse("clients:registry-export", args=["clients"]))
+        self.assertTrue(response.streaming)
+        rows = list(csv.reader(b"".join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(rows[0][0], "registration_number")
+        self.assertEqual([row[0] for row in rows[1:]], ["T-960", "T-961"])
+        self.assertEqual(rows[1][-1], "Unit A")
+
+    async def test_export_streams_asynchronously_under_asgi(self):
+        await self.async_client.aforce_login(self.user)
+        for kind in ("clients", "transfusions"):
+            with self.subTest(kind=kind):
+                response = await self.async_client.get(reverse("clients:registry-export", args=[kind]))
+                self.assertTrue(response.is_async)
+                content = b"".join([chunk async for chunk in response.streaming_content])
+                rows = list(csv.reader(content.decode().splitlines()))
+                self.assertEqual(rows[0][0], "registration_number")
+                self.assertEqual([row[0] for row in rows[1:]], ["T-960", "T-961"])
+
+    def test_exports_must_implement_get_queryset(self):
+        with self.assertRaisesMessage(TypeError, "abstract method 'get_queryset'"):
+            RegistryExport()
+
+    def test_transfusion_export(self):
+        response = self.client.get(reverse("clients:registry-export", args=["transfusions"]))
+        rows = list(csv.reader(b"".join(response.streaming_content).decode().splitlines()))
+        self.assertEqual(len(rows), 3)
+        self.assertEqual(rows[1][:3], ["T-960", "2025-01-01", "2025-01-01"])
+
+    def test_export_requires_matching_permission(self):
+        response = self.client.get(reverse("clients:registry-export", args=["investigations"]))
+        self.assertEqual(response.status_code, 403)
+        response = self.client.get(reverse("clients:registry-export", args=["drugs"]))
+        self.assertEqual(response.status_code, 404)
+
+
+class RegistryImportTest(TestCase):
+    def setUp(self):
+        province = Province.objects.create(name="Western")
+        district = District.objects.create(name="Colombo", province=province)
+        DS_Division.objects.create(name="Kaduwela", district=district)
+        DiagnosisType.objects.create(name="Beta Thalassemia Major")
+        self.unit = ThalassemiaUnit.objects.create(name="Unit A")
+
+    def rows(self, text):
+        return read_csv(StringIO(text))
+
+    def test_client_import_reports_errors_per_row(self):
+        result = ClientImporter(unit=self.unit, batch_size=2).run(
+            self.rows(
+                "registration_number,full_name,gender,diagnosis,ds_division,date_of_birth\n"
+                "T-970,Nimal,M,beta thalassemia major,Kaduwela,2010-05-01\n"
+                "T-971,Kamal,X,,,\n"
+                "T-970,Duplicate,M,,,\n"
+                "T-972,Sunil,M,Unknown Diagnosis,,\n"
+                "T-973,Saman,M,,,not-a-date\n"
+            )
+        )
+        self.assertEqual(result.created, 1)
+        self.assertEqual([line for line, _ in result.errors], [3, 4, 5, 6])
+        self.assertIn("registration_number", result.errors[1][1])
+        client = Client.objects.get(registration_number="T-970")
+        self.assertEqual(client.diagnosis.name, "Beta Thalassemia Major")
+        self.assertEqual(client.date_of_birth, date(2010, 5, 1))
+        self.assertEqual(client.primary_care_unit, self.unit)
+
+    def test_integrity_error_rejects_its_batch_and_still_finishes(self):
+        importer = ClientImporter(unit=self.unit, batch_size=1)
+        prepare_batch = importer.prepare_batch
+
+        def prepare_with_concurrent_writer(rows):
+            prepare_batch(rows)
+            # Another user saves the same registration number after the batch was checked.
+            if rows[0]["registration_number"] == "T-976":
+                Client.objects.create(registration_number="T-976", full_name="Saved elsewhere")
+
+        importer.prepare_batch = prepare_with_concurrent_writer
+        with patch("clients.imports.bump_client_list_versions") as bump:
+            result = importer.run(
+                self.rows("registration_number,full_name,gender\nT-975,Nimal,M\nT-976,Kamal,M\nT-977,Sunil,M\n")
+            )
+        self.assertEqual(result.created, 2)
+        self.assertEqual([line for line, _ in result.errors], [3])
+        self.assertIn("Not saved", result.errors[0][1])
+        self.assertEqual(Client.objects.get(registration_number="T-976").full_name, "Saved elsewhere")
+        self.assertTrue(Client.objects.filter(registration_number="T-977").exists())
+        bump.assert_called_once_with([], {self.unit.pk})
+
+    def test_importers_must_implement_build_and_write(self):
+        with self.assertRaisesMessage(TypeError, "abstract methods 'build', 'write'"):
+            ClientHistoryImporter()
+        self.assertEqual(TransfusionImporter().touched_client_ids, set())
+
+    def test_transfusion_import_creates_admissions_and_refreshes_summaries(self):
+        client = Client.objects.create(registration_number="T-974", full_name="Nimal")
+        Admission.objects.create(client=client, date_of_admission="2025-01-01")
+        csv_text = "registration_number,date_of_transfusion,date_of_admission,pre_HB_level,amount_of_blood\n"
+        csv_text += "T-974,2025-01-01,,8.1,250\n"
+        csv_text += "T-974,2025-02-01,,7.9,250\n"
+        csv_text += "T-974,2025-02-02,2025-02-01,8.3,250\n"
+        csv_text += "T-999,2025-02-01,,8.0,250\n"
+        with self.assertNumQueries(13):
+            result = TransfusionImporter().run(self.rows(csv_text))
+        self.assertEqual(result.created, 3)
+        self.assertEqual(result.errors[0][0], 5)
+        self.assertEqual(client.client_admissions.count(), 2)
+        self.assertEqual(client.transfusions.count(), 3)
+        summary = ClientClinicalSummary.objects.get(client=client)
+        self.assertEqual(summary.transfusion_count, 3)
+        self.assertEqual(summary.last_transfusion_date, date(2025, 2, 2))
+
+    def test_dry_run_writes_nothing(self):
+        result = ClientImporter(unit=self.unit, dry_run=True).run(
+            self.rows("registration_number,full_name,gender\nT-975,Nimal,M\n")
+        )
+        self.assertEqual(result.created, 1)
+        self.assertFalse(Client.objects.filter(registration_number="T-975").exists())
+
+    def test_command_fails_when_rows_are_rejected(self):
+        with tempfile.NamedTemporaryFile("w", suffix=".csv", delete=False) as file:
+            file.write("registration_number,full_name,gender\nT-976,Nimal,M\nT-977,,M\n")
+        self.addCleanup(os.remove, file.name)
+        stdout, stderr = StringIO(), StringIO()
+        with self.assertRaises(CommandError):
+            call_command("import_registry", "clients", file.name, unit="unit a", stdout=stdout, stderr=stderr)
+        self.assertIn("line 3: full_name", stderr.getvalue())
+        self.assertTrue(Client.objects.filter(registration_number="T-976").exists())
+
+    def test_admin_upload(self):
+        admin_user = User.objects.create_superuser(username="admin", password="pass123")
+        self.client.force_login(admin_user)
+        upload = SimpleUploadedFile("clients.csv", b"registration_number,full_name,gender\nT-978,Nimal,M\n")
+        response = self.client.post(
+            reverse("admin:clients_client_import"), {"kind": "clients", "file": upload, "unit": self.unit.pk}
+        )
+        self.assertContains(response, "Imported 1 rows")
+        self.assertTrue(Client.objects.filter(registration_number="T-978").exists())
+
+
+class LookupCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        province = Province.objects.create(name="Western")
+        district = District.objects.create(name="Colombo", province=province)
+        self.ds_division = DS_Division.objects.create(name="Kaduwela", district=district)
+        self.unit = ThalassemiaUnit.objects.create(name="Unit A")
+        self.single = Choice.objects.create(category="marital_status", name="Single")
+        self.washed = Choice.objects.create(category="special_blood_type", name="Washed")
+
+    def test_warm_form_renders_without_lookup_queries(self):
+        str(ClientForm())
+        with self.assertNumQueries(0):
+            html = str(ClientForm())
+        self.assertIn("Kaduwela", html)
+        self.assertIn("Single", html)
+        self.assertNotIn("Washed", html)
+
+    def test_version_is_read_once_per_request(self):
+        user = User.objects.create_user(username="clerk", password="pass123", thalassemia_unit=self.unit)
+        user.user_permissions.add(Permission.objects.get(codename="add_client"))
+        self.client.force_login(user)
+        self.client.get(reverse("clients:client-add"))
+        with patch("clients.lookup_cache.cache.get", wraps=cache.get) as cache_get:
+            response = self.client.get(reverse("clients:client-add"))
+        self.assertContains(response, "Kaduwela")
+        self.assertEqual([call.args for call in cache_get.call_args_list].count((LOOKUP_VERSION_KEY,)), 1)
+
+    def test_saving_a_lookup_invalidates_the_cache(self):
+        lookup_rows(ThalassemiaUnit)
+        ThalassemiaUnit.objects.create(name="Unit B")
+        self.assertEqual([unit.name for unit in lookup_rows(ThalassemiaUnit)[0]], ["Unit A", "Unit B"])
+
+    def test_validation_respects_limit_choices_to(self):
+        data = {
+            "registration_number": "T-980",
+            "full_name": "Nimal",
+            "gender": "M",
+            "primary_unit": self.unit.pk,
+            "ds_division": self.ds_division.pk,
+        }
+        form = ClientForm(data={**data, "marital_status": self.washed.pk})
+        self.assertIn("marital_status", form.errors)
+        form = ClientForm(data={**data, "marital_status": self.single.pk})
+        # Only the model's own FK and uniqueness checks reach the database.
+        with self.assertNumQueries(3):
+            self.assertTrue(form.is_valid(), form.errors)
+        self.assertEqual(form.cleaned_data["marital_status"], self.single)
+
+    def test_admin_inlines_share_cached_lookups(self):
+        self.client.force_login(User.objects.create_superuser(username="admin", password="pass123"))
+        url = reverse("admin:clients_client_add")
+        self.client.get(url)
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        lookup_tables = ("clients_choice", "clients_ds_division", "clients_diagnosistype", "clients_thalassemiaunit")
+        self.assertFalse([q["sql"] for q in queries.captured_queries if any(t in q["sql"] for t in lookup_tables)])
+
+    def test_lookup_label_filter(self):
+        template = Template('{% load lookups %}{{ pk|lookup_label:"clients.ThalassemiaUnit" }}')
+        self.assertEqual(template.render(Context({"pk": self.unit.pk})), "Unit A")
+        self.assertEqual(template.render(Context({"pk": None})), "")
+
+
+class QueryBudgetMiddlewareTest(TestCase):
+    def setUp(self):
+        self.unit = ThalassemiaUnit.objects.create(name="Unit A")
+        self.user = User.objects.create_user(username="testuser", password="pass123", thalassemia_unit=self.unit)
+        self.user.user_permissions.add(Permission.objects.get(codename="view_client"))
+        self.client.login(username="testuser", password="pass123")
+
+    @override_settings(QUERY_BUDGET_SAMPLE_RATE=1.0)
+    def test_sampled_request_is_logged_with_view_name(self):
+        with self.assertLogs("thallk.query_budget", level="INFO") as logs:
+            self.client.get(reverse("clients:client-list"))
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record["view"], "clients:client-list")
+        self.assertEqual(record["status"], 200)
+        self.assertGreater(record["queries"], 0)
+        self.assertIsNotNone(record["render_ms"])
+
+    @override_settings(QUERY_BUDGET_SAMPLE_RATE=1.0)
+    async def test_async_view_is_logged_with_its_queries(self):
+        await self.async_client.aforce_login(self.user)
+        with self.assertLogs("thallk.query_budget", level="INFO") as logs:
+            response = await self.async_client.get(reverse("clients:client-list"))
+        self.assertEqual(response.status_code, 200)
+        record = json.loads(logs.records[0].getMessage())
+        self.assertEqual(record["status"], 200)
+        self.assertGreater(record["queries"], 0)
+        self.assertIsNotNone(record["render_ms"])
+
+    def test_disabled_without_sample_rate(self):
+        with self.assertNoLogs("thallk.query_budget"):
+            self.client.get(reverse("clients:client-list"))
+
+    def test_report_ranks_views(self):
+        records = [
+            {"view": "clients:client-list", "queries": 4, "db_ms": 1.0, "duration_ms": 5.0, "duplicates": []},
+            {
+                "view": "clients:client-detail",
+                "queries": 30,
+                "db_ms": 9.0,
+                "duration_ms": 20.0,
+                "render_ms": 3.0,
+                "duplicates": [{"fingerprint": "abc", "count": 12, "sql": "SELECT 1"}],
+            },
+        ]
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "query_budget.log")
+            with open(path, "w") as file:
+                file.write("\n".join(json.dumps(record) for record in records) + "\nnot json\n")
+            stdout = StringIO()
+            call_command("query_budget_report", log=path, stdout=stdout)
+        lines = stdout.getvalue().splitlines()
+        self.assertTrue(lines[1].startswith("clients:client-detail"))
+        self.assertTrue(lines[2].startswith("clients:client-list"))
+
+
+class BenchmarkSuiteTest(TestCase):
+    def test_cohort_is_reproducible_and_benchmarks_write_json(self):
+        call_command("generate_cohort", units=2, patients=4, years=1, end_date=date(2025, 6, 30), stdout=StringIO())
+        first = list(Transfusion.objects.order_by("pk").values_list("pre_HB_level", "amount_of_blood"))
+        self.assertEqual(len(first), 48)
+        self.assertEqual(ClientClinicalSummary.objects.filter(transfusion_count=12).count(), 4)
+
+        call_command(
+            "generate_cohort", units=2, patients=4, years=1, end_date=date(2025, 6, 30), flush=True, stdout=StringIO()
+        )
+        self.assertEqual(list(Transfusion.objects.order_by("pk").values_list("pre_HB_level", "amount_of_blood")), first)
+
+        with self.assertRaisesMessage(CommandError, "DEBUG = False"):
+            call_command("benchmark", runs=1, warmup=0, stdout=StringIO())
+        with transaction.atomic():
+            Group.objects.filter(name="unit_clinician").delete()
+            with self.settings(DEBUG=True), self.assertRaisesMessage(CommandError, "role group is missing"):
+                call_command("benchmark", runs=1, warmup=0, stdout=StringIO())
+            transaction.set_rollback(True)
+        with tempfile.TemporaryDirectory() as directory, self.settings(DEBUG=True):
+            path = os.path.join(directory, "bench.json")
+            call_command(
+                "benchmark",
+                runs=1,
+                warmup=0,
+                scenario=["view:client-detail", "query:transfusion-queue"],
+                output=path,
+                stdout=StringIO(),
+            )
+            with open(path) as file:
+                report = json.load(file)
+        self.assertEqual(report["cohort"]["transfusions"], 48)
+        self.assertEqual(set(report["scenarios"]), {"view:client-detail", "query:transfusion-queue"})
+        self.assertGreater(report["scenarios"]["view:client-detail"]["queries"], 0)
+        self.assertFalse(User.objects.filter(username__startswith="benchmark-").exists())
+
+
+class TransfusionClientTest(TestCase):
+    def setUp(self):
+        self.first = Client.objects.create(registration_number="T-985", full_name="Nimal")
+        self.second = Client.objects.create(registration_number="T-986", full_name="Kamal")
+        self.admission = Admission.objects.create(client=self.first, date_of_admission="2025-01-01")
+
+    def test_client_is_copied_from_admission(self):
+        transfusion = Transfusion.objects.create(admission=self.admission, date_of_transfusion="2025-01-01")
+        self.assertEqual(transfusion.client_id, self.first.pk)
+
+    def test_reassigning_the_admission_moves_its_transfusions(self):
+        transfusion = Transfusion.objects.create(admission=self.admission, date_of_transfusion="2025-01-01")
+        self.admission.client = self.second
+        self.admission.save()
+        transfusion.refresh_from_db()
+        self.assertEqual(transfusion.client_id, self.second.pk)
+
+    def test_reassigning_the_admission_refreshes_both_clients(self):
+        Transfusion.objects.create(admission=self.admission, date_of_transfusion=date(2025, 1, 1))
+        ClientClinicalSummary.refresh([self.first.pk, self.second.pk])
+        self.admission.client = self.second
+        with patch("clients.signals.bump_client_versions") as bump, self.captureOnCommitCallbacks(execute=True):
+            # update() moves the transfusions, so only the admission's own row sends post_save.
+            self.admission.save(update_fields=["client"])
+        summaries = dict(ClientClinicalSummary.objects.values_list("client_id", "last_transfusion_date"))
+        self.assertEqual(summaries, {self.first.pk: None, self.second.pk: date(2025, 1, 1)})
+        self.assertIn({self.first.pk, self.second.pk}, [set(call.args[0]) for call in bump.call_args_list])
+
+    def test_per_client_transfusion_queries_skip_admission(self):
+        unit = ThalassemiaUnit.objects.create(name="Unit A")
+        ClientCareUnit.objects.create(client=self.first, unit=unit, role=ClientCareUnit.Role.PRIMARY)
+        user = User.objects.create_user(username="testuser", password="pass123", thalassemia_unit=unit)
+        user.user_permissions.add(Permission.objects.get(codename="view_transfusion"))
+        self.client.force_login(user)
+        with CaptureQueriesContext(connection) as queries:
+            self.client.get(reverse("clients:client-transfusion-list", args=[self.first.pk]))
+        transfusion_sql = [q["sql"] for q in queries.captured_queries if 'FROM "clients_transfusion"' in q["sql"]]
+        self.assertEqual(len(transfusion_sql), 1)
+        self.assertIn('"clients_transfusion"."client_id" =', transfusion_sql[0])
+
+
+class ClientSearchTest(TestCase):
+    def setUp(self):
+        self.unit = ThalassemiaUnit.objects.create(name="Unit A")
+        self.other_unit = ThalassemiaUnit.objects.create(name="Unit B")
+        self.tharindu = self.make_client("T-700", "Tharindu Wickramasinghe", self.unit, contact_number="077 123 4567")
+        self.tamil = self.make_client("T-701", "Thamizh Selvan Jeyakumar", self.unit, nic_number="199012345678")
+        self.other = self.make_client("T-702", "Tharindu Perera", self.other_unit)
+
+    def make_client(self, registration_number, full_name, unit, **fields):
+        client = Client.objects.create(registration_number=registration_number, full_name=full_name, **fields)
+        ClientCareUnit.objects.create(client=client, unit=unit, role=ClientCareUnit.Role.PRIMARY)
+        return client
+
+    def search(self, query):
+        return set(search_clients(Client.objects.all(), query))
+
+    def test_romanization_variants_fold_together(self):
+        for left, right in [
+            ("Tharindu", "Tarindu"),
+            ("Wickramasinghe", "Vikramasinghe"),
+            ("Thamizh", "Tamil"),
+            ("Jeyakumar", "Jayakumar"),
+            ("Neelakanthan", "Nilakantan"),
+            ("Shivakumar", "Sivakumar"),
+            ("Dilāni", "Dhilani"),
+        ]:
+            self.assertEqual(fold_text(left), fold_text(right), (left, right))
+        self.assertEqual(fold_text("නිමල්"), "නිමල්")
+
+    def test_phone_numbers_normalize_to_national_form(self):
+        for value in ["0771234567", "+94 77 123 4567", "0094771234567", "77-123-4567", "(077) 123 4567"]:
+            self.assertEqual(normalize_phone(value), "0771234567", value)
+        self.assertEqual(query_terms("+94 77 123 4567 Nimal"), [("0771234567", "94771234567"), ("nimal",)])
+
+    def test_search_matches_names_identifiers_and_phones(self):
+        self.assertEqual(self.search("vikramasinghe"), {self.tharindu})
+        self.assertEqual(self.search("Tarindu"), {self.tharindu, self.other})
+        self.assertEqual(self.search("tarindu perera"), {self.other})
+        self.assertEqual(self.search("Tamil Jayakumar"), {self.tamil})
+        self.assertEqual(self.search("+94 77 123 4567"), {self.tharindu})
+        self.assertEqual(self.search("199012345678"), {self.tamil})
+        self.assertEqual(self.search("T-70"), {self.tharindu, self.tamil, self.other})
+        self.assertEqual(self.search("xyz"), set())
+
+    def test_documents_follow_client_changes(self):
+        self.tharindu.full_name = "Kasun Bandara"
+        self.tharindu.save()
+        self.assertEqual(self.search("Wickramasinghe"), set())
+        self.assertEqual(self.search("bandara"), {self.tharindu})
+        self.tamil.delete()
+        self.assertEqual(self.search("Jeyakumar"), set())
+
+    def test_rebuild_restores_missing_documents(self):
+        Client.objects.bulk_create([Client(registration_number="T-703", full_name="Chamari Herath")])
+        self.assertEqual(self.search("herath"), set())
+        self.assertEqual(refresh_search_documents(), 4)
+        self.assertEqual({client.full_name for client in self.search("herath")}, {"Chamari Herath"})
+
+    def test_typeahead_is_scoped_to_the_users_unit(self):
+        user = User.objects.create_user(username="clinician", password="pass123", thalassemia_unit=self.unit)
+        user.user_permissions.add(Permission.objects.get(codename="view_client"))
+        self.client.login(username="clinician", password="pass123")
+        url = reverse("clients:client-search")
+
+        response = self.client.get(url, {"q": "tarindu"})
+        self.assertContains(response, "Tharindu Wickramasinghe")
+        self.assertNotContains(response, "Tharindu Perera")
+        self.assertContains(self.client.get(url, {"q": "nobody"}), "No matching clients.")
+        self.assertNotContains(self.client.get(url, {"q": "t"}), "<li")
+
+    def test_admin_search_uses_the_search_service(self):
+        User.objects.create_superuser(username="admin", password="pass123")
+        self.client.login(username="admin", password="pass123")
+        response = self.client.get(reverse("admin:clients_client_changelist"), {"q": "vikramasinghe"})
+        self.assertContains(response, "Tharindu Wickramasinghe")
+        self.assertNotContains(response, "Tharindu Perera")
+
+
+class ClientFragmentCacheTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.unit = ThalassemiaUnit.objects.create(name="Unit A")
+        self.patient = Client.objects.create(registration_number="T-870", full_name="Nimali", address="Old Road")
+        self.other_patient = Client.objects.create(registration_number="T-871", full_name="Dilani")
+        for patient in (self.patient, self.other_patient):
+            ClientCareUnit.objects.create(client=patient, unit=self.unit, role=ClientCareUnit.Role.PRIMARY)
+        self.viewer = self.make_user("viewer", ["view_client", "view_admission"])
+        self.editor = self.make_user("editor", ["view_client", "view_admission", "change_admission"])
+        self.url = reverse("clients:client-detail", args=[self.patient.pk])
+        self.admissions_url = reverse("clients:client-admission-list", args=[self.patient.pk])
+
+    def make_user(self, username, codenames):
+        user = User.objects.create_user(username=username, password="pass123", thalassemia_unit=self.unit)
+        user.user_permissions.add(*Permission.objects.filter(codename__in=codenames))
+        return user
+
+    def get(self, user, url):
+        self.client.force_login(user)
+        return self.client.get(url)
+
+    def test_record_changes_invalidate_the_clients_fragments(self):
+        self.assertContains(self.get(self.viewer, self.admissions_url), "No admissions found.")
+        admission = Admission.objects.create(client=self.patient, date_of_admission=date(2024, 3, 5))
+        self.assertContains(self.get(self.viewer, self.admissions_url), "Tue 05 Mar 2024")
+
+        self.assertContains(self.get(self.viewer, self.url), "Old Road")
+        self.patient.address = "New Road"
+        self.patient.save()
+        self.assertContains(self.get(self.viewer, self.url), "New Road")
+
+        admission.client = self.other_patient
+        admission.save()
+        self.assertContains(self.get(self.viewer, self.admissions_url), "No admissions found.")
+
+    def test_fragments_are_not_shared_across_permission_scopes(self):
+        Admission.objects.create(client=self.patient, date_of_admission=date(2024, 3, 5))
+        self.assertContains(self.get(self.editor, self.admissions_url), "<th>Update</th>")
+        self.assertNotContains(self.get(self.viewer, self.admissions_url), "<th>Update</th>")
+        self.assertNotEqual(fragment_scope(self.viewer), fragment_scope(self.editor))
+
+        other_unit = ThalassemiaUnit.objects.create(name="Unit B")
+        moved = self.make_user("moved", ["view_client", "view_admission"])
+        scope = fragment_scope(moved)
+        moved.thalassemia_unit = other_unit
+        moved.save()
+        self.assertNotEqual(fragment_scope(User.objects.get(pk=moved.pk)), scope)
+
+    def test_cached_tab_skips_its_query(self):
+        Admission.objects.create(client=self.patient, date_of_admission=date(2024, 3, 5))
+        self.get(self.viewer, self.admissions_url)
+        with CaptureQueriesContext(connection) as captured:
+            self.assertContains(self.get(self.viewer, self.admissions_url), "Tue 05 Mar 2024")
+        self.assertFalse([query for query in captured.captured_queries if 'FROM "clients_admission"' in query["sql"]])
+
+    def test_tabs_revalidate_with_etags(self):
+        response = self.get(self.viewer, self.admissions_url)
+        etag = response["ETag"]
+        self.assertIn("no-cache", response["Cache-Control"])
+        self.assertIn("private", response["Cache-Control"])
+        with CaptureQueriesContext(connection) as captured:
+            response = self.client.get(self.admissions_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertFalse([query for query in captured.captured_queries if 'FROM "clients_admission"' in query["sql"]])
+        self.assertEqual(response.status_code, 304)
+
+        Admission.objects.create(client=self.patient, date_of_admission=date(2024, 3, 5))
+        response = self.client.get(self.admissions_url, HTTP_IF_NONE_MATCH=etag)
+        self.assertEqual(response.status_code, 200)
+        self.assertNotEqual(response["ETag"], etag)
+        self.assertEqual(self.get(self.editor, self.admissions_url).status_code, 200)
+        self.assertNotEqual(self.client.get(self.admissions_url)["ETag"], response["ETag"])
+
+
+class ConditionalGetTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.unit = ThalassemiaUnit.objects.create(name="Unit A")
+        self.patient = Client.objects.create(registration_number="T-880", full_name="Nimali", address="Old Road")
+        self.link = ClientCareUnit.objects.create(client=self.patient, unit=self.unit, role=ClientCareUnit.Role.PRIMARY)
+        self.admission = Admission.objects.create(client=self.patient, date_of_admission=date(2024, 3, 5))
+        Transfusion.objects.create(admission=self.admission, date_of_transfusion=date(2024, 3, 5))
+        self.user = User.objects.create_user(username="ward", password="pass123", thalassemia_unit=self.unit)
+        self.user.user_permissions.add(
+            *Permission.objects.filter(codename__in=["view_client", "view_admission", "view_transfusion"])
+        )
+        self.client.force_login(self.user)
+        self.list_url = reverse("clients:client-list")
+        self.detail_url = reverse("clients:client-detail", args=[self.patient.pk])
+        self.transfusions_url = reverse("clients:client-transfusion-list", args=[self.patient.pk])
+
+    def revalidate(self, url, etag):
+        return self.client.get(url, HTTP_IF_NONE_MATCH=etag)
+
+    def test_unchanged_pages_are_not_modified(self):
+        # The first full page sets the CSRF cookie, which is part of every later ETag.
+        self.client.get(self.list_url)
+        for url in (self.list_url, self.detail_url, self.transfusions_url):
+            with self.subTest(url=url):
+                response = self.client.get(url)
+                self.assertEqual(response.status_code, 200)
+                self.assertEqual(self.revalidate(url, response["ETag"]).status_code, 304)
+
+    def test_client_list_changes_with_its_rows(self):
+        etag = self.client.get(self.list_url)["ETag"]
+        with self.captureOnCommitCallbacks(execute=True):
+            Transfusion.objects.create(
+                admission=self.admission, date_of_transfusion=date(2024, 4, 2), next_date_given=date(2024, 4, 30)
+            )
+        response = self.revalidate(self.list_url, etag)
+        self.assertContains(response, "Tue 30 Apr 2024")
+
+        with self.captureOnCommitCallbacks(execute=True):
+            self.link.delete()
+        response = self.revalidate(self.list_url, response["ETag"])
+        self.assertContains(response, "No clients found.")
+
+    def test_client_list_validator_is_per_unit(self):
+        other_unit = ThalassemiaUnit.objects.create(name="Unit B")
+        self.client.get(self.list_url)
+        etag = self.client.get(self.list_url)["ETag"]
+        with CaptureQueriesContext(connection) as revalidation:
+            self.assertEqual(self.revalidate(self.list_url, etag).status_code, 304)
+        self.assertFalse([q for q in revalidation.captured_queries if "clients_client" in q["sql"]])
+
+        with self.captureOnCommitCallbacks(execute=True):
+            other = Client.objects.create(registration_number="T-881", full_name="Saman")
+            ClientCareUnit.objects.create(client=other, unit=other_unit, role=ClientCareUnit.Role.PRIMARY)
+        self.assertEqual(self.revalidate(self.list_url, etag).status_code, 304)
+
+        # Moving the link to another unit changes the old unit's list too.
+        with self.captureOnCommitCallbacks(execute=True):
+            self.link.unit = other_unit
+            self.link.save()
+        self.assertContains(self.revalidate(self.list_url, etag), "No clients found.")
+
+    def test_validators_do_not_depend_on_the_cache(self):
+        etag = self.client.get(self.transfusions_url)["ETag"]
+        # A write the signals never see, e.g. from another worker with its own cache.
+        Admission.objects.filter(pk=self.admission.pk).update(
+            date_of_admission=date(2024, 3, 6), updated_at=timezone.now()
+        )
+        self.assertContains(self.revalidate(self.transfusions_url, etag), "Wed 06 Mar 2024")
+
+        etag = self.client.get(self.detail_url)["ETag"]
+        Client.objects.filter(pk=self.patient.pk).update(address="New Road", updated_at=timezone.now())
+        self.assertContains(self.revalidate(self.detail_url, etag), "New Road")
+
+    def test_views_without_validators_are_rejected_when_defined(self):
+        with self.assertRaisesMessage(ImproperlyConfigured, "does not define aget_etag_parts()"):
+            type("UnvalidatedView", (ConditionalGetMixin,), {})
+
+    def test_etags_are_per_user(self):
+        etag = self.client.get(self.detail_url)["ETag"]
+        colleague = User.objects.create_user(username="colleague", password="pass123", thalassemia_unit=self.unit)
+        colleague.user_permissions.add(*self.user.user_permissions.all())
+        self.client.force_login(colleague)
+        self.assertEqual(self.revalidate(self.detail_url, etag).status_code, 200)
+
+
+class AsyncReadViewTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.unit = ThalassemiaUnit.objects.create(name="Unit A")
+        other_unit = ThalassemiaUnit.objects.create(name="Unit B")
+        self.patient = Client.objects.create(registration_number="T-890", full_name="Kasun")
+        self.other = Client.objects.create(registration_number="T-891", full_name="Saman")
+        ClientCareUnit.objects.create(client=self.patient, unit=self.unit, role=ClientCareUnit.Role.PRIMARY)
+        ClientCareUnit.objects.create(client=self.other, unit=other_unit, role=ClientCareUnit.Role.PRIMARY)
+        admission = Admission.objects.create(client=self.patient, date_of_admission=date(2024, 3, 5))
+        Transfusion.objects.create(admission=admission, date_of_transfusion=date(2024, 3, 5))
+        self.user = User.objects.create_user(username="ward", password="pass123", thalassemia_unit=self.unit)
+        self.user.user_permissions.add(
+            *Permission.objects.filter(codename__in=["view_client", "view_admission", "view_transfusion"])
+        )
+
+    def test_read_views_are_async(self):
+        for view in ("client-list", "client-detail", "client-admission-list", "client-transfusion-list"):
+            with self.subTest(view=view):
+                args = [] if view == "client-list" else [self.patient.pk]
+                self.assertTrue(resolve(reverse(f"clients:{view}", args=args)).func.view_class.view_is_async)
+
+    async def test_async_client_is_scoped_to_the_unit(self):
+        await self.async_client.aforce_login(self.user)
+        response = await self.async_client.get(reverse("clients:client-list"))
+        self.assertContains(response, "Kasun")
+        self.assertNotContains(response, "Saman")
+        for view in ("client-detail", "client-transfusion-list"):
+            with self.subTest(view=view):
+                url = reverse(f"clients:{view}", args=[self.patient.pk])
+                self.assertEqual((await self.async_client.get(url)).status_code, 200)
+                url = reverse(f"clients:{view}", args=[self.other.pk])
+                self.assertEqual((await self.async_client.get(url)).status_code, 404)
+        # The admissions tab scopes its rows rather than the client.
+        response = await self.async_client.get(reverse("clients:client-admission-list", args=[self.patient.pk]))
+        self.assertEqual(len(response.context["admissions"]), 1)
+        response = await self.async_client.get(reverse("clients:client-admission-list", args=[self.other.pk]))
+        self.assertEqual(len(response.context["admissions"]), 0)
+
+    async def test_async_views_check_login_and_permissions(self):
+        url = reverse("clients:client-transfusion-list", args=[self.patient.pk])
+        response = await self.async_client.get(url)
+        self.assertEqual(response.status_code, 302)
+        self.assertIn(reverse("login"), response["Location"])
+
+        await self.async_client.aforce_login(await User.objects.acreate(username="clerk", thalassemia_unit=self.unit))
+        self.assertEqual((await self.async_client.get(url)).status_code, 403)
+
+
+def make_jpeg(size, orientation=None):
+    exif = Image.Exif()
+    exif[0x010F] = "PhoneMaker"
+    if orientation:
+        exif[0x0112] = orientation
+    buffer = BytesIO()
+    Image.new("RGB", size, "red").save(buffer, "JPEG", exif=exif)
+    return buffer.getvalue()
+
+
+class ClientPhotoTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.media = self.enterContext(tempfile.TemporaryDirectory())
+        self.enterContext(override_settings(MEDIA_ROOT=self.media))
+        self.unit = ThalassemiaUnit.objects.create(name="Unit A")
+        self.patient = Client.objects.create(registration_number="T-900", full_name="Dilani")
+        ClientCareUnit.objects.create(client=self.patient, unit=self.unit, role=ClientCareUnit.Role.PRIMARY)
+        self.user = User.objects.create_user(username="ward", password="pass123", thalassemia_unit=self.unit)
+        self.user.user_permissions.add(Permission.objects.get(codename="view_client"))
+        self.client.force_login(self.user)
+
+    def upload(self, client, data, name="phone.jpg"):
+        client.photo = SimpleUploadedFile(name, data, content_type="image/jpeg")
+        client.save()
+        return client.photo.name
+
+    def test_upload_is_stored_upright_small_and_without_exif(self):
+        # Orientation 6: the camera was turned, so the stored photo is portrait.
+        name = self.upload(self.patient, make_jpeg((3000, 2000), orientation=6))
+        self.assertRegex(name, r"^client_photos/[0-9a-f]{16}\.jpg$")
+        with Image.open(os.path.join(self.media, name)) as stored:
+            self.assertEqual(stored.size, (1067, 1600))
+            self.assertEqual(dict(stored.getexif()), {})
+
+        # The same photo again maps to the same file.
+        other = Client.objects.create(registration_number="T-901", full_name="Ishara")
+        self.assertEqual(self.upload(other, make_jpeg((3000, 2000), orientation=6), "copy.jpg"), name)
+        self.assertEqual(len(os.listdir(os.path.join(self.media, "client_photos"))), 1)
+
+    def test_renditions_are_written_off_the_request_path(self):
+        futures = []
+
+        def schedule(name):
+            futures.append(schedule_renditions(name))
+
+        with (
+            patch("clients.signals.schedule_renditions", side_effect=schedule),
+            self.captureOnCommitCallbacks(execute=True),
+        ):
+            name = self.upload(self.patient, make_jpeg((1200, 900)))
+        self.assertEqual(len(futures), 1)
+        self.assertEqual(len(futures[0].result()), 4)
+        with Image.open(os.path.join(self.media, rendition_name(name, "thumb", "webp"))) as thumb:
+            self.assertEqual((thumb.format, thumb.size), ("WEBP", (96, 96)))
+        with Image.open(os.path.join(self.media, rendition_name(name, "detail", "jpg"))) as detail:
+            self.assertEqual((detail.format, detail.size), ("JPEG", (320, 240)))
+
+        # Saving without a new upload schedules nothing.
+        with patch("clients.signals.schedule_renditions") as schedule, self.captureOnCommitCallbacks(execute=True):
+            Client.objects.get(pk=self.patient.pk).save()
+        schedule.assert_not_called()
+
+    def test_photo_view_is_scoped_and_cached_for_a_year(self):
+        self.upload(self.patient, make_jpeg((800, 600)))
+        url = photo_url(self.patient, "thumb", "webp")
+        # No background job ran, so the view writes the rendition itself.
+        response = self.client.get(url)
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(response["Content-Type"], "image/webp")
+        for directive in ("private", "max-age=31536000", "immutable"):
+            self.assertIn(directive, response["Cache-Control"])
+        with Image.open(BytesIO(b"".join(response.streaming_content))) as thumb:
+            self.assertEqual(thumb.size, (96, 96))
+        self.assertEqual(self.client.get(url, HTTP_IF_NONE_MATCH=response["ETag"]).status_code, 304)
+
+        self.assertEqual(self.client.get(url.replace("thumb.webp", "full.webp")).status_code, 404)
+        self.assertEqual(self.client.get(url.replace(url.split("/")[-2], "0" * 16)).status_code, 404)
+        outsider = User.objects.create_user(
+            username="other", thalassemia_unit=ThalassemiaUnit.objects.create(name="Unit B")
+        )
+        outsider.user_permissions.add(Permission.objects.get(codename="view_client"))
+        self.client.force_login(outsider)
+        self.assertEqual(self.client.get(url).status_code, 404)
+
+    def test_pages_link_small_renditions(self):
+        self.upload(self.patient, make_jpeg((800, 600)))
+        self.assertContains(self.client.get(reverse("clients:client-list")), photo_url(self.patient, "thumb", "webp"))
+        response = self.client.get(reverse("clients:client-detail", args=[self.patient.pk]))
+        self.assertContains(response, photo_url(self.patient, "detail", "webp"))
+        self.assertContains(response, photo_url(self.patient, "detail", "jpg"))
+
+    def test_oversized_uploads_are_rejected(self):
+        for setting in ("CLIENT_PHOTO_MAX_UPLOAD_SIZE", "CLIENT_PHOTO_MAX_PIXELS"):
+            with self.subTest(setting=setting), override_settings(**{setting: 1000}):
+                self.patient.photo = SimpleUploadedFile("phone.jpg", make_jpeg((400, 300)))
+                with self.assertRaises(ValidationError) as raised:
+                    self.patient.full_clean()
+                self.assertIn("photo", raised.exception.message_dict)
+
+
 class ClientFormTest(TestCase):
     def setUp(self):
         self.province = Province.objects.create(name="Western")
@@ -0,0 +1,38 @@
+def largest_triangle_three_buckets(points, threshold):
+    """Downsample ``(x, y)`` points to at most ``threshold`` while keeping the visual shape.
+
+    Implements LTTB (Steinarsson, 2013): the first and last points are always kept and
+    each bucket in between contributes the point forming the largest triangle with the
+    previously selected point and the average of the next bucket. ``points`` must be
+    sorted by ``x``.
+    """
+    if threshold >= len(points) or threshold < 3:
+        return list(points)
+
+    sampled = [points[0]]
+    bucket_size = (len(points) - 2) / (threshold - 2)
+    selected = 0
+    for bucket in range(threshold - 2):
+        start = int(bucket * bucket_size) + 1
+        end = int((bucket + 1) * bucket_size) + 1
+
+        next_start = end
+        next_end = min(int((bucket + 2) * bucket_size) + 1, len(points))
+        next_bucket = points[next_start:next_end] or [points[-1]]
+        avg_x = sum(x for x, _ in next_bucket) / len(next_bucket)
+        avg_y = sum(y for _, y in next_bucket) / len(next_bucket)
+
+        selected_x, selected_y = points[selected]
+        best_area = -1
+        best_index = start
+        for index in range(start, end):
+            x, y = points[index]
+            area = abs((selected_x - avg_x) * (y - selected_y) - (selected_x - x) * (avg_y - selected_y))
+            if area > best_area:
+                best_area = area
+                best_index = index
+        sampled.append(points[best_index])
+        selected = best_index
+
+    sampled.append(points[-1])
+    return sampled
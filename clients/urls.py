@@ -7,10 +7,26 @@ urlpatterns = [
     path("add/", views.ClientFormView.as_view(), name="client-add"),
     path("update/<int:pk>", views.ClientUpdateView.as_view(), name="client-update"),
     path("detail/<int:pk>", views.ClientDetailView.as_view(), name="client-detail"),
+    path(
+        "photo/<int:pk>/<str:digest>/<str:rendition>.<str:fmt>",
+        views.ClientPhotoView.as_view(),
+        name="client-photo",
+    ),
     path("admissions/<int:pk>", views.AdmissionListView.as_view(), name="client-admission-list"),
     path("admission/add/<int:pk>/", views.AdmissionCreateView.as_view(), name="client-admission-create"),
     path("admission/update/<int:pk>", views.AdmissionUpdateView.as_view(), name="client-admission-update"),
     path("transfusions/<int:pk>", views.TransfusionListView.as_view(), name="client-transfusion-list"),
     path("investigations/<int:pk>", views.InvestigationListView.as_view(), name="client-investigation-list"),
+    path(
+        "investigations/<int:pk>/trend/<int:type_pk>",
+        views.InvestigationTrendView.as_view(),
+        name="client-investigation-trend",
+    ),
+    path("reports/transfusions/", views.TransfusionWorkloadView.as_view(), name="transfusion-workload"),
+    path("schedule/", views.TransfusionScheduleView.as_view(), name="transfusion-schedule"),
+    path("schedule/feed.<str:fmt>", views.TransfusionScheduleFeedView.as_view(), name="transfusion-schedule-feed"),
+    path("export/<str:kind>.csv", views.RegistryExportView.as_view(), name="registry-export"),
+    path("rows/", views.ClientListRowsView.as_view(), name="client-list-rows"),
+    path("search/", views.ClientSearchView.as_view(), name="client-search"),
     path("", views.ClientListView.as_view(), name="client-list"),
 ]
@@ -1,7 +1,18 @@
 from .admissions import AdmissionCreateView, AdmissionListView, AdmissionUpdateView
-from .clients import ClientDetailView, ClientFormView, ClientListView, ClientUpdateView
-from .investigations import InvestigationListView
+from .clients import (
+    ClientDetailView,
+    ClientFormView,
+    ClientListRowsView,
+    ClientListView,
+    ClientSearchView,
+    ClientUpdateView,
+)
+from .exports import RegistryExportView
+from .investigations import InvestigationListView, InvestigationTrendView
 from .mixins import AuthenticatedPermissionRequiredMixin, UnitScopedMixin
+from .photos import ClientPhotoView
+from .reports import TransfusionWorkloadView
+from .scheduling import TransfusionScheduleFeedView, TransfusionScheduleView
 from .transfusions import TransfusionListView
 
 __all__ = [
@@ -11,9 +22,17 @@ __all__ = [
     "AuthenticatedPermissionRequiredMixin",
     "ClientDetailView",
     "ClientFormView",
+    "ClientListRowsView",
     "ClientListView",
+    "ClientPhotoView",
+    "ClientSearchView",
     "ClientUpdateView",
     "InvestigationListView",
+    "InvestigationTrendView",
+    "RegistryExportView",
     "TransfusionListView",
+    "TransfusionScheduleFeedView",
+    "TransfusionScheduleView",
+    "TransfusionWorkloadView",
     "UnitScopedMixin",
 ]
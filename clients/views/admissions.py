@@ -7,34 +7,27 @@ from django.views.generic.edit import CreateView, UpdateView
 from ..form import AdmissionForm
 from ..models.client import Client
 from ..models.management import Admission
-from .mixins import AuthenticatedPermissionRequiredMixin, UnitScopedMixin
+from .mixins import (
+    AsyncPermissionRequiredMixin,
+    AuthenticatedPermissionRequiredMixin,
+    ClientHistoryTabMixin,
+    UnitScopedMixin,
+)
 
 
-class AdmissionListView(
-    LoginRequiredMixin, AuthenticatedPermissionRequiredMixin, UnitScopedMixin, ListView
-):
+class AdmissionListView(AsyncPermissionRequiredMixin, UnitScopedMixin, ClientHistoryTabMixin, ListView):
     permission_required = "clients.view_admission"
     model = Admission
+    history_related = ("client_admissions",)
+    fragment_name = "client-admissions"
     template_name = "clients/client_admission_list.html"
     context_object_name = "admissions"
 
     def get_queryset(self):
-        allowed_clients = self.scope_client_queryset(Client.objects.all()).values_list(
-            "id", flat=True
+        queryset = self.scope_queryset(Admission.objects.filter(client_id=self.kwargs["pk"]), "client").order_by(
+            "-date_of_admission"
         )
-        queryset = Admission.objects.filter(
-            client_id=self.kwargs["pk"], client_id__in=allowed_clients
-        ).order_by("-date_of_admission")
-        show_all = self.request.GET.get("all") == "1"
-        if show_all:
-            return queryset
-        return queryset[:4]
-
-    def get_context_data(self, **kwargs):
-        context = super().get_context_data(**kwargs)
-        context["client_id"] = self.kwargs["pk"]
-        context["show_all"] = self.request.GET.get("all") == "1"
-        return context
+        return self.limit_history(queryset)
 
 
 class AdmissionCreateView(
@@ -76,15 +69,7 @@ class AdmissionUpdateView(
     template_name = "clients/client_admission_form.html"
 
     def get_queryset(self):
-        queryset = super().get_queryset()
-        if self._is_superuser():
-            return queryset
-        user_unit_id = self._user_unit_id()
-        if not user_unit_id:
-            return queryset.none()
-        return queryset.filter(
-            client__care_links__unit_id=user_unit_id, client__care_links__is_active=True
-        ).distinct()
+        return self.scope_queryset(super().get_queryset(), "client")
 
     def get_success_url(self):
         client_id = self.object.client.id
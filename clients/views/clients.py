@@ -6,9 +6,25 @@ from django.views.generic.edit import FormView, UpdateView
 from django.contrib.auth.mixins import LoginRequiredMixin
 
 from ..form import ClientForm
+from ..fragments import (
+    FRAGMENT_CACHE_TIMEOUT,
+    aclient_fragment_version,
+    aclient_list_version,
+    alatest_change,
+    fragment_scope,
+)
+from ..lookup_cache import alookup_version
 from ..models.client import Client, ClientCareUnit
-from ..models.management import Transfusion
-from .mixins import AuthenticatedPermissionRequiredMixin, UnitScopedMixin
+from ..search import search_clients
+from .mixins import (
+    AsyncDetailMixin,
+    AsyncListMixin,
+    AsyncPermissionRequiredMixin,
+    AuthenticatedPermissionRequiredMixin,
+    ConditionalGetMixin,
+    UnitScopedMixin,
+)
+from .pagination import KeysetPaginationMixin
 
 
 class ClientFormView(
@@ -56,16 +72,94 @@ class ClientFormView(
 
 
 class ClientListView(
-    LoginRequiredMixin, AuthenticatedPermissionRequiredMixin, UnitScopedMixin, ListView
+    AsyncPermissionRequiredMixin,
+    UnitScopedMixin,
+    ConditionalGetMixin,
+    KeysetPaginationMixin,
+    AsyncListMixin,
+    ListView,
 ):
+    """Registry of clients, paged by ``(full_name, id)`` and filterable."""
+
     permission_required = "clients.view_client"
     model = Client
     template_name = "clients/client_list.html"
     context_object_name = "clients"
+    page_size = 50
+
+    def get_filters(self):
+        return {
+            "registration_number": self.request.GET.get("registration_number", "").strip(),
+            "nic": self.request.GET.get("nic", "").strip(),
+            "name": self.request.GET.get("name", "").strip(),
+            "overdue": self.request.GET.get("overdue") == "1",
+        }
+
+    def filter_clients(self, queryset):
+        queryset = self.scope_client_queryset(queryset)
+        filters = self.get_filters()
+        if filters["registration_number"]:
+            queryset = queryset.filter(registration_number__istartswith=filters["registration_number"])
+        if filters["nic"]:
+            queryset = queryset.filter(nic_number__iexact=filters["nic"])
+        if filters["name"]:
+            queryset = queryset.filter(full_name__istartswith=filters["name"])
+        if filters["overdue"]:
+            queryset = queryset.filter(clinical_summary__next_transfusion_due__lt=timezone.localdate())
+        return queryset
 
     def get_queryset(self):
-        queryset = Client.objects.all().order_by("full_name")
-        return self.scope_client_queryset(queryset)
+        return self.paginate_keyset(
+            self.filter_clients(Client.objects.with_primary_unit().select_related("clinical_summary"))
+        )
+
+    async def aget_etag_parts(self):
+        # Rows show the primary unit and summary dates, and "overdue" moves with the date.
+        # The filters are part of the path, which the ETag already covers.
+        unit_id = None if self._is_superuser() else self._user_unit_id()
+        return [
+            await aclient_list_version(unit_id),
+            await alookup_version(),
+            timezone.localdate(),
+        ]
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["filters"] = self.get_filters()
+        return context
+
+
+class ClientListRowsView(ClientListView):
+    """htmx partial returning one page of registry rows."""
+
+    template_name = "clients/client_list_rows.html"
+
+
+class ClientSearchView(
+    LoginRequiredMixin,
+    AuthenticatedPermissionRequiredMixin,
+    UnitScopedMixin,
+    ListView,
+):
+    """htmx typeahead: the best few matches for ``q`` by name, Reg-ID, NIC or phone."""
+
+    permission_required = "clients.view_client"
+    template_name = "clients/client_search_results.html"
+    context_object_name = "clients"
+    min_query_length = 2
+    limit = 10
+
+    def get_queryset(self):
+        query = self.request.GET.get("q", "").strip()
+        if len(query) < self.min_query_length:
+            return Client.objects.none()
+        queryset = self.scope_client_queryset(Client.objects.all())
+        return search_clients(queryset, query)[: self.limit]
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["query"] = self.request.GET.get("q", "").strip()
+        return context
 
 
 class ClientUpdateView(
@@ -81,7 +175,7 @@ class ClientUpdateView(
     success_url = reverse_lazy("clients:client-list")
 
     def get_queryset(self):
-        queryset = super().get_queryset()
+        queryset = super().get_queryset().with_primary_unit()
         return self.scope_client_queryset(queryset)
 
     def get_form(self, form_class=None):
@@ -92,28 +186,31 @@ class ClientUpdateView(
 
 
 class ClientDetailView(
-    LoginRequiredMixin,
-    AuthenticatedPermissionRequiredMixin,
+    AsyncPermissionRequiredMixin,
     UnitScopedMixin,
+    ConditionalGetMixin,
+    AsyncDetailMixin,
     DetailView,
 ):
     permission_required = "clients.view_client"
     model = Client
 
     def get_queryset(self):
-        queryset = super().get_queryset()
-        return self.scope_client_queryset(queryset)
+        return self.scope_client_queryset(super().get_queryset())
+
+    async def aget_etag_parts(self):
+        client = self.get_queryset().filter(pk=self.kwargs["pk"])
+        # The age shown in the header changes with the date.
+        return [
+            await aclient_fragment_version(self.kwargs["pk"]),
+            await alatest_change(client, "care_links"),
+            timezone.localdate(),
+        ]
 
     def get_context_data(self, **kwargs):
         context = super().get_context_data(**kwargs)
-        client = self.object
-        context["admissions"] = client.client_admissions.all().order_by(
-            "-date_of_admission"
-        )[:4]
-        context["transfusions"] = Transfusion.objects.filter(
-            admission__client__id=client.id
-        ).order_by("-date_of_transfusion")[:4]
-        context["investigations"] = client.client_investigations.all().order_by(
-            "investigation_type__name", "-date_done"
-        )[:4]
+        # The history tabs are fetched over htmx when first shown (see ClientHistoryTabMixin).
+        context["fragment_timeout"] = FRAGMENT_CACHE_TIMEOUT
+        context["fragment_version"] = self.validator_version
+        context["fragment_scope"] = fragment_scope(self.request.user)
         return context
@@ -0,0 +1,37 @@
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.handlers.asgi import ASGIRequest
+from django.http import Http404, StreamingHttpResponse
+from django.utils import timezone
+from django.views import View
+
+from ..exports import EXPORTS, astream_csv, stream_csv
+from .mixins import AuthenticatedPermissionRequiredMixin, UnitScopedMixin
+
+
+class RegistryExportView(LoginRequiredMixin, AuthenticatedPermissionRequiredMixin, UnitScopedMixin, View):
+    """Stream a unit-scoped CSV export; rows are written as they are read from the database.
+
+    Under ASGI the rows come from an async generator, since Django would read a sync
+    iterator to the end before sending anything.
+    """
+
+    def dispatch(self, request, *args, **kwargs):
+        export_class = EXPORTS.get(kwargs["kind"])
+        if export_class is None:
+            raise Http404("Unknown export.")
+        self.export = export_class()
+        return super().dispatch(request, *args, **kwargs)
+
+    def get_permission_required(self):
+        return [self.export.permission_required]
+
+    def get(self, request, *args, **kwargs):
+        queryset = self.scope_queryset(self.export.get_queryset(), self.export.client_ref)
+        if isinstance(request, ASGIRequest):
+            content = astream_csv(self.export.header, self.export.arows(queryset))
+        else:
+            content = stream_csv(self.export.header, self.export.rows(queryset))
+        response = StreamingHttpResponse(content, content_type="text/csv")
+        filename = f"{kwargs['kind']}-{timezone.localdate():%Y%m%d}.csv"
+        response["Content-Disposition"] = f'attachment; filename="{filename}"'
+        return response
@@ -1,3 +1,4 @@
 from .lists import InvestigationListView
+from .trends import InvestigationTrendView
 
-__all__ = ["InvestigationListView"]
+__all__ = ["InvestigationListView", "InvestigationTrendView"]
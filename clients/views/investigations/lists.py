@@ -1,23 +1,26 @@
-from django.contrib.auth.mixins import LoginRequiredMixin
-from django.shortcuts import get_object_or_404
+from django.shortcuts import aget_object_or_404
 from django.views.generic import ListView
 
 from ...models.client import Client
-from ..mixins import AuthenticatedPermissionRequiredMixin, UnitScopedMixin
+from ...models.management import Investigation
+from ..mixins import AsyncPermissionRequiredMixin, ClientHistoryTabMixin, UnitScopedMixin
 
 
-class InvestigationListView(
-    LoginRequiredMixin, AuthenticatedPermissionRequiredMixin, UnitScopedMixin, ListView
-):
+class InvestigationListView(AsyncPermissionRequiredMixin, UnitScopedMixin, ClientHistoryTabMixin, ListView):
     permission_required = "clients.view_investigation"
     model = Client
+    history_related = ("client_investigations",)
+    fragment_name = "client-investigations"
     template_name = "clients/client_investigation_list.html"
     context_object_name = "investigations"
 
+    async def aget_object_list(self):
+        await aget_object_or_404(self.scope_client_queryset(Client.objects.all()), pk=self.kwargs["pk"])
+        return await super().aget_object_list()
+
     def get_queryset(self):
-        client = get_object_or_404(
-            self.scope_client_queryset(Client.objects.all()), pk=self.kwargs["pk"]
-        )
-        return client.client_investigations.all().order_by(
-            "investigation_type__name", "-date_done"
+        return self.limit_history(
+            Investigation.objects.filter(client_id=self.kwargs["pk"])
+            .select_related("investigation_type")
+            .order_by("investigation_type__name", "-date_done")
         )
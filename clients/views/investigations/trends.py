@@ -0,0 +1,108 @@
+from datetime import date
+
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.cache import cache
+from django.db.models import Avg, Count, Max, Min
+from django.db.models.functions import TruncMonth
+from django.http import JsonResponse
+from django.shortcuts import get_object_or_404
+from django.views import View
+
+from ...lookup_cache import lookup_version
+from ...models.client import Client
+from ...models.management import Investigation, InvestigationType
+from ...timeseries import largest_triangle_three_buckets
+from ..mixins import AuthenticatedPermissionRequiredMixin, UnitScopedMixin
+
+
+class InvestigationTrendView(LoginRequiredMixin, AuthenticatedPermissionRequiredMixin, UnitScopedMixin, View):
+    """JSON time series of one client's numeric results for one investigation type.
+
+    ``?bucket=month`` averages results per calendar month in the database; otherwise
+    the raw series is reduced with LTTB to at most ``?points=`` points. Responses are
+    cached under the client's latest Investigation id, result count and newest
+    ``updated_at``, so any new, deleted or edited result invalidates them, and under the
+    lookup version, which changes when the type's name, unit or reference range is edited.
+    """
+
+    permission_required = "clients.view_investigation"
+    default_points = 300
+    max_points = 1000
+    cache_timeout = 60 * 60 * 24
+
+    def get_points(self):
+        try:
+            points = int(self.request.GET.get("points", self.default_points))
+        except ValueError:
+            points = self.default_points
+        return max(3, min(points, self.max_points))
+
+    def get(self, request, *args, **kwargs):
+        client = get_object_or_404(self.scope_client_queryset(Client.objects.only("id")), pk=self.kwargs["pk"])
+        investigation_type = get_object_or_404(InvestigationType, pk=self.kwargs["type_pk"])
+        bucket = "month" if request.GET.get("bucket") == "month" else "lttb"
+        points = self.get_points()
+
+        history = Investigation.objects.filter(client_id=client.id).aggregate(
+            latest=Max("id"), total=Count("id"), changed=Max("updated_at")
+        )
+        changed = history["changed"].timestamp() if history["changed"] else None
+        cache_key = (
+            f"investigation-trend:{client.id}:{investigation_type.id}:"
+            f"{history['latest']}:{history['total']}:{changed}:{lookup_version()}:{bucket}:{points}"
+        )
+        payload = cache.get(cache_key)
+        if payload is None:
+            payload = self.build_payload(client, investigation_type, bucket, points)
+            cache.set(cache_key, payload, self.cache_timeout)
+        return JsonResponse(payload)
+
+    def build_payload(self, client, investigation_type, bucket, points):
+        results = Investigation.objects.filter(
+            client_id=client.id, investigation_type=investigation_type, numeric_value__isnull=False
+        )
+        if bucket == "month":
+            rows = (
+                results.annotate(month=TruncMonth("date_done"))
+                .values("month")
+                .annotate(
+                    value=Avg("numeric_value"), low=Min("numeric_value"), high=Max("numeric_value"), n=Count("id")
+                )
+                .order_by("month")
+            )
+            series = [
+                {
+                    "date": row["month"].isoformat(),
+                    "value": float(row["value"]),
+                    "min": float(row["low"]),
+                    "max": float(row["high"]),
+                    "count": row["n"],
+                }
+                for row in rows
+            ]
+            total = sum(row["count"] for row in series)
+        else:
+            raw = [
+                (done.toordinal(), float(value))
+                for done, value in results.order_by("date_done", "id").values_list("date_done", "numeric_value")
+            ]
+            total = len(raw)
+            series = [
+                {"date": date.fromordinal(int(ordinal)).isoformat(), "value": value}
+                for ordinal, value in largest_triangle_three_buckets(raw, points)
+            ]
+
+        return {
+            "client": client.id,
+            "investigation_type": investigation_type.name,
+            "unit": investigation_type.unit,
+            "reference_low": _as_float(investigation_type.reference_low),
+            "reference_high": _as_float(investigation_type.reference_high),
+            "downsampling": bucket,
+            "total_results": total,
+            "points": series,
+        }
+
+
+def _as_float(value):
+    return None if value is None else float(value)
@@ -1,5 +1,16 @@
+import hashlib
+
 from django.contrib.auth.mixins import PermissionRequiredMixin
-from django.core.exceptions import PermissionDenied
+from django.core.cache import cache
+from django.core.cache.utils import make_template_fragment_key
+from django.core.exceptions import ImproperlyConfigured, PermissionDenied
+from django.shortcuts import aget_object_or_404
+from django.utils.cache import get_conditional_response, patch_cache_control
+
+from users.backends import aauthorization_snapshot, authorization_snapshot
+
+from ..fragments import FRAGMENT_CACHE_TIMEOUT, aclient_fragment_version, alatest_change, fragment_scope
+from ..models.client import Client, ClientCareUnit
 
 
 class UnitScopedMixin:
@@ -9,18 +20,26 @@ class UnitScopedMixin:
         return self.request.user.is_superuser
 
     def _user_unit_id(self):
-        return getattr(self.request.user, "thalassemia_unit_id", None)
+        if not self.request.user.is_authenticated:
+            return None
+        return authorization_snapshot(self.request.user)["unit_id"]
 
-    def scope_client_queryset(self, queryset):
+    def scope_queryset(self, queryset, client_ref):
+        """Restrict any client-owned queryset to clients linked to the user's unit.
+
+        ``client_ref`` is the lookup path from the queryset's model to the client id,
+        e.g. ``"client"`` for Admission or ``"pk"`` for Client.
+        """
         if self._is_superuser():
             return queryset
 
         user_unit_id = self._user_unit_id()
         if not user_unit_id:
             return queryset.none()
-        return queryset.filter(
-            care_links__unit_id=user_unit_id, care_links__is_active=True
-        ).distinct()
+        return queryset.filter(ClientCareUnit.active_link_exists(user_unit_id, client_ref))
+
+    def scope_client_queryset(self, queryset):
+        return self.scope_queryset(queryset, "pk")
 
     def scope_unit_queryset(self, queryset):
         if self._is_superuser():
@@ -41,3 +60,128 @@ class AuthenticatedPermissionRequiredMixin(PermissionRequiredMixin):
         if self.request.user.is_authenticated:
             raise PermissionDenied
         return super().handle_no_permission()
+
+
+class AsyncPermissionRequiredMixin(AuthenticatedPermissionRequiredMixin):
+    """Login and permission checks for views whose handlers are coroutines.
+
+    Use it in place of ``LoginRequiredMixin`` and ``AuthenticatedPermissionRequiredMixin``.
+    The user and their authorization snapshot are loaded with async I/O; after that the
+    sync permission and unit-scope helpers answer from memory.
+    """
+
+    async def dispatch(self, request, *args, **kwargs):
+        request.user = await request.auser()
+        if request.user.is_authenticated:
+            await aauthorization_snapshot(request.user)
+        if not request.user.is_authenticated or not self.has_permission():
+            return self.handle_no_permission()
+        # Skip PermissionRequiredMixin.dispatch, which would repeat the checks synchronously.
+        return await super(PermissionRequiredMixin, self).dispatch(request, *args, **kwargs)
+
+
+class AsyncListMixin:
+    """Async ``ListView.get``: rows are loaded with the async ORM, then rendered off the event loop."""
+
+    async def get(self, request, *args, **kwargs):
+        self.object_list = await self.aget_object_list()
+        return self.render_to_response(self.get_context_data())
+
+    async def aget_object_list(self):
+        return [obj async for obj in self.get_queryset().aiterator()]
+
+
+class AsyncDetailMixin:
+    """Async ``DetailView.get``: the object is loaded with the async ORM, then rendered off the event loop."""
+
+    async def get(self, request, *args, **kwargs):
+        self.object = await aget_object_or_404(self.get_queryset(), pk=self.kwargs[self.pk_url_kwarg])
+        return self.render_to_response(self.get_context_data(object=self.object))
+
+
+class ConditionalGetMixin:
+    """Answer a GET with 304 Not Modified while the browser's ETag is still current.
+
+    Subclasses must define ``aget_etag_parts``, returning cheap validators such as version
+    tokens or :func:`~clients.fragments.alatest_change`. Their digest, ``validator_version``,
+    is hashed with the full path, the viewer and their fragment scope before any page
+    queryset is built. The CSRF secret is hashed in too, since full pages embed a token
+    derived from it. Responses are ``private, no-cache`` so browsers keep them and
+    always revalidate.
+
+    Use ``validator_version`` as the ``{% cache %}`` version of fragments on the page,
+    so a new ETag is never sent with a fragment rendered before the change.
+    """
+
+    def __init_subclass__(cls, **kwargs):
+        # Checked when the view class is defined, so a missing validator never reaches a request.
+        super().__init_subclass__(**kwargs)
+        if not hasattr(cls, "aget_etag_parts"):
+            raise ImproperlyConfigured(
+                f"{cls.__name__} uses ConditionalGetMixin but does not define aget_etag_parts()."
+            )
+
+    def get_etag(self):
+        request = self.request
+        parts = (
+            request.get_full_path(),
+            request.user.pk,
+            request.META.get("CSRF_COOKIE"),
+            fragment_scope(request.user),
+            self.validator_version,
+        )
+        return '"%s"' % hashlib.md5(repr(parts).encode()).hexdigest()
+
+    async def get(self, request, *args, **kwargs):
+        self.validator_version = hashlib.md5(repr(await self.aget_etag_parts()).encode()).hexdigest()
+        etag = self.get_etag()
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            response = await super().get(request, *args, **kwargs)
+        response.headers["ETag"] = etag
+        patch_cache_control(response, private=True, no_cache=True)
+        return response
+
+
+class ClientHistoryTabMixin(ConditionalGetMixin, AsyncListMixin):
+    """One client's history list, served as a client detail tab.
+
+    Shows the ``recent_limit`` newest rows unless ``?all=1``. The rendered table, cached
+    as ``fragment_name``, and the ETag are both versioned by the client's fragment version
+    plus :func:`~clients.fragments.alatest_change` over the scoped client and its
+    ``history_related`` paths, so they also change when the client leaves the viewer's unit.
+    """
+
+    recent_limit = 4
+    history_related = ()
+    fragment_name = None
+
+    def show_all(self):
+        return self.request.GET.get("all") == "1"
+
+    def limit_history(self, queryset):
+        return queryset if self.show_all() else queryset[: self.recent_limit]
+
+    async def aget_etag_parts(self):
+        client = self.scope_client_queryset(Client.objects.filter(pk=self.kwargs["pk"]))
+        return [
+            await aclient_fragment_version(self.kwargs["pk"]),
+            await alatest_change(client, *self.history_related),
+        ]
+
+    async def aget_object_list(self):
+        queryset = self.get_queryset()
+        vary_on = [self.kwargs["pk"], self.show_all(), self.validator_version, fragment_scope(self.request.user)]
+        if await cache.ahas_key(make_template_fragment_key(self.fragment_name, vary_on)):
+            # The template serves the cached table and never iterates the queryset.
+            return queryset
+        return await super().aget_object_list()
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        context["client_id"] = self.kwargs["pk"]
+        context["show_all"] = self.show_all()
+        context["fragment_timeout"] = FRAGMENT_CACHE_TIMEOUT
+        context["fragment_version"] = self.validator_version
+        context["fragment_scope"] = fragment_scope(self.request.user)
+        return context
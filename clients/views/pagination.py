@@ -0,0 +1,127 @@
+import base64
+import json
+
+from django.core.exceptions import BadRequest, ValidationError
+from django.core.paginator import Paginator
+from django.db import DatabaseError, connections, transaction
+from django.db.models import Q
+from django.utils.functional import cached_property
+
+
+def keyset_filter(fields, values):
+    """Build a Q that selects rows sorting strictly after ``values``.
+
+    For fields ``(a, b)`` this is ``a > va OR (a = va AND b > vb)``.
+    """
+    condition = Q()
+    for index, field in enumerate(fields):
+        step = Q(**{f"{field}__gt": values[index]})
+        for previous_field, previous_value in zip(fields[:index], values[:index]):
+            step &= Q(**{previous_field: previous_value})
+        condition |= step
+    return condition
+
+
+class KeysetPaginationMixin:
+    """Paginate a ListView by seeking past the last row of the previous page.
+
+    Unlike OFFSET pagination every page is a bounded range scan over the
+    ordering columns, so the cost of a page does not grow with its position.
+    """
+
+    page_size = 50
+    keyset_fields = ("full_name", "id")
+    cursor_param = "after"
+
+    def encode_cursor(self, obj):
+        values = [getattr(obj, field) for field in self.keyset_fields]
+        return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+    def decode_cursor(self, cursor, model):
+        """Values of ``keyset_fields`` from a cursor, each converted by its model field."""
+        try:
+            values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        except (ValueError, TypeError):
+            raise BadRequest("Invalid page cursor.")
+        if not isinstance(values, list) or len(values) != len(self.keyset_fields):
+            raise BadRequest("Invalid page cursor.")
+        decoded = []
+        for name, value in zip(self.keyset_fields, values):
+            # Ordering columns are never NULL, and no column holds a JSON object or array.
+            if value is None or isinstance(value, (dict, list)):
+                raise BadRequest("Invalid page cursor.")
+            try:
+                decoded.append(model._meta.get_field(name).to_python(value))
+            except ValidationError:
+                raise BadRequest("Invalid page cursor.")
+        return decoded
+
+    def paginate_keyset(self, queryset):
+        queryset = queryset.order_by(*self.keyset_fields)
+        cursor = self.request.GET.get(self.cursor_param)
+        if cursor:
+            values = self.decode_cursor(cursor, queryset.model)
+            queryset = queryset.filter(keyset_filter(self.keyset_fields, values))
+        # One extra row tells us whether a next page exists without a COUNT(*).
+        return queryset[: self.page_size + 1]
+
+    def get_context_data(self, **kwargs):
+        rows = list(self.object_list)
+        has_next = len(rows) > self.page_size
+        rows = rows[: self.page_size]
+        next_page_query = None
+        if has_next:
+            params = self.request.GET.copy()
+            params[self.cursor_param] = self.encode_cursor(rows[-1])
+            next_page_query = params.urlencode()
+        kwargs["object_list"] = rows
+        kwargs["has_next"] = has_next
+        kwargs["next_page_query"] = next_page_query
+        return super().get_context_data(**kwargs)
+
+
+def estimated_row_count(model, using="default"):
+    """Row count of ``model``'s table from the planner statistics, or None if there are none.
+
+    PostgreSQL keeps ``pg_class.reltuples`` current through autovacuum; SQLite only has
+    ``sqlite_stat1`` once ``ANALYZE`` has run.
+    """
+    connection = connections[using]
+    table = model._meta.db_table
+    if connection.vendor == "postgresql":
+        sql, params = "SELECT reltuples::bigint FROM pg_class WHERE oid = to_regclass(%s)", [table]
+    elif connection.vendor == "sqlite":
+        sql, params = "SELECT stat FROM sqlite_stat1 WHERE tbl = %s LIMIT 1", [table]
+    else:
+        return None
+    try:
+        with transaction.atomic(using=using), connection.cursor() as cursor:
+            cursor.execute(sql, params)
+            row = cursor.fetchone()
+    except DatabaseError:
+        return None
+    if row is None or row[0] is None:
+        return None
+    estimate = int(str(row[0]).split()[0])
+    # reltuples is -1 for a table that has never been vacuumed or analyzed.
+    return estimate if estimate >= 0 else None
+
+
+class EstimatedCountPaginator(Paginator):
+    """Paginator that skips ``COUNT(*)`` on large unfiltered querysets.
+
+    The count comes from :func:`estimated_row_count` when the queryset has no WHERE
+    clause and the estimate is at least ``estimate_threshold``; filtered or small
+    querysets are counted exactly.
+    """
+
+    estimate_threshold = 10000
+
+    @cached_property
+    def count(self):
+        query = getattr(self.object_list, "query", None)
+        if query is not None and not query.where:
+            estimate = estimated_row_count(self.object_list.model, self.object_list.db)
+            if estimate is not None and estimate >= self.estimate_threshold:
+                return estimate
+        return super().count
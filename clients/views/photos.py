@@ -0,0 +1,45 @@
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.core.files.storage import default_storage
+from django.http import FileResponse, Http404
+from django.utils.cache import get_conditional_response, patch_cache_control
+from django.views import View
+
+from ..models.client import Client
+from ..photos import (
+    PHOTO_CACHE_MAX_AGE,
+    PHOTO_FORMATS,
+    PHOTO_RENDITIONS,
+    generate_renditions,
+    photo_digest,
+    rendition_name,
+)
+from .mixins import AuthenticatedPermissionRequiredMixin, UnitScopedMixin
+
+
+class ClientPhotoView(LoginRequiredMixin, AuthenticatedPermissionRequiredMixin, UnitScopedMixin, View):
+    """Stream one rendition of a client's photo to users who may see the client.
+
+    The URL carries the photo's content digest, so a response never changes and the
+    browser may keep it for a year; a new photo gets a new URL.
+    """
+
+    permission_required = "clients.view_client"
+
+    def get(self, request, pk, digest, rendition, fmt):
+        if rendition not in PHOTO_RENDITIONS or fmt not in PHOTO_FORMATS:
+            raise Http404("Unknown photo rendition.")
+        photo = self.scope_client_queryset(Client.objects.filter(pk=pk)).values_list("photo", flat=True).first()
+        if not photo or photo_digest(photo) != digest:
+            raise Http404("No such photo.")
+
+        etag = f'"{digest}-{rendition}-{fmt}"'
+        response = get_conditional_response(request, etag=etag)
+        if response is None:
+            name = rendition_name(photo, rendition, fmt)
+            if not default_storage.exists(name):
+                # The upload's background job has not finished yet, or the photo predates it.
+                generate_renditions(photo)
+            response = FileResponse(default_storage.open(name), content_type=PHOTO_FORMATS[fmt][1])
+        response["ETag"] = etag
+        patch_cache_control(response, private=True, max_age=PHOTO_CACHE_MAX_AGE, immutable=True)
+        return response
@@ -0,0 +1,36 @@
+from datetime import timedelta
+
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.utils import timezone
+from django.views.generic import TemplateView
+
+from ..reports import cached_transfusion_workload
+from .mixins import AuthenticatedPermissionRequiredMixin, UnitScopedMixin
+
+
+class TransfusionWorkloadView(LoginRequiredMixin, AuthenticatedPermissionRequiredMixin, UnitScopedMixin, TemplateView):
+    """Blood-bank planning screen: monthly transfusion workload per unit."""
+
+    permission_required = "clients.view_transfusion"
+    template_name = "clients/transfusion_workload.html"
+    default_months = 12
+
+    def get_months(self):
+        try:
+            months = int(self.request.GET.get("months", self.default_months))
+        except ValueError:
+            months = self.default_months
+        return max(1, min(months, 120))
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        months = self.get_months()
+        start = (timezone.localdate() - timedelta(days=31 * months)).replace(day=1)
+        if self._is_superuser():
+            unit_ids = None
+        else:
+            user_unit_id = self._user_unit_id()
+            unit_ids = [user_unit_id] if user_unit_id else []
+        context["months"] = months
+        context["rows"] = cached_transfusion_workload(unit_ids=unit_ids, start=start)
+        return context
@@ -0,0 +1,105 @@
+import csv
+
+from django.contrib.auth.mixins import LoginRequiredMixin
+from django.http import Http404, HttpResponse
+from django.utils import timezone
+from django.views import View
+from django.views.generic import TemplateView
+
+from ..scheduling import clinic_visit_queue, daily_transfusion_load, transfusion_queue
+from .mixins import AuthenticatedPermissionRequiredMixin, UnitScopedMixin
+
+
+class ScheduleMixin(LoginRequiredMixin, AuthenticatedPermissionRequiredMixin, UnitScopedMixin):
+    permission_required = "clients.view_transfusion"
+    default_days = 7
+    max_days = 90
+
+    def get_days(self):
+        try:
+            days = int(self.request.GET.get("days", self.default_days))
+        except ValueError:
+            days = self.default_days
+        return max(1, min(days, self.max_days))
+
+    def get_schedule_unit_id(self):
+        """The unit to schedule for; superusers may pick one with ``?unit=`` or see all units."""
+        if self._is_superuser():
+            unit = self.request.GET.get("unit", "")
+            return int(unit) if unit.isdigit() else None
+        user_unit_id = self._user_unit_id()
+        if not user_unit_id:
+            raise Http404("No unit assigned to current user.")
+        return user_unit_id
+
+
+class TransfusionScheduleView(ScheduleMixin, TemplateView):
+    """Ward view of who is due or overdue, with per-day load against capacity."""
+
+    template_name = "clients/transfusion_schedule.html"
+
+    def get_context_data(self, **kwargs):
+        context = super().get_context_data(**kwargs)
+        unit_id = self.get_schedule_unit_id()
+        today = timezone.localdate()
+        days = self.get_days()
+        context["days"] = days
+        context["load"] = daily_transfusion_load(unit_id, today, days)
+        context["transfusions_due"] = transfusion_queue(unit_id, today, days)
+        context["clinic_visits_due"] = clinic_visit_queue(unit_id, today, days)
+        return context
+
+
+class TransfusionScheduleFeedView(ScheduleMixin, View):
+    """CSV or iCalendar feed of the transfusions due in the next ``?days=`` days."""
+
+    default_days = 14
+
+    def get(self, request, *args, **kwargs):
+        entries = transfusion_queue(self.get_schedule_unit_id(), timezone.localdate(), self.get_days())
+        if self.kwargs["fmt"] == "csv":
+            return self.render_csv(entries)
+        if self.kwargs["fmt"] == "ics":
+            return self.render_ics(entries)
+        raise Http404("Unknown feed format.")
+
+    def render_csv(self, entries):
+        response = HttpResponse(content_type="text/csv")
+        response["Content-Disposition"] = 'attachment; filename="transfusion-schedule.csv"'
+        writer = csv.writer(response)
+        writer.writerow(["registration_number", "full_name", "due", "overdue_days", "last_transfusion_date"])
+        for entry in entries:
+            writer.writerow(
+                [
+                    entry["client"].registration_number,
+                    entry["client"].full_name,
+                    entry["due"].isoformat(),
+                    entry["overdue_days"],
+                    entry["last_transfusion_date"].isoformat() if entry["last_transfusion_date"] else "",
+                ]
+            )
+        return response
+
+    def render_ics(self, entries):
+        stamp = timezone.now().strftime("%Y%m%dT%H%M%SZ")
+        lines = ["BEGIN:VCALENDAR", "VERSION:2.0", "PRODID:-//ThalDB//Transfusion Schedule//EN"]
+        for entry in entries:
+            client = entry["client"]
+            due = entry["due"] if not entry["overdue_days"] else timezone.localdate()
+            summary = f"Transfusion: {client.registration_number} {client.full_name}"
+            if entry["overdue_days"]:
+                summary += f" (overdue {entry['overdue_days']} days)"
+            lines += [
+                "BEGIN:VEVENT",
+                f"UID:transfusion-{client.pk}-{entry['due']:%Y%m%d}@thaldb",
+                f"DTSTAMP:{stamp}",
+                f"DTSTART;VALUE=DATE:{due:%Y%m%d}",
+                f"SUMMARY:{_ics_escape(summary)}",
+                "END:VEVENT",
+            ]
+        lines.append("END:VCALENDAR")
+        return HttpResponse("\r\n".join(lines) + "\r\n", content_type="text/calendar; charset=utf-8")
+
+
+def _ics_escape(text):
+    return text.replace("\\", "\\\\").replace(";", "\\;").replace(",", "\\,").replace("\n", "\\n")
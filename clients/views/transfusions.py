@@ -1,24 +1,26 @@
-from django.contrib.auth.mixins import LoginRequiredMixin
-from django.shortcuts import get_object_or_404
+from django.shortcuts import aget_object_or_404
 from django.views.generic import ListView
 
 from ..models.client import Client
 from ..models.management import Transfusion
-from .mixins import AuthenticatedPermissionRequiredMixin, UnitScopedMixin
+from .mixins import AsyncPermissionRequiredMixin, ClientHistoryTabMixin, UnitScopedMixin
 
 
-class TransfusionListView(
-    LoginRequiredMixin, AuthenticatedPermissionRequiredMixin, UnitScopedMixin, ListView
-):
+class TransfusionListView(AsyncPermissionRequiredMixin, UnitScopedMixin, ClientHistoryTabMixin, ListView):
     permission_required = "clients.view_transfusion"
     model = Client
+    history_related = ("transfusions", "transfusions__admission")
+    fragment_name = "client-transfusions"
     template_name = "clients/client_transfusion_list.html"
     context_object_name = "transfusions"
 
+    async def aget_object_list(self):
+        await aget_object_or_404(self.scope_client_queryset(Client.objects.all()), pk=self.kwargs["pk"])
+        return await super().aget_object_list()
+
     def get_queryset(self):
-        client = get_object_or_404(
-            self.scope_client_queryset(Client.objects.all()), pk=self.kwargs["pk"]
-        )
-        return Transfusion.objects.filter(admission__client__id=client.id).order_by(
-            "-date_of_transfusion"
+        return self.limit_history(
+            Transfusion.objects.filter(client_id=self.kwargs["pk"])
+            .select_related("admission")
+            .order_by("-date_of_transfusion")
         )
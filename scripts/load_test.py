@@ -0,0 +1,166 @@
+"""Poll the registry read views at rising concurrency and report throughput and latency.
+
+Each simulated ward tablet is a thread with one keep-alive connection that requests the
+given paths in turn for ``--duration`` seconds. Run it against the same cohort served
+once by gunicorn sync workers (WSGI) and once by uvicorn workers (ASGI)::
+
+    DJANGO_SETTINGS_MODULE=thallk.settings.prod gunicorn thallk.wsgi -w 4 -b 127.0.0.1:8000
+    DJANGO_SETTINGS_MODULE=thallk.settings.prod uvicorn thallk.asgi:application --workers 4 --port 8000
+
+    python scripts/load_test.py --username ward --password ... --client-id 1 --concurrency 1,16,64
+
+Only the standard library is used, so the script runs from any machine that can reach
+the server.
+"""
+
+import argparse
+import http.client
+import json
+import re
+import statistics
+import threading
+import time
+from http.cookies import SimpleCookie
+from urllib.parse import urlencode, urlsplit
+
+CSRF_INPUT_RE = re.compile(r'name="csrfmiddlewaretoken" value="([^"]+)"')
+
+
+def connect(base_url, timeout):
+    parts = urlsplit(base_url)
+    connection_class = http.client.HTTPSConnection if parts.scheme == "https" else http.client.HTTPConnection
+    return connection_class(parts.netloc, timeout=timeout)
+
+
+def login(base_url, username, password, timeout):
+    """Log in through the Django login form and return the session's ``Cookie`` header."""
+    connection = connect(base_url, timeout)
+    connection.request("GET", "/accounts/login/")
+    response = connection.getresponse()
+    page = response.read().decode()
+    cookies = SimpleCookie()
+    for header in response.headers.get_all("Set-Cookie", []):
+        cookies.load(header)
+    match = CSRF_INPUT_RE.search(page)
+    if match is None or "csrftoken" not in cookies:
+        raise SystemExit("The login page did not return a CSRF token.")
+
+    body = urlencode({"username": username, "password": password, "csrfmiddlewaretoken": match.group(1)})
+    connection.request(
+        "POST",
+        "/accounts/login/",
+        body=body,
+        headers={
+            "Content-Type": "application/x-www-form-urlencoded",
+            "Cookie": f"csrftoken={cookies['csrftoken'].value}",
+            "Referer": base_url.rstrip("/") + "/accounts/login/",
+        },
+    )
+    response = connection.getresponse()
+    response.read()
+    for header in response.headers.get_all("Set-Cookie", []):
+        cookies.load(header)
+    connection.close()
+    if response.status != 302 or "sessionid" not in cookies:
+        raise SystemExit(f"Login failed with status {response.status}.")
+    return "; ".join(f"{name}={morsel.value}" for name, morsel in cookies.items())
+
+
+def poll(base_url, paths, cookie, deadline, timeout, results):
+    connection = connect(base_url, timeout)
+    latencies, errors = [], 0
+    index = 0
+    while time.perf_counter() < deadline:
+        path = paths[index % len(paths)]
+        index += 1
+        start = time.perf_counter()
+        try:
+            connection.request("GET", path, headers={"Cookie": cookie})
+            response = connection.getresponse()
+            response.read()
+            if response.status != 200:
+                errors += 1
+                continue
+        except (OSError, http.client.HTTPException):
+            errors += 1
+            connection.close()
+            connection = connect(base_url, timeout)
+            continue
+        latencies.append(time.perf_counter() - start)
+    connection.close()
+    results.append((latencies, errors))
+
+
+def run_level(base_url, paths, cookie, concurrency, duration, timeout):
+    results = []
+    deadline = time.perf_counter() + duration
+    threads = [
+        threading.Thread(target=poll, args=(base_url, paths, cookie, deadline, timeout, results))
+        for _ in range(concurrency)
+    ]
+    started = time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    elapsed = time.perf_counter() - started
+    latencies = sorted(latency * 1000 for worker, _ in results for latency in worker)
+    errors = sum(worker_errors for _, worker_errors in results)
+
+    def percentile(fraction):
+        return round(latencies[max(0, round(fraction * len(latencies)) - 1)], 1) if latencies else None
+
+    return {
+        "concurrency": concurrency,
+        "requests": len(latencies),
+        "errors": errors,
+        "requests_per_second": round(len(latencies) / elapsed, 1),
+        "p50_ms": round(statistics.median(latencies), 1) if latencies else None,
+        "p95_ms": percentile(0.95),
+        "p99_ms": percentile(0.99),
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.split("\n\n")[0])
+    parser.add_argument("--base-url", default="http://127.0.0.1:8000")
+    parser.add_argument("--username", required=True)
+    parser.add_argument("--password", required=True)
+    parser.add_argument("--client-id", type=int, help="Also poll this client's detail page and history tabs.")
+    parser.add_argument("--path", action="append", dest="paths", help="Path to poll; repeatable.")
+    parser.add_argument("--concurrency", default="1,8,32,64", help="Comma-separated tablet counts.")
+    parser.add_argument("--duration", type=float, default=10.0, help="Seconds per concurrency level.")
+    parser.add_argument(
+        "--warmup", type=float, default=3.0, help="Unrecorded seconds at the highest level, so every worker is warm."
+    )
+    parser.add_argument("--timeout", type=float, default=30.0)
+    parser.add_argument("--output", help="Also write the results as JSON to this file.")
+    options = parser.parse_args()
+
+    paths = options.paths or ["/clients/"]
+    if options.client_id:
+        paths += [
+            f"/clients/{view}/{options.client_id}"
+            for view in ("detail", "admissions", "transfusions", "investigations")
+        ]
+    cookie = login(options.base_url, options.username, options.password, options.timeout)
+    levels = [int(level) for level in options.concurrency.split(",")]
+    if options.warmup > 0:
+        run_level(options.base_url, paths, cookie, max(levels), options.warmup, options.timeout)
+
+    rows = []
+    print(f"{'tablets':>8} {'requests':>9} {'errors':>7} {'req/s':>8} {'p50 ms':>8} {'p95 ms':>8} {'p99 ms':>8}")
+    for concurrency in levels:
+        row = run_level(options.base_url, paths, cookie, concurrency, options.duration, options.timeout)
+        rows.append(row)
+        print(
+            f"{row['concurrency']:>8} {row['requests']:>9} {row['errors']:>7} {row['requests_per_second']:>8} "
+            f"{row['p50_ms']!s:>8} {row['p95_ms']!s:>8} {row['p99_ms']!s:>8}"
+        )
+    if options.output:
+        with open(options.output, "w", encoding="utf-8") as file:
+            json.dump({"base_url": options.base_url, "paths": paths, "levels": rows}, file, indent=2)
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,137 @@
+import hashlib
+import json
+import logging
+import random
+import time
+from collections import Counter
+
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction, sync_to_async
+from django.conf import settings
+from django.core.exceptions import MiddlewareNotUsed
+from django.db import connection
+
+logger = logging.getLogger("thallk.query_budget")
+
+
+class QueryRecorder:
+    """``connection.execute_wrapper`` callable that counts and times every query."""
+
+    def __init__(self):
+        self.count = 0
+        self.duration = 0.0
+        self.fingerprints = Counter()
+        self.samples = {}
+
+    def __call__(self, execute, sql, params, many, context):
+        start = time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            self.duration += time.perf_counter() - start
+            self.count += 1
+            # Parameters are bound separately, so the SQL text is already a fingerprint.
+            fingerprint = hashlib.sha1(sql.encode()).hexdigest()[:12]
+            self.fingerprints[fingerprint] += 1
+            self.samples.setdefault(fingerprint, sql[:200])
+
+    def duplicates(self):
+        return [
+            {"fingerprint": fingerprint, "count": count, "sql": self.samples[fingerprint]}
+            for fingerprint, count in self.fingerprints.most_common()
+            if count > 1
+        ]
+
+
+def add_execute_wrapper(wrapper):
+    connection.execute_wrappers.append(wrapper)
+
+
+def remove_execute_wrapper(wrapper):
+    connection.execute_wrappers.remove(wrapper)
+
+
+class QueryBudgetMiddleware:
+    """Log query count, DB time, duplicate queries and render time for a sample of requests.
+
+    Disabled unless ``QUERY_BUDGET_SAMPLE_RATE`` is above zero; unsampled requests pay
+    only for one ``random.random()`` call. Runs natively under both WSGI and ASGI, so
+    async views are not pushed onto a thread by this middleware.
+    """
+
+    sync_capable = True
+    async_capable = True
+
+    def __init__(self, get_response):
+        self.get_response = get_response
+        self.sample_rate = getattr(settings, "QUERY_BUDGET_SAMPLE_RATE", 0)
+        if self.sample_rate <= 0:
+            raise MiddlewareNotUsed
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+            # Django only looks up process_template_response; an async one saves a thread hop per response.
+            self.process_template_response = self.aprocess_template_response
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        if random.random() >= self.sample_rate:
+            return self.get_response(request)
+
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        with connection.execute_wrapper(recorder):
+            response = self.get_response(request)
+        self.log(request, response, recorder, start)
+        return response
+
+    async def __acall__(self, request):
+        if random.random() >= self.sample_rate:
+            return await self.get_response(request)
+
+        recorder = QueryRecorder()
+        start = time.perf_counter()
+        # Connections are per thread. The async ORM and template rendering run their queries through
+        # sync_to_async on this request's thread-sensitive worker, so the recorder is installed there.
+        await sync_to_async(add_execute_wrapper)(recorder)
+        try:
+            response = await self.get_response(request)
+        finally:
+            await sync_to_async(remove_execute_wrapper)(recorder)
+        self.log(request, response, recorder, start)
+        return response
+
+    def log(self, request, response, recorder, start):
+        finished = time.perf_counter()
+        render_start = getattr(request, "_query_budget_render_start", None)
+        match = getattr(request, "resolver_match", None)
+        record = {
+            "view": match.view_name if match else "<unresolved>",
+            "method": request.method,
+            "status": response.status_code,
+            "queries": recorder.count,
+            "db_ms": round(recorder.duration * 1000, 2),
+            "duration_ms": round((finished - start) * 1000, 2),
+            "render_ms": round((finished - render_start) * 1000, 2) if render_start else None,
+            "duplicates": recorder.duplicates(),
+        }
+        logger.info(json.dumps(record))
+
+    def process_template_response(self, request, response):
+        # Template responses are rendered after every process_template_response hook has run.
+        request._query_budget_render_start = time.perf_counter()
+        return response
+
+    async def aprocess_template_response(self, request, response):
+        # The instance attribute now points at this method, so call the class's sync hook explicitly.
+        return QueryBudgetMiddleware.process_template_response(self, request, response)
+
+
+def read_query_budget_log(paths):
+    """Yield the records written by QueryBudgetMiddleware, skipping lines that are not JSON."""
+    for path in paths:
+        with open(path, encoding="utf-8") as file:
+            for line in file:
+                try:
+                    yield json.loads(line)
+                except ValueError:
+                    continue
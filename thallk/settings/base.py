@@ -20,6 +20,7 @@ INSTALLED_APPS = [
 ]
 
 MIDDLEWARE = [
+    "thallk.middleware.QueryBudgetMiddleware",
     "django.middleware.security.SecurityMiddleware",
     "django.contrib.sessions.middleware.SessionMiddleware",
     "django.middleware.common.CommonMiddleware",
@@ -61,9 +62,43 @@ USE_I18N = True
 USE_TZ = True
 
 STATIC_URL = "static/"
+# Uploads live under client_photos/ here. They have no MEDIA_URL: photos are served by ClientPhotoView.
+MEDIA_ROOT = config("MEDIA_ROOT", default=str(BASE_DIR))
 DEFAULT_AUTO_FIELD = "django.db.models.BigAutoField"
 AUTH_USER_MODEL = "users.CustomUser"
+
+AUTHENTICATION_BACKENDS = ["users.backends.CachedPermissionBackend"]
 CRISPY_ALLOWED_TEMPLATE_PACKS = "tailwind"
 CRISPY_TEMPLATE_PACK = "tailwind"
 LOGIN_REDIRECT_URL = "/users/"
 LOGOUT_REDIRECT_URL = "/accounts/login/"
+
+# Transfusion chairs available per unit per day, used by the scheduling queue.
+TRANSFUSION_DAILY_CAPACITY = config("TRANSFUSION_DAILY_CAPACITY", default=20, cast=int)
+
+# Largest client photo accepted, in bytes and in pixels; uploads are downscaled when stored.
+CLIENT_PHOTO_MAX_UPLOAD_SIZE = config("CLIENT_PHOTO_MAX_UPLOAD_SIZE", default=10 * 1024 * 1024, cast=int)
+CLIENT_PHOTO_MAX_PIXELS = config("CLIENT_PHOTO_MAX_PIXELS", default=40_000_000, cast=int)
+
+# Fraction of requests whose SQL count, DB time and render time are logged; 0 disables the middleware.
+QUERY_BUDGET_SAMPLE_RATE = config("QUERY_BUDGET_SAMPLE_RATE", default=0.0, cast=float)
+QUERY_BUDGET_LOG = config("QUERY_BUDGET_LOG", default=str(BASE_DIR / "query_budget.log"))
+
+LOGGING = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {"message": {"format": "%(message)s"}},
+    "handlers": {
+        "query_budget": {
+            "class": "logging.handlers.RotatingFileHandler",
+            "filename": QUERY_BUDGET_LOG,
+            "maxBytes": 10 * 1024 * 1024,
+            "backupCount": 5,
+            "delay": True,
+            "formatter": "message",
+        },
+    },
+    "loggers": {
+        "thallk.query_budget": {"handlers": ["query_budget"], "level": "INFO", "propagate": False},
+    },
+}
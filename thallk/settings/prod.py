@@ -17,3 +17,14 @@ DATABASES = {
     }
 }
 STATIC_ROOT = BASE_DIR / "staticfiles"  # noqa F405
+
+# Authorization snapshots and the lookup and fragment version tokens are invalidated through the
+# cache, so every worker must share it: Redis when REDIS_URL is set, otherwise a database table
+# (create it once with `python manage.py createcachetable`).
+REDIS_URL = config("REDIS_URL", default="")
+if REDIS_URL:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.redis.RedisCache", "LOCATION": REDIS_URL}}
+else:
+    CACHES = {"default": {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "django_cache"}}
+
+QUERY_BUDGET_SAMPLE_RATE = config("QUERY_BUDGET_SAMPLE_RATE", default=0.02, cast=float)
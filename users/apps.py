@@ -1,4 +1,12 @@
 from django.apps import AppConfig
+from django.conf import settings
+from django.core.exceptions import ImproperlyConfigured
+
+# Backends whose entries are invisible to other processes.
+PROCESS_LOCAL_CACHES = (
+    "django.core.cache.backends.locmem.LocMemCache",
+    "django.core.cache.backends.dummy.DummyCache",
+)
 
 
 class UsersConfig(AppConfig):
@@ -7,3 +15,11 @@ class UsersConfig(AppConfig):
 
     def ready(self):
         import users.signals  # noqa: F401
+
+        # Authorization snapshots are revoked through the cache; a per-process cache would leave
+        # the other workers granting old permissions until the snapshot expires.
+        backend = settings.CACHES["default"]["BACKEND"]
+        if not settings.DEBUG and backend in PROCESS_LOCAL_CACHES:
+            raise ImproperlyConfigured(
+                f"The default cache ({backend}) is not shared between workers; configure CACHES (see REDIS_URL)."
+            )
@@ -0,0 +1,93 @@
+import time
+
+from django.contrib.auth.backends import ModelBackend
+from django.core.cache import cache
+
+from .roles import ROLE_PERMISSIONS
+
+AUTHZ_VERSION_KEY = "authz:version"
+AUTHZ_TIMEOUT = 60 * 60 * 24
+
+
+def _snapshot_key(user_id):
+    return f"authz:user:{user_id}"
+
+
+def bump_authorization_version():
+    """Invalidate every user's snapshot, e.g. after a group's permissions change."""
+    cache.set(AUTHZ_VERSION_KEY, time.time_ns(), None)
+
+
+def invalidate_user_authorization(user_id):
+    cache.delete(_snapshot_key(user_id))
+
+
+def authorization_snapshot(user):
+    """Permissions, unit id and role groups of ``user``, cached until invalidated.
+
+    The global version and the user's snapshot are fetched in one cache round trip;
+    a snapshot stamped with an older version is rebuilt.
+    """
+    snapshot = getattr(user, "_authz_snapshot", None)
+    if snapshot is not None:
+        return snapshot
+    key = _snapshot_key(user.pk)
+    cached = cache.get_many([AUTHZ_VERSION_KEY, key])
+    version = cached.get(AUTHZ_VERSION_KEY)
+    if version is None:
+        cache.add(AUTHZ_VERSION_KEY, time.time_ns(), None)
+        version = cache.get(AUTHZ_VERSION_KEY)
+    snapshot = cached.get(key)
+    if snapshot is None or snapshot["version"] != version:
+        snapshot = {
+            "version": version,
+            "permissions": sorted(ModelBackend().get_all_permissions(user)),
+            "unit_id": user.thalassemia_unit_id,
+            "role_groups": sorted(user.groups.filter(name__in=ROLE_PERMISSIONS).values_list("name", flat=True)),
+        }
+        cache.set(key, snapshot, AUTHZ_TIMEOUT)
+    user._authz_snapshot = snapshot
+    return snapshot
+
+
+async def aauthorization_snapshot(user):
+    """Async :func:`authorization_snapshot`; afterwards sync permission checks on ``user`` need no I/O."""
+    snapshot = getattr(user, "_authz_snapshot", None)
+    if snapshot is not None:
+        return snapshot
+    key = _snapshot_key(user.pk)
+    cached = await cache.aget_many([AUTHZ_VERSION_KEY, key])
+    version = cached.get(AUTHZ_VERSION_KEY)
+    if version is None:
+        await cache.aadd(AUTHZ_VERSION_KEY, time.time_ns(), None)
+        version = await cache.aget(AUTHZ_VERSION_KEY)
+    snapshot = cached.get(key)
+    if snapshot is None or snapshot["version"] != version:
+        role_groups = user.groups.filter(name__in=ROLE_PERMISSIONS).values_list("name", flat=True)
+        snapshot = {
+            "version": version,
+            "permissions": sorted(await ModelBackend().aget_all_permissions(user)),
+            "unit_id": user.thalassemia_unit_id,
+            "role_groups": sorted([name async for name in role_groups]),
+        }
+        await cache.aset(key, snapshot, AUTHZ_TIMEOUT)
+    user._authz_snapshot = snapshot
+    return snapshot
+
+
+class CachedPermissionBackend(ModelBackend):
+    """ModelBackend whose permission checks read the cached authorization snapshot."""
+
+    def get_all_permissions(self, user_obj, obj=None):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        if not hasattr(user_obj, "_perm_cache"):
+            user_obj._perm_cache = set(authorization_snapshot(user_obj)["permissions"])
+        return user_obj._perm_cache
+
+    async def aget_all_permissions(self, user_obj, obj=None):
+        if not user_obj.is_active or user_obj.is_anonymous or obj is not None:
+            return set()
+        if not hasattr(user_obj, "_perm_cache"):
+            user_obj._perm_cache = set((await aauthorization_snapshot(user_obj))["permissions"])
+        return user_obj._perm_cache
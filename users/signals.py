@@ -1,18 +1,80 @@
+from django.contrib.auth import get_user_model
 from django.contrib.auth.models import Group, Permission
-from django.db.models.signals import post_migrate
+from django.db import DEFAULT_DB_ALIAS
+from django.db.models.signals import m2m_changed, post_delete, post_migrate, post_save
 from django.dispatch import receiver
 
+from .backends import bump_authorization_version, invalidate_user_authorization
 from .roles import ROLE_PERMISSIONS
 
+User = get_user_model()
+
+
+ROLE_APPS = {"clients", "users"}
+
 
 @receiver(post_migrate)
-def sync_role_groups(sender, **kwargs):
-    for role_name, permission_names in ROLE_PERMISSIONS.items():
-        group, _ = Group.objects.get_or_create(name=role_name)
-        permissions = []
-        for permission_name in permission_names:
-            app_label, codename = permission_name.split(".", maxsplit=1)
-            permission = Permission.objects.filter(content_type__app_label=app_label, codename=codename).first()
-            if permission:
-                permissions.append(permission)
-        group.permissions.set(permissions)
+def sync_role_groups(sender, using=DEFAULT_DB_ALIAS, **kwargs):
+    """Create the role groups and align their permissions with ROLE_PERMISSIONS.
+
+    Runs a fixed number of queries, and writes (and so invalidates authorization
+    snapshots through m2m_changed) only for groups whose permissions differ.
+    """
+    if sender.label not in ROLE_APPS:
+        return
+
+    permission_names = {name for names in ROLE_PERMISSIONS.values() for name in names}
+    app_labels, codenames = zip(*(name.split(".", maxsplit=1) for name in permission_names))
+    permission_ids = {
+        f"{app_label}.{codename}": pk
+        for pk, app_label, codename in Permission.objects.using(using)
+        .filter(content_type__app_label__in=set(app_labels), codename__in=set(codenames))
+        .values_list("pk", "content_type__app_label", "codename")
+    }
+
+    groups = {group.name: group for group in Group.objects.using(using).filter(name__in=ROLE_PERMISSIONS)}
+    current = {}
+    for group_id, permission_id in (
+        Group.permissions.through.objects.using(using)
+        .filter(group__in=groups.values())
+        .values_list("group_id", "permission_id")
+    ):
+        current.setdefault(group_id, set()).add(permission_id)
+
+    for role_name, names in ROLE_PERMISSIONS.items():
+        group = groups.get(role_name) or Group.objects.using(using).create(name=role_name)
+        wanted = {permission_ids[name] for name in names if name in permission_ids}
+        if current.get(group.pk, set()) != wanted:
+            group.permissions.set(wanted)
+
+
+@receiver([post_save, post_delete], sender=User)
+def invalidate_user_snapshot(sender, instance, **kwargs):
+    invalidate_user_authorization(instance.pk)
+
+
+@receiver(m2m_changed, sender=User.groups.through)
+@receiver(m2m_changed, sender=User.user_permissions.through)
+def invalidate_membership_snapshots(sender, instance, action, reverse, pk_set, **kwargs):
+    if not action.startswith("post_"):
+        return
+    if not reverse:
+        invalidate_user_authorization(instance.pk)
+    elif pk_set:
+        for user_id in pk_set:
+            invalidate_user_authorization(user_id)
+    else:
+        # A cleared group or permission no longer says which users it had.
+        bump_authorization_version()
+
+
+@receiver(m2m_changed, sender=Group.permissions.through)
+def invalidate_group_permission_snapshots(sender, action, **kwargs):
+    if action.startswith("post_"):
+        bump_authorization_version()
+
+
+@receiver(post_delete, sender=Group)
+@receiver(post_delete, sender=Permission)
+def invalidate_snapshots_on_delete(sender, **kwargs):
+    bump_authorization_version()
@@ -1,7 +1,14 @@
-from django.test import TestCase, SimpleTestCase
+from django.apps import apps
+from django.core.exceptions import ImproperlyConfigured
+from django.test import TestCase, SimpleTestCase, override_settings
 from django.urls import reverse, resolve
-from django.contrib.auth.models import Group
+from django.contrib.auth.models import Group, Permission
+from django.core.cache import cache
+from clients.models.lookup import ThalassemiaUnit
+from users.backends import authorization_snapshot
 from users.models import CustomUser
+from users.roles import ROLE_PERMISSIONS
+from users.signals import sync_role_groups
 from users.views import index, login_view
 
 
@@ -40,3 +47,75 @@ class UserViewTest(TestCase):
         expected_roles = {"unit_data_entry", "unit_clinician", "unit_admin"}
         existing_roles = set(Group.objects.filter(name__in=expected_roles).values_list("name", flat=True))
         self.assertEqual(existing_roles, expected_roles)
+
+
+class SyncRoleGroupsTest(TestCase):
+    def test_sync_is_a_no_op_when_permissions_match(self):
+        with self.assertNumQueries(3):
+            sync_role_groups(apps.get_app_config("clients"))
+
+    def test_sync_skips_other_apps(self):
+        with self.assertNumQueries(0):
+            sync_role_groups(apps.get_app_config("auth"))
+
+    def test_sync_restores_drifted_groups(self):
+        clinician = Group.objects.get(name="unit_clinician")
+        clinician.permissions.clear()
+        Group.objects.filter(name="unit_admin").delete()
+        sync_role_groups(apps.get_app_config("users"))
+        self.assertEqual(clinician.permissions.count(), len(ROLE_PERMISSIONS["unit_clinician"]))
+        self.assertEqual(Group.objects.get(name="unit_admin").permissions.count(), len(ROLE_PERMISSIONS["unit_admin"]))
+
+
+class AuthorizationSnapshotTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.unit = ThalassemiaUnit.objects.create(name="Unit A")
+        self.user = CustomUser.objects.create_user(username="nurse", password="pass123", thalassemia_unit=self.unit)
+        self.group = Group.objects.get(name="unit_data_entry")
+
+    def fresh_user(self):
+        return CustomUser.objects.get(pk=self.user.pk)
+
+    def test_warm_snapshot_answers_permission_checks_without_queries(self):
+        self.user.groups.add(self.group)
+        self.fresh_user().has_perm("clients.view_client")
+        user = self.fresh_user()
+        with self.assertNumQueries(0):
+            self.assertTrue(user.has_perm("clients.view_client"))
+            self.assertFalse(user.has_perm("clients.delete_client"))
+            self.assertEqual(authorization_snapshot(user)["unit_id"], self.unit.pk)
+            self.assertEqual(authorization_snapshot(user)["role_groups"], ["unit_data_entry"])
+
+    def test_group_membership_change_invalidates(self):
+        self.assertFalse(self.fresh_user().has_perm("clients.view_client"))
+        self.user.groups.add(self.group)
+        self.assertTrue(self.fresh_user().has_perm("clients.view_client"))
+        self.group.user_set.remove(self.user)
+        self.assertFalse(self.fresh_user().has_perm("clients.view_client"))
+
+    def test_group_permission_change_invalidates(self):
+        self.user.groups.add(self.group)
+        self.assertFalse(self.fresh_user().has_perm("clients.delete_client"))
+        self.group.permissions.add(Permission.objects.get(codename="delete_client"))
+        self.assertTrue(self.fresh_user().has_perm("clients.delete_client"))
+
+    def test_unit_change_invalidates(self):
+        authorization_snapshot(self.fresh_user())
+        other_unit = ThalassemiaUnit.objects.create(name="Unit B")
+        self.user.thalassemia_unit = other_unit
+        self.user.save()
+        self.assertEqual(authorization_snapshot(self.fresh_user())["unit_id"], other_unit.pk)
+
+
+class SharedCacheRequirementTest(SimpleTestCase):
+    def test_process_local_cache_is_refused_without_debug(self):
+        config = apps.get_app_config("users")
+        with override_settings(DEBUG=False), self.assertRaises(ImproperlyConfigured):
+            config.ready()
+        with override_settings(DEBUG=True):
+            config.ready()
+        with override_settings(
+            DEBUG=False, CACHES={"default": {"BACKEND": "django.core.cache.backends.db.DatabaseCache", "LOCATION": "t"}}
+        ):
+            config.ready()